@@ -7,6 +7,7 @@ A machine learning project to predict match outcomes based on draft composition.
 Modules:
 - riot_api: Riot Games API interface
 - database: SQLite database interface
+- player_rows: player_stats row builder (mypyc-compilable hot path)
 - collect_data_safe: Data collection with rate limiting
 - prepare_data: ML data preparation
 - draft_predictor: Model training
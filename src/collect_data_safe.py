@@ -36,7 +36,19 @@ from riot_api import (
     get_high_elo_players, get_summoner_by_summoner_id, get_api_key_count,
     get_key_rotator, get_match_timeline
 )
-from database import MatchDatabase
+from database import MatchDatabase, TIMELINE_POSITION_KEYS, EXPORT_DTYPES
+
+# export_to_csv layout: the export columns, then the champion names added back.
+# The export schema is fixed, so both CSV headers are declared once here.
+EXPORT_CHAMPION_NAME_COLUMNS = {
+    col.replace('_champion_id', '_champion_name'): col for col in EXPORT_DTYPES if col.endswith('_champion_id')
+}
+EXPORT_CSV_COLUMNS = [*EXPORT_DTYPES, *EXPORT_CHAMPION_NAME_COLUMNS]
+DRAFT_CSV_COLUMNS = [col for col in EXPORT_CSV_COLUMNS if any(x in col.lower() for x in [
+    'champion_id', 'champion_name', 'ban', 'win',
+    'match_id', 'game_duration', 'first_',
+    'kills', 'deaths', 'assists', 'gold', 'cs', 'vision', 'kda'
+])]
 
 
 class RateLimiter:
@@ -133,11 +145,11 @@ class DataCollector:
     """
 
     def __init__(self, db_path: str = 'data/lol_matches.db', api_key_index: int = None,
-                 refresh_hours: int = 24, collect_timelines: bool = False):
+                 refresh_hours: int = 24, collect_timelines: bool = False, staging: bool = False):
         # Scale rate limiter by number of API keys available
         num_keys = get_api_key_count()
         self.rate_limiter = RateLimiter(num_keys=num_keys)
-        self.db = MatchDatabase(db_path)
+        self.db = MatchDatabase(db_path, staging=staging)
         self.api_key_index = api_key_index  # None = use rotation, 0/1/etc = use specific key
         self.refresh_hours = refresh_hours  # Re-fetch players after this many hours
         self.collect_timelines = collect_timelines  # Whether to fetch timeline data (gold per minute)
@@ -309,13 +321,36 @@ class DataCollector:
 
         return None
 
-    def fetch_and_store_timeline(self, match_id: str, match_detail: dict) -> bool:
+    def _stored_participant_positions(self, match_id: str, timeline_data: dict):
+        """
+        Map participantId -> (teamId, position) from the match's stored players,
+        matched to the timeline's participants on puuid.
+
+        Returns:
+            The map, or None if any participant is not stored
+        """
+        stored = self.db.get_participant_positions(match_id)
+        participants = timeline_data.get("info", {}).get("participants", [])
+        if not stored or not participants:
+            return None
+
+        participant_positions = {}
+        for p in participants:
+            position = stored.get(p.get("puuid"))
+            if position is None:
+                return None
+            participant_positions[p.get("participantId")] = position
+        return participant_positions
+
+    def fetch_and_store_timeline(self, match_id: str, match_detail: dict = None) -> bool:
         """
         Fetch timeline for a match and store gold data per minute.
 
         Args:
             match_id: The match ID
-            match_detail: The match details (to map participantId to position)
+            match_detail: The match details (to map participantId to position).
+                If None (match already stored), positions come from the stored
+                players and the details are only fetched when they are missing.
 
         Returns:
             True if timeline was stored successfully
@@ -326,28 +361,38 @@ class DataCollector:
             if not timeline_data:
                 return False
 
-            # Build participant position map from match details
-            info = match_detail.get("info", {})
-            participants = info.get("participants", [])
-
-            position_map = {
-                "TOP": "top",
-                "JUNGLE": "jungle",
-                "MIDDLE": "mid",
-                "BOTTOM": "adc",
-                "UTILITY": "support"
-            }
+            participant_positions = None
+            if match_detail is None:
+                participant_positions = self._stored_participant_positions(match_id, timeline_data)
+                if participant_positions is None:
+                    match_detail = self.make_api_request(get_match_details, 'match', match_id)
+                    if not match_detail:
+                        return False
+
+            if participant_positions is None:
+                # Build participant position map from match details
+                info = match_detail.get("info", {})
+                participants = info.get("participants", [])
+
+                position_map = {
+                    "TOP": "top",
+                    "JUNGLE": "jungle",
+                    "MIDDLE": "mid",
+                    "BOTTOM": "adc",
+                    "UTILITY": "support"
+                }
 
-            # Map participantId -> (teamId, position)
-            participant_positions = {}
-            for p in participants:
-                pid = p.get("participantId")
-                team_id = p.get("teamId")
-                pos = position_map.get(p.get("teamPosition"), "unknown")
-                participant_positions[pid] = (team_id, pos)
+                # Map participantId -> (teamId, position)
+                participant_positions = {}
+                for p in participants:
+                    pid = p.get("participantId")
+                    team_id = p.get("teamId")
+                    pos = position_map.get(p.get("teamPosition"), "unknown")
+                    participant_positions[pid] = (team_id, pos)
 
             # Process each frame (1 frame = 1 minute)
             frames = timeline_data.get("info", {}).get("frames", [])
+            gold_frames = []
 
             for frame in frames:
                 minute = frame.get("timestamp", 0) // 60000  # Convert ms to minutes
@@ -360,7 +405,7 @@ class DataCollector:
 
                 # Calculate team totals and per-position gold
                 team_gold = {"team_100": 0, "team_200": 0}
-                position_gold = {}
+                position_gold = dict.fromkeys(TIMELINE_POSITION_KEYS, 0)
 
                 for pid_str, pf in participant_frames.items():
                     pid = int(pid_str)
@@ -372,8 +417,10 @@ class DataCollector:
                         team_gold[team_key] = team_gold.get(team_key, 0) + gold
                         position_gold[f"{team_key}_{pos}"] = gold
 
-                # Store in database
-                self.db.insert_timeline_frame(match_id, minute, team_gold, position_gold)
+                gold_frames.append((minute, team_gold, position_gold))
+
+            # Store all frames in one transaction
+            self.db.insert_timeline_frames(match_id, gold_frames)
 
             return True
 
@@ -581,6 +628,8 @@ class DataCollector:
 
         # Process each NEW player
         new_matches_total = 0
+        inserted_before = self.db.writer_inserted
+        failed_before = self.db.writer_failed
 
         for i, entry in enumerate(new_entries):
             tier = entry.get('tier', 'DIAMOND')
@@ -619,15 +668,14 @@ class DataCollector:
                 # PARALLEL fetch of match details using all API keys
                 fetched_matches = self.fetch_match_details_parallel(match_ids, existing_matches)
 
-                # BATCH insert all fetched matches in a single transaction (with source elo)
-                new_matches_count = self.db.insert_matches_batch(fetched_matches, source_elo=tier)
-
-                # Update tracking sets
-                for match_id, _ in fetched_matches:
+                # Hand fetched matches to the background writer (batched inserts with source elo)
+                for match_id, match_detail in fetched_matches:
+                    self.db.enqueue_match(match_detail, source_elo=tier)
                     existing_matches.add(match_id)
+                new_matches_count = len(fetched_matches)
                 new_matches_total += new_matches_count
 
-                self.logger.info(f"  + Added {new_matches_count} new matches from {summoner_name}")
+                self.logger.info(f"  + Queued {new_matches_count} new matches from {summoner_name}")
 
                 # Collect timelines if enabled (for gold per minute data)
                 if self.collect_timelines and new_matches_count > 0:
@@ -639,9 +687,12 @@ class DataCollector:
                         self.logger.info(f"    + Collected {timelines_collected} timelines")
 
                 # Mark player as processed (use both puuid and summoner_id tracking)
-                self.db.save_player_progress(puuid)
+                # once the writer has stored their matches; if any of them
+                # fails, the player stays unprocessed and is collected again
                 if summoner_id:
-                    self.db.save_player_progress(f"sid_{summoner_id}")
+                    self.db.enqueue_player_progress(puuid, f"sid_{summoner_id}")
+                else:
+                    self.db.enqueue_player_progress(puuid)
 
                 # Save stats periodically
                 if i % 5 == 0:
@@ -651,7 +702,12 @@ class DataCollector:
                 self.logger.error(f"Failed to process {summoner_name}: {e}")
                 continue
 
-        # Final save
+        # Final save (wait for the writer so the stats below include this batch)
+        failed = self.db.flush_writes() - failed_before
+        inserted = self.db.writer_inserted - inserted_before
+        self.logger.info(f"Inserted {inserted} of {new_matches_total} queued matches")
+        if failed:
+            self.logger.error(f"{failed} queued matches failed to insert (see errors above)")
         self._save_stats()
         self.print_stats()
 
@@ -670,29 +726,35 @@ class DataCollector:
         self.logger.info(f"Players processed: {db_stats['processed_players']}")
 
     def export_to_csv(self):
-        """Export database to CSV files for backward compatibility"""
+        """
+        Export database to CSV files for backward compatibility.
+
+        The export is streamed chunk by chunk (MatchDatabase.iter_dataframe)
+        into both CSVs, so memory stays bounded by one chunk of matches.
+        """
         try:
             self.logger.info("Exporting matches to CSV...")
 
-            df = self.db.export_to_dataframe()
-
-            if df.empty:
+            if self.db.get_match_count() == 0:
                 self.logger.warning("No matches found to export")
                 return
 
-            # Save full dataset
-            df.to_csv("match_data_from_db.csv", index=False)
-            self.logger.info(f"Exported {len(df)} matches to match_data_from_db.csv")
+            # The ML export only carries champion IDs; add the names back for the CSVs
+            champion_names = self.db.get_champion_names()
+            exported = 0
+
+            # Full dataset and simplified draft-focused dataset, written from the same chunks
+            with open("match_data_from_db.csv", "w", encoding="utf-8", newline="") as full_csv, \
+                    open("draft_data_from_db.csv", "w", encoding="utf-8", newline="") as draft_csv:
+                for df in self.db.iter_dataframe():
+                    for name_col, id_col in EXPORT_CHAMPION_NAME_COLUMNS.items():
+                        df[name_col] = df[id_col].map(champion_names)
 
-            # Save simplified draft-focused dataset
-            draft_columns = [col for col in df.columns if any(x in col.lower() for x in [
-                'champion_id', 'champion_name', 'ban', 'win',
-                'match_id', 'game_duration', 'first_',
-                'kills', 'deaths', 'assists', 'gold', 'cs', 'vision', 'kda'
-            ])]
+                    df.to_csv(full_csv, columns=EXPORT_CSV_COLUMNS, header=exported == 0, index=False)
+                    df.to_csv(draft_csv, columns=DRAFT_CSV_COLUMNS, header=exported == 0, index=False)
+                    exported += len(df)
 
-            df_draft = df[draft_columns]
-            df_draft.to_csv("draft_data_from_db.csv", index=False)
+            self.logger.info(f"Exported {exported} matches to match_data_from_db.csv")
             self.logger.info(f"Exported draft data to draft_data_from_db.csv")
 
         except Exception as e:
@@ -739,14 +801,9 @@ class DataCollector:
             (match_id, success: bool, error_msg: str or None)
         """
         try:
-            # Fetch match detail (needed for participant positions)
-            match_detail = self.make_api_request(get_match_details, 'match', match_id)
-
-            if not match_detail:
-                return (match_id, False, "Failed to fetch match details")
-
-            # Fetch and store timeline
-            if self.fetch_and_store_timeline(match_id, match_detail):
+            # Fetch and store timeline; participant positions come from the stored
+            # match, so its details are not downloaded again
+            if self.fetch_and_store_timeline(match_id):
                 return (match_id, True, None)
             else:
                 return (match_id, False, "Failed to fetch/store timeline")
@@ -774,7 +831,7 @@ class DataCollector:
             query = '''
                 SELECT DISTINCT m.match_id
                 FROM matches m
-                LEFT JOIN match_timeline mt ON m.match_id = mt.match_id
+                LEFT JOIN match_timeline_packed mt ON m.match_id = mt.match_id
                 WHERE mt.match_id IS NULL
             '''
             if limit:
@@ -882,6 +939,8 @@ def main():
                        help='Fetch timelines for existing matches (gold per minute data)')
     parser.add_argument('--backfill-names', action='store_true',
                        help='Backfill missing ban names and summoner spell names from IDs')
+    parser.add_argument('--staging', action='store_true',
+                       help='Stage new matches in an in-memory DB and flush them to disk in bulk (every 60s / 10k matches)')
     parser.add_argument('--limit', type=int,
                        help='Limit number of matches to process (for --backfill-timelines)')
 
@@ -891,7 +950,8 @@ def main():
         db_path=args.db,
         api_key_index=args.api_key_index,
         refresh_hours=args.refresh_hours,
-        collect_timelines=args.collect_timelines
+        collect_timelines=args.collect_timelines,
+        staging=args.staging
     )
 
     if args.reset:
@@ -914,7 +974,7 @@ def main():
         patches = collector.db.get_patches()
         if patches:
             for patch_info in patches:
-                patch = patch_info.get('patch')
+                patch = patch_info.patch
                 if patch:
                     collector.db.recalculate_champion_rates(patch)
                     print(f"  Recalculated stats for patch {patch}")
@@ -1035,22 +1095,29 @@ def main():
 
         except KeyboardInterrupt:
             print(f"\n\nStopped by user after {batch_number - 1} batches.")
-            stats = collector.db.get_stats()
-            print(f"Total matches in database: {stats['total_matches']}")
+        finally:
+            # Write out the queued matches / progress whatever stopped the loop
+            collector.db.stop_writer()
+
+        stats = collector.db.get_stats()
+        print(f"Total matches in database: {stats['total_matches']}")
 
-            # Offer to export to CSV
-            print("\nTo export data for ML training:")
-            print(f"  python src/collect_data_safe.py --export-csv --db {args.db}")
-            print("\nTo prepare data for training:")
-            print("  python src/prepare_data.py")
+        # Offer to export to CSV
+        print("\nTo export data for ML training:")
+        print(f"  python src/collect_data_safe.py --export-csv --db {args.db}")
+        print("\nTo prepare data for training:")
+        print("  python src/prepare_data.py")
 
     else:
         # Single run mode
-        num_matches = collector.collect_matches(
-            args.players, args.matches,
-            high_elo_only=args.high_elo_only,
-            elo_filter=args.elo
-        )
+        try:
+            num_matches = collector.collect_matches(
+                args.players, args.matches,
+                high_elo_only=args.high_elo_only,
+                elo_filter=args.elo
+            )
+        finally:
+            collector.db.stop_writer()
 
         if num_matches > 0:
             print(f"\nCollection complete! Total matches: {num_matches}")
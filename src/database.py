@@ -8,12 +8,525 @@ for better reliability during long-running data collection.
 
 import sqlite3
 import json
-import pandas as pd
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import weakref
+from collections import namedtuple
+from itertools import compress, groupby
+from operator import itemgetter
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Optional, Set, Dict, Any, List
+from urllib.request import pathname2url
+from typing import TYPE_CHECKING, Optional, Set, Dict, Any, Iterator, List, Tuple
+
+# pandas / numpy are only needed by the DataFrame / array export methods, which import them lazily
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 from config import REGION
+from player_rows import (
+    POSITION_MAP, PLAYER_STATS_COLUMNS, append_player_columns, build_player_row
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Sentinel pushed on the write queue to stop the writer thread
+_WRITER_STOP = object()
+
+# Write queue item: mark these players processed once every match queued
+# before it has been written (see MatchDatabase.enqueue_player_progress)
+_PlayerProgress = namedtuple('_PlayerProgress', ['puuids'])
+
+MATCH_COLUMNS = [
+    'match_id', 'region', 'source_elo', 'game_creation', 'game_duration', 'game_version',
+    'queue_id', 'map_id', 'game_mode', 'game_type',
+    'team_100_win', 'team_100_early_surrendered', 'team_200_early_surrendered'
+]
+
+TEAM_STATS_COLUMNS = [
+    'match_id', 'team_id',
+    'first_blood', 'first_tower', 'first_inhibitor',
+    'first_dragon', 'first_rift_herald', 'first_baron',
+    'dragon_kills', 'baron_kills', 'tower_kills',
+    'inhibitor_kills', 'rift_herald_kills',
+    'ban_1_champion_id', 'ban_2_champion_id', 'ban_3_champion_id',
+    'ban_4_champion_id', 'ban_5_champion_id',
+    'ban_1_name', 'ban_2_name', 'ban_3_name', 'ban_4_name', 'ban_5_name'
+]
+
+# Per-position gold columns of match_timeline, keyed like position_gold dicts
+TIMELINE_POSITION_KEYS = [
+    f'team_{team}_{position}' for team in (100, 200)
+    for position in ('top', 'jungle', 'mid', 'adc', 'support')
+]
+
+TIMELINE_COLUMNS = [
+    'match_id', 'minute', 'team_100_gold', 'team_200_gold', 'gold_diff',
+    *(f'{key}_gold' for key in TIMELINE_POSITION_KEYS)
+]
+
+# match_timeline_packed.data: one record of TIMELINE_COLUMNS[1:] (minute + 13
+# gold values) as little-endian int32 per minute, sorted by minute
+TIMELINE_FRAME = struct.Struct(f'<{len(TIMELINE_COLUMNS) - 1}i')
+
+MASTERY_COLUMNS = [
+    'puuid', 'champion_id', 'champion_level', 'champion_points',
+    'last_play_time', 'tokens_earned', 'updated_at'
+]
+
+PATCH_COLUMNS = ['patch', 'release_date', 'data_dragon_version', 'notes_url', 'created_at']
+
+CHAMPION_PATCH_STATS_COLUMNS = [
+    'champion_id', 'patch', 'games_played', 'wins', 'bans',
+    'winrate', 'pickrate', 'banrate',
+    'top_games', 'jungle_games', 'mid_games', 'adc_games', 'support_games', 'updated_at'
+]
+
+# Row types of the list-returning accessors (tuples: cheaper to build than dicts)
+TimelineRow = namedtuple('TimelineRow', TIMELINE_COLUMNS)
+MasteryRow = namedtuple('MasteryRow', MASTERY_COLUMNS)
+PatchRow = namedtuple('PatchRow', PATCH_COLUMNS)
+ChampionPatchStatsRow = namedtuple('ChampionPatchStatsRow', CHAMPION_PATCH_STATS_COLUMNS)
+TeammateRow = namedtuple('TeammateRow', ['teammate_puuid', 'teammate_name', 'games_together', 'wins_together'])
+
+# Tables mirrored in the staging DB, in flush order
+STAGED_TABLES = [
+    ('matches', MATCH_COLUMNS),
+    ('team_stats', TEAM_STATS_COLUMNS),
+    ('player_stats', PLAYER_STATS_COLUMNS),
+]
+
+
+def _insert_sql(table: str, columns: List[str], verb: str = 'INSERT') -> str:
+    """Build a parameterized INSERT (or INSERT OR ...) for the given columns"""
+    return f'{verb} INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})'
+
+
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """
+    Bounds (lo, hi) such that `col >= lo AND col < hi` matches exactly the
+    strings starting with prefix. Unlike LIKE 'prefix%' this is always an
+    index range scan (and treats '_' / '%' in the prefix literally).
+    """
+    if not prefix:
+        return '', chr(0x10FFFF)
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _pack_timeline(frames: Dict[int, tuple]) -> bytes:
+    """Pack {minute: (minute, gold...)} frames into a match_timeline_packed blob"""
+    return b''.join(TIMELINE_FRAME.pack(*frames[minute]) for minute in sorted(frames))
+
+
+def _unpack_timeline(data: bytes) -> Dict[int, tuple]:
+    """Inverse of _pack_timeline"""
+    return {frame[0]: frame for frame in TIMELINE_FRAME.iter_unpack(data)}
+
+
+_team_gold_getter = itemgetter('team_100', 'team_200')
+_position_gold_getter = itemgetter(*TIMELINE_POSITION_KEYS)
+
+
+def _timeline_frame(minute: int, team_gold: Dict, position_gold: Dict) -> tuple:
+    """
+    Build a (minute, gold...) frame record. Complete dicts (every team /
+    position key present, as built by the collector) take the itemgetter fast
+    path; missing keys fall back to 0.
+    """
+    try:
+        team_100, team_200 = _team_gold_getter(team_gold)
+        positions = _position_gold_getter(position_gold)
+    except KeyError:
+        team_100, team_200 = team_gold.get('team_100', 0), team_gold.get('team_200', 0)
+        positions = [position_gold.get(key, 0) for key in TIMELINE_POSITION_KEYS]
+    return (minute, team_100, team_200, team_100 - team_200, *positions)
+
+
+_INSERT_MATCH_SQL = _insert_sql('matches', MATCH_COLUMNS)
+_INSERT_TEAM_SQL = _insert_sql('team_stats', TEAM_STATS_COLUMNS)
+_INSERT_PLAYER_SQL = _insert_sql('player_stats', PLAYER_STATS_COLUMNS)
+# Fused existence check + insert (SQLite >= 3.35): returns a row only if inserted
+_INSERT_MATCH_RETURNING_SQL = _insert_sql('matches', MATCH_COLUMNS, 'INSERT OR IGNORE') + ' RETURNING match_id'
+
+# Same inserts routed to the attached staging DB
+_STAGED_INSERT_MATCH_SQL = _insert_sql('mem.matches', MATCH_COLUMNS)
+_STAGED_INSERT_TEAM_SQL = _insert_sql('mem.team_stats', TEAM_STATS_COLUMNS)
+_STAGED_INSERT_PLAYER_SQL = _insert_sql('mem.player_stats', PLAYER_STATS_COLUMNS)
+
+# Which of a batch of match ids (passed as one JSON array) are already stored
+_SELECT_EXISTING_MATCH_IDS_SQL = 'SELECT match_id FROM main.matches WHERE match_id IN (SELECT value FROM json_each(?))'
+_SELECT_STAGED_MATCH_IDS_SQL = 'SELECT match_id FROM mem.matches WHERE match_id IN (SELECT value FROM json_each(?))'
+
+# Statements reused by the single-row accessors of MatchDatabase
+_UPSERT_PLAYER_PROGRESS_SQL = '''
+    INSERT INTO collection_progress (puuid, processed_at, processed_at_epoch)
+    VALUES (?, CURRENT_TIMESTAMP, ?)
+    ON CONFLICT(puuid) DO UPDATE SET
+        processed_at = CURRENT_TIMESTAMP,
+        processed_at_epoch = excluded.processed_at_epoch
+'''
+
+_UPSERT_STAT_SQL = 'INSERT OR REPLACE INTO collection_stats (key, value) VALUES (?, ?)'
+
+_UPSERT_SUMMONER_SQL = '''
+    INSERT INTO summoners (puuid, riot_id_name, riot_id_tagline, current_tier, current_rank, current_lp, last_seen_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(puuid) DO UPDATE SET
+        riot_id_name = COALESCE(excluded.riot_id_name, riot_id_name),
+        riot_id_tagline = COALESCE(excluded.riot_id_tagline, riot_id_tagline),
+        current_tier = COALESCE(excluded.current_tier, current_tier),
+        current_rank = COALESCE(excluded.current_rank, current_rank),
+        current_lp = COALESCE(excluded.current_lp, current_lp),
+        total_games_tracked = total_games_tracked + 1,
+        last_seen_at = CURRENT_TIMESTAMP,
+        last_updated_at = CURRENT_TIMESTAMP
+'''
+
+_UPSERT_ELO_HISTORY_SQL = '''
+    INSERT INTO summoner_elo_history (puuid, patch, tier, rank, lp)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(puuid, patch) DO UPDATE SET
+        tier = excluded.tier,
+        rank = excluded.rank,
+        lp = excluded.lp,
+        recorded_at = CURRENT_TIMESTAMP
+'''
+
+_UPSERT_MASTERY_SQL = '''
+    INSERT INTO champion_mastery (puuid, champion_id, champion_level, champion_points, last_play_time, tokens_earned)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(puuid, champion_id) DO UPDATE SET
+        champion_level = excluded.champion_level,
+        champion_points = excluded.champion_points,
+        last_play_time = excluded.last_play_time,
+        tokens_earned = excluded.tokens_earned,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+# LIMIT -1 means no limit
+_SELECT_SUMMONER_MASTERY_SQL = f'''
+    SELECT {", ".join(MASTERY_COLUMNS)} FROM champion_mastery
+    WHERE puuid = ?
+    ORDER BY champion_points DESC
+    LIMIT ?
+'''
+
+_SELECT_CHAMPION_MASTERY_SQL = 'SELECT * FROM champion_mastery WHERE puuid = ? AND champion_id = ?'
+
+_UPSERT_PATCH_SQL = '''
+    INSERT INTO patches (patch, release_date, data_dragon_version)
+    VALUES (?, ?, ?)
+    ON CONFLICT(patch) DO UPDATE SET
+        release_date = COALESCE(excluded.release_date, release_date),
+        data_dragon_version = COALESCE(excluded.data_dragon_version, data_dragon_version)
+'''
+
+_SELECT_PATCHES_SQL = f'SELECT {", ".join(PATCH_COLUMNS)} FROM patches ORDER BY patch DESC'
+
+_SELECT_PACKED_TIMELINE_SQL = 'SELECT data FROM match_timeline_packed WHERE match_id = ?'
+_UPSERT_PACKED_TIMELINE_SQL = '''
+    INSERT INTO match_timeline_packed (match_id, minutes, data) VALUES (?, ?, ?)
+    ON CONFLICT(match_id) DO UPDATE SET minutes = excluded.minutes, data = excluded.data
+'''
+
+# p1 is a covering search on idx_player_stats_puuid_match, p2 on
+# idx_player_stats_match_team_puuid; IS (unlike =) never yields NULL
+_SELECT_COMMON_TEAMMATES_SQL = '''
+    SELECT
+        p2.puuid as teammate_puuid,
+        p2.riot_id_name as teammate_name,
+        COUNT(*) as games_together,
+        SUM(m.team_100_win IS (p1.team_id = 100)) as wins_together
+    FROM player_stats p1
+    JOIN player_stats p2 ON p1.match_id = p2.match_id AND p1.team_id = p2.team_id AND p1.puuid != p2.puuid
+    JOIN matches m ON p1.match_id = m.match_id
+    WHERE p1.puuid = ?
+    GROUP BY p2.puuid, p2.riot_id_name
+    ORDER BY games_together DESC
+    LIMIT ?
+'''
+
+_SELECT_CHAMPION_PATCH_STATS_SQL = f'''
+    SELECT {", ".join(CHAMPION_PATCH_STATS_COLUMNS)} FROM champion_patch_stats
+    WHERE patch = ?
+    ORDER BY games_played DESC
+'''
+
+_COUNT_MATCHES_SQL = 'SELECT COUNT(*) FROM matches'
+
+_SELECT_PARTICIPANT_POSITIONS_SQL = '''
+    SELECT puuid, team_id, position FROM player_stats
+    WHERE match_id = ? AND puuid IS NOT NULL
+'''
+
+_SELECT_CHAMPION_NAMES_SQL = '''
+    SELECT champion_id, MAX(champion_name) FROM player_stats
+    WHERE champion_name IS NOT NULL
+    GROUP BY champion_id
+'''
+
+# Column-oriented accessors: (column, numpy dtype), narrowest dtype that fits
+MASTERY_ARRAY_FIELDS = [
+    ('champion_id', 'int16'), ('champion_level', 'int8'),
+    ('champion_points', 'int32'), ('last_play_time', 'int64'),
+]
+
+CHAMPION_STATS_ARRAY_FIELDS = [
+    ('champion_id', 'int16'), ('games_played', 'int32'), ('wins', 'int32'), ('bans', 'int32'),
+    ('winrate', 'float32'), ('pickrate', 'float32'), ('banrate', 'float32'),
+]
+
+
+def build_match_rows(matches: list, source_elo: str = None) -> Tuple[list, list, List[list]]:
+    """
+    Build the matches / team_stats / player_stats rows of a batch of
+    (match_id, match_data) tuples, without touching the database, so it can
+    run in worker processes (see MatchDatabase.insert_match_rows).
+
+    Matches without an id, and repeats of an id within the batch, are skipped.
+    Player rows come back column by column (struct-of-arrays), one list per
+    player_stats column in _INSERT_PLAYER_SQL order.
+
+    Returns:
+        (match_rows, team_rows, player_columns)
+    """
+    # Get champion data for ban names and spell names (once per batch)
+    try:
+        from champion_data import get_champion_data
+        champion_data = get_champion_data()
+    except Exception:
+        champion_data = None
+
+    try:
+        from champion_data import get_summoner_spell_name
+    except Exception:
+        get_summoner_spell_name = lambda x: f"Spell_{x}"
+
+    match_rows = []
+    team_rows = []
+
+    # One list per player_stats column, in _INSERT_PLAYER_SQL order
+    player_columns = [[] for _ in PLAYER_STATS_COLUMNS]
+
+    seen_ids = set()
+
+    for match_id, match_data in matches:
+        if not match_id or match_id in seen_ids:
+            continue
+
+        seen_ids.add(match_id)
+        info = match_data.get("info", {})
+
+        # Extract team info
+        teams = info.get("teams", [])
+        team_100_win = None
+        team_100_early_surrendered = False
+        team_200_early_surrendered = False
+
+        for team in teams:
+            if team.get("teamId") == 100:
+                team_100_win = team.get("win")
+                team_100_early_surrendered = team.get("teamEarlySurrendered", False)
+            elif team.get("teamId") == 200:
+                team_200_early_surrendered = team.get("teamEarlySurrendered", False)
+
+        match_rows.append((
+            match_id,
+            REGION,
+            source_elo,
+            info.get("gameCreation"),
+            info.get("gameDuration"),
+            info.get("gameVersion"),
+            info.get("queueId"),
+            info.get("mapId"),
+            info.get("gameMode"),
+            info.get("gameType"),
+            team_100_win,
+            team_100_early_surrendered,
+            team_200_early_surrendered
+        ))
+
+        for team in teams:
+            objectives = team.get("objectives", {})
+            bans = team.get("bans", [])
+
+            ban_ids = [None] * 5
+            ban_names = [None] * 5
+            for i, ban in enumerate(bans[:5]):
+                ban_id = ban.get("championId")
+                ban_ids[i] = ban_id
+                if champion_data and ban_id and ban_id > 0:
+                    ban_names[i] = champion_data.get_champion_name(ban_id)
+
+            team_rows.append((
+                match_id, team.get("teamId"),
+                objectives.get("champion", {}).get("first", False),
+                objectives.get("tower", {}).get("first", False),
+                objectives.get("inhibitor", {}).get("first", False),
+                objectives.get("dragon", {}).get("first", False),
+                objectives.get("riftHerald", {}).get("first", False),
+                objectives.get("baron", {}).get("first", False),
+                objectives.get("dragon", {}).get("kills", 0),
+                objectives.get("baron", {}).get("kills", 0),
+                objectives.get("tower", {}).get("kills", 0),
+                objectives.get("inhibitor", {}).get("kills", 0),
+                objectives.get("riftHerald", {}).get("kills", 0),
+                *ban_ids,
+                *ban_names
+            ))
+
+        # Append each participant column by column
+        for participant in info.get("participants", []):
+            append_player_columns(player_columns, match_id, participant, get_summoner_spell_name)
+
+    return match_rows, team_rows, player_columns
+
+
+def _array_select(fields: List[Tuple[str, str]]) -> str:
+    """SELECT list for _fetch_arrays: NULL integers become 0 (floats stay NULL -> NaN)"""
+    return ', '.join(col if dtype.startswith('float') else f'COALESCE({col}, 0)' for col, dtype in fields)
+
+
+_SELECT_MASTERY_ARRAYS_SQL = f'''
+    SELECT {_array_select(MASTERY_ARRAY_FIELDS)} FROM champion_mastery
+    WHERE puuid = ?
+    ORDER BY champion_points DESC
+'''
+
+_SELECT_CHAMPION_STATS_ARRAYS_SQL = f'''
+    SELECT {_array_select(CHAMPION_STATS_ARRAY_FIELDS)} FROM champion_patch_stats
+    WHERE patch = ?
+    ORDER BY games_played DESC
+'''
+
+
+def _champion_patch_upsert_sql(position: Optional[str]) -> str:
+    """
+    Build the champion_patch_stats upsert, specialized for one position so the
+    {position}_games bump happens in the same statement (position=None skips it).
+    """
+    columns = 'champion_id, patch, games_played, wins'
+    values = '?, ?, 1, ?'
+    updates = 'games_played = games_played + 1, wins = wins + excluded.wins'
+    if position is not None:
+        position_col = f'{position}_games'
+        columns += f', {position_col}'
+        values += ', 1'
+        updates += f', {position_col} = {position_col} + 1'
+    return f'''
+        INSERT INTO champion_patch_stats ({columns})
+        VALUES ({values})
+        ON CONFLICT(champion_id, patch) DO UPDATE SET
+            {updates},
+            updated_at = CURRENT_TIMESTAMP
+    '''
+
+
+# One prepared upsert per position, plus None for unknown positions
+_CHAMPION_PATCH_UPSERT_SQL = {
+    position: _champion_patch_upsert_sql(position)
+    for position in (*POSITION_MAP.values(), None)
+}
+
+# export_to_dataframe layout: (source column, export suffix, pandas dtype).
+# Nullable dtypes since every team/player column comes from a LEFT JOIN.
+EXPORT_MATCH_FIELDS = [
+    ('match_id', 'string'), ('game_duration', 'Int32'), ('game_version', 'string'),
+    ('team_100_win', 'boolean'),
+    ('team_100_early_surrendered', 'boolean'), ('team_200_early_surrendered', 'boolean'),
+]
+
+EXPORT_TEAM_FIELDS = [
+    ('first_blood', 'first_blood', 'boolean'), ('first_tower', 'first_tower', 'boolean'),
+    ('first_inhibitor', 'first_inhibitor', 'boolean'), ('first_dragon', 'first_dragon', 'boolean'),
+    ('first_rift_herald', 'first_rift_herald', 'boolean'), ('first_baron', 'first_baron', 'boolean'),
+    ('dragon_kills', 'dragon_kills', 'Int8'), ('baron_kills', 'baron_kills', 'Int8'),
+    ('tower_kills', 'tower_kills', 'Int8'), ('inhibitor_kills', 'inhibitor_kills', 'Int8'),
+    ('rift_herald_kills', 'rift_herald_kills', 'Int8'),
+    ('ban_1_champion_id', 'ban_1', 'Int16'), ('ban_2_champion_id', 'ban_2', 'Int16'),
+    ('ban_3_champion_id', 'ban_3', 'Int16'), ('ban_4_champion_id', 'ban_4', 'Int16'),
+    ('ban_5_champion_id', 'ban_5', 'Int16'),
+]
+
+EXPORT_POSITIONS = ['top', 'jungle', 'mid', 'adc', 'support']
+
+# Champion names are left out (derivable from champion_id, see get_champion_names)
+EXPORT_PLAYER_FIELDS = [
+    ('champion_id', 'champion_id', 'Int16'),
+    ('kills', 'kills', 'Int8'), ('deaths', 'deaths', 'Int8'), ('assists', 'assists', 'Int8'),
+    ('gold_earned', 'gold', 'Int32'), ('total_minions_killed', 'cs', 'Int16'),
+    ('vision_score', 'vision', 'Int16'), ('total_damage_to_champions', 'damage', 'Int32'),
+    ('kda', 'kda', 'Float32'),
+]
+
+EXPORT_DTYPES = dict(EXPORT_MATCH_FIELDS)
+for _team in (100, 200):
+    EXPORT_DTYPES.update({f'team_{_team}_{name}': dtype for _, name, dtype in EXPORT_TEAM_FIELDS})
+for _team in (100, 200):
+    for _position in EXPORT_POSITIONS:
+        EXPORT_DTYPES.update({
+            f'team_{_team}_{_position}_{name}': dtype for _, name, dtype in EXPORT_PLAYER_FIELDS
+        })
+
+
+def _export_query() -> str:
+    """
+    Build the one-row-per-match export query.
+
+    player_stats is joined once per team/position; each join is a lookup on
+    the UNIQUE (match_id, team_id, position) index, which is cheaper than
+    reading every player row and pivoting it with a GROUP BY.
+    """
+    select = [f'm.{col}' for col, _ in EXPORT_MATCH_FIELDS]
+    joins = []
+    for team in (100, 200):
+        select += [f't{team}.{col} AS team_{team}_{name}' for col, name, _ in EXPORT_TEAM_FIELDS]
+        joins.append(f'LEFT JOIN team_stats t{team} ON m.match_id = t{team}.match_id AND t{team}.team_id = {team}')
+    for team in (100, 200):
+        for position in EXPORT_POSITIONS:
+            alias = f'p{team}_{position}'
+            select += [f'{alias}.{col} AS team_{team}_{position}_{name}' for col, name, _ in EXPORT_PLAYER_FIELDS]
+            joins.append(
+                f'LEFT JOIN player_stats {alias} ON m.match_id = {alias}.match_id'
+                f" AND {alias}.team_id = {team} AND {alias}.position = '{position}'"
+            )
+
+    join_clause = '\n        '.join(joins)
+    return f'''
+        SELECT {", ".join(select)}
+        FROM matches m
+        {join_clause}
+    '''
+
+
+_EXPORT_SQL = _export_query()
+
+class _ThreadConnection(sqlite3.Connection):
+    """sqlite3.Connection subclass so per-thread connections can be tracked weakly"""
+
+
+def _close_connections(connections: 'weakref.WeakSet'):
+    """
+    Close the tracked connections of a MatchDatabase. Read-write connections
+    run PRAGMA optimize first, as SQLite recommends.
+
+    A plain function over the WeakSet (not a bound method) so the
+    weakref.finalize hook that calls it at exit doesn't keep the instance alive.
+    """
+    for conn in list(connections):
+        if not conn.read_only:
+            try:
+                conn.execute('PRAGMA optimize')
+            except sqlite3.Error:
+                pass
+        conn.close()
+    connections.clear()
 
 
 class MatchDatabase:
@@ -27,33 +540,191 @@ class MatchDatabase:
     - Export to pandas DataFrame for ML
     """
 
-    def __init__(self, db_path: str = 'lol_matches.db'):
+    # Secondary indices on the match tables, dropped and rebuilt by bulk_mode()
+    BULK_LOAD_INDICES = [
+        ('idx_player_stats_champion', 'player_stats(champion_id)'),
+        ('idx_player_stats_puuid_match', 'player_stats(puuid, match_id, team_id)'),
+        ('idx_player_stats_match_team_puuid', 'player_stats(match_id, team_id, puuid, riot_id_name)'),
+        ('idx_team_stats_match', 'team_stats(match_id)'),
+        ('idx_matches_game_creation', 'matches(game_creation)'),
+        ('idx_matches_game_version', 'matches(game_version)'),
+        ('idx_matches_region', 'matches(region)'),
+        ('idx_matches_source_elo', 'matches(source_elo)'),
+    ]
+
+    # Background writer: queue capacity / max matches per batch / max wait (s)
+    WRITER_QUEUE_SIZE = 2000
+    WRITER_BATCH_SIZE = 500
+    WRITER_FLUSH_INTERVAL = 1.0
+
+    # Staging DB: flush to disk every N seconds or once N matches are staged
+    STAGING_FLUSH_INTERVAL = 60.0
+    STAGING_FLUSH_MATCHES = 10000
+
+    # Applied to every connection. synchronous=NORMAL under WAL skips the fsync
+    # on each commit: a power loss / OS crash may roll back the last few
+    # transactions, but never corrupts the database.
+    CACHE_SIZE = 'PRAGMA cache_size=-65536'   # 64 MB page cache
+    CONNECTION_PRAGMAS = (
+        'PRAGMA busy_timeout=30000',       # 30 second timeout for locked DB
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA mmap_size=268435456',      # 256 MB
+        CACHE_SIZE,
+        'PRAGMA cache_spill=OFF',          # keep dirty pages in cache until commit
+    )
+
+    # Read-only connections (exports, stats, dry runs) map up to 1 GB of the
+    # file: scans read pages straight from the OS page cache, no read() copy
+    READ_MMAP_SIZE = 'PRAGMA mmap_size=1073741824'
+
+    # Page size for newly created databases; the wide player_stats rows fit
+    # fewer overflow pages with 8 KB pages. Existing files keep theirs.
+    PAGE_SIZE = 'PRAGMA page_size=8192'
+
+    # Page cache used while bulk_mode() is active (256 MB): keeps the B-trees
+    # being filled, and the index rebuild on exit, in memory
+    BULK_LOAD_CACHE_SIZE = 'PRAGMA cache_size=-262144'
+
+    # Per-connection prepared statement cache (sqlite3 default is 128)
+    CACHED_STATEMENTS = 256
+
+    # Rows sampled per index by ANALYZE / PRAGMA optimize (keeps them fast on big DBs)
+    ANALYSIS_LIMIT = 1000
+
+    def __init__(self, db_path: str = 'lol_matches.db', staging: bool = False):
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        # Closes the connections at interpreter exit, or when the instance is collected
+        weakref.finalize(self, _close_connections, self._connections)
+        self._write_queue = None
+        self._writer = None
+        self.writer_inserted = 0
+        self.writer_failed = 0
+        self._writer_failed_pending = False
+        self._staging_path = None
+        self._staging_keeper = None
+        self._staged_matches = 0
+        # Serializes staged writes, flushes and the _staged_matches counter
+        # across threads (e.g. the background writer and the caller)
+        self._staging_lock = threading.RLock()
+        self._last_staging_flush = time.monotonic()
+        self._enable_wal()
         self._init_db()
         self._migrate_schema()
-        self._enable_wal()
+        self._analyze_once()
+        if staging:
+            self._enable_staging()
 
     @contextmanager
-    def get_connection(self):
-        """Context manager for database connections with auto-commit"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def get_connection(self, staging: bool = False, immediate: bool = False):
+        """
+        Context manager for database connections with auto-commit.
+
+        Each thread reuses one persistent connection (opened on first use), so
+        short queries don't pay connect + PRAGMA setup on every call.
+        With staging=True (and staging enabled), the staging DB is attached
+        as schema "mem".
+        With immediate=True the block runs in a BEGIN IMMEDIATE transaction:
+        the write lock is taken upfront (waiting up to busy_timeout) instead
+        of upgrading a read lock mid-transaction, which under WAL fails with
+        SQLITE_BUSY as soon as another writer got there first.
+        """
+        conn = self._thread_connection()
+        if staging and self._staging_path is not None and not conn.staging_attached:
+            conn.execute('ATTACH DATABASE ? AS mem', (self._staging_path,))
+            conn.staging_attached = True
+        if immediate and not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
         try:
             yield conn
             conn.commit()
         except Exception:
             conn.rollback()
             raise
-        finally:
-            conn.close()
+
+    def _open_connection(self, database: str, read_only: bool = False) -> sqlite3.Connection:
+        """Open a tracked connection with CONNECTION_PRAGMAS applied"""
+        # check_same_thread=False only so close() can run from any thread;
+        # each connection is still used exclusively by the thread that opened it
+        conn = sqlite3.connect(database, uri=True, check_same_thread=False,
+                               factory=_ThreadConnection,
+                               cached_statements=self.CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute(self.READ_MMAP_SIZE)
+        conn.read_only = read_only
+        conn.staging_attached = False
+        self._connections.add(conn)
+        return conn
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        """Get (or lazily open) the calling thread's persistent connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_connection(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    def _read_connection(self) -> sqlite3.Connection:
+        """
+        Get (or lazily open) the calling thread's read-only connection.
+
+        Used by the pure read accessors. It never holds a write transaction and
+        under WAL it reads without blocking (or being blocked by) the writer.
+        Only committed data is visible, so don't use it to read back rows
+        inside an open get_connection() block.
+        """
+        conn = getattr(self._local, 'ro_conn', None)
+        if conn is None:
+            conn = self._open_connection(f'file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro',
+                                         read_only=True)
+            self._local.ro_conn = conn
+        return conn
+
+    def close(self):
+        """
+        Close every thread's persistent connection (also done at exit).
+        Read-write connections run PRAGMA optimize first, as SQLite recommends.
+        """
+        _close_connections(self._connections)
+        self._local = threading.local()
+
+    def _fetch_rows(self, row_type, sql: str, params: tuple = ()) -> list:
+        """Run a read-only query and build one row_type namedtuple per row (no sqlite3.Row / dict)"""
+        cursor = self._read_connection().cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        return list(map(row_type._make, cursor.fetchall()))
+
+    def _fetch_arrays(self, fields: List[Tuple[str, str]], sql: str, params: tuple = ()) -> Dict[str, 'np.ndarray']:
+        """Run a read-only query and return one typed numpy array per (column, dtype) field"""
+        import numpy as np
+
+        cursor = self._read_connection().cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+        arrays = {}
+        for i, (name, dtype) in enumerate(fields):
+            if dtype.startswith('float'):
+                values = (np.nan if row[i] is None else row[i] for row in rows)
+            else:
+                values = (row[i] for row in rows)
+            arrays[name] = np.fromiter(values, dtype=dtype, count=len(rows))
+        return arrays
 
     def _init_db(self):
-        """Initialize database schema"""
+        """Initialize database schema (one script, one transaction)"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            conn.executescript('''
+                BEGIN;
 
-            # Table 1: Core match information
-            cursor.execute('''
+                -- Table 1: Core match information
                 CREATE TABLE IF NOT EXISTS matches (
                     match_id TEXT PRIMARY KEY,
                     region TEXT,
@@ -69,11 +740,9 @@ class MatchDatabase:
                     team_100_early_surrendered BOOLEAN DEFAULT FALSE,
                     team_200_early_surrendered BOOLEAN DEFAULT FALSE,
                     collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                );
 
-            # Table 2: Team-level objectives and bans
-            cursor.execute('''
+                -- Table 2: Team-level objectives and bans
                 CREATE TABLE IF NOT EXISTS team_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     match_id TEXT NOT NULL,
@@ -105,11 +774,9 @@ class MatchDatabase:
                     ban_5_name TEXT,
                     FOREIGN KEY (match_id) REFERENCES matches(match_id),
                     UNIQUE(match_id, team_id)
-                )
-            ''')
+                );
 
-            # Table 3: Individual player performance
-            cursor.execute('''
+                -- Table 3: Individual player performance
                 CREATE TABLE IF NOT EXISTS player_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     match_id TEXT NOT NULL,
@@ -173,28 +840,23 @@ class MatchDatabase:
                     solo_kills INTEGER,
                     FOREIGN KEY (match_id) REFERENCES matches(match_id),
                     UNIQUE(match_id, team_id, position)
-                )
-            ''')
+                );
 
-            # Table 4: Collection progress tracking
-            cursor.execute('''
+                -- Table 4: Collection progress tracking
                 CREATE TABLE IF NOT EXISTS collection_progress (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     puuid TEXT UNIQUE,
-                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    processed_at_epoch INTEGER
+                );
 
-            # Table 5: Collection statistics
-            cursor.execute('''
+                -- Table 5: Collection statistics
                 CREATE TABLE IF NOT EXISTS collection_stats (
                     key TEXT PRIMARY KEY,
                     value TEXT
-                )
-            ''')
+                );
 
-            # Table 6: Summoners (player profiles)
-            cursor.execute('''
+                -- Table 6: Summoners (player profiles)
                 CREATE TABLE IF NOT EXISTS summoners (
                     puuid TEXT PRIMARY KEY,
                     riot_id_name TEXT,
@@ -208,11 +870,9 @@ class MatchDatabase:
                     first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                );
 
-            # Table 7: Summoner elo history (elo par patch)
-            cursor.execute('''
+                -- Table 7: Summoner elo history (elo par patch)
                 CREATE TABLE IF NOT EXISTS summoner_elo_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     puuid TEXT NOT NULL,
@@ -223,11 +883,9 @@ class MatchDatabase:
                     recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (puuid) REFERENCES summoners(puuid),
                     UNIQUE(puuid, patch)
-                )
-            ''')
+                );
 
-            # Table 8: Champion mastery per summoner
-            cursor.execute('''
+                -- Table 8: Champion mastery per summoner
                 CREATE TABLE IF NOT EXISTS champion_mastery (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     puuid TEXT NOT NULL,
@@ -239,22 +897,18 @@ class MatchDatabase:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (puuid) REFERENCES summoners(puuid),
                     UNIQUE(puuid, champion_id)
-                )
-            ''')
+                );
 
-            # Table 9: Patches history
-            cursor.execute('''
+                -- Table 9: Patches history
                 CREATE TABLE IF NOT EXISTS patches (
                     patch TEXT PRIMARY KEY,
                     release_date DATE,
                     data_dragon_version TEXT,
                     notes_url TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                );
 
-            # Table 10: Champion stats per patch (winrate, pickrate, banrate)
-            cursor.execute('''
+                -- Table 10: Champion stats per patch (winrate, pickrate, banrate)
                 CREATE TABLE IF NOT EXISTS champion_patch_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     champion_id INTEGER NOT NULL,
@@ -275,11 +929,9 @@ class MatchDatabase:
                     support_games INTEGER DEFAULT 0,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     UNIQUE(champion_id, patch)
-                )
-            ''')
+                );
 
-            # Table 11: Match timeline snapshots (gold per minute)
-            cursor.execute('''
+                -- Table 11: Match timeline snapshots (gold per minute)
                 CREATE TABLE IF NOT EXISTS match_timeline (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     match_id TEXT NOT NULL,
@@ -302,17 +954,28 @@ class MatchDatabase:
                     team_200_support_gold INTEGER,
                     FOREIGN KEY (match_id) REFERENCES matches(match_id),
                     UNIQUE(match_id, minute)
-                )
-            ''')
+                );
 
-            # Create indices for common queries (only for new tables, player_stats index created in migration)
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_game_creation ON matches(game_creation)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_champion ON player_stats(champion_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_match ON player_stats(match_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_team_stats_match ON team_stats(match_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_champion_mastery_puuid ON champion_mastery(puuid)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_summoner_elo_puuid ON summoner_elo_history(puuid)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_match ON match_timeline(match_id)')
+                -- Table 12: Match timelines, one row per match (see TIMELINE_FRAME).
+                -- Replaces the per-minute rows of match_timeline, which is only kept
+                -- so older databases can be migrated.
+                CREATE TABLE IF NOT EXISTS match_timeline_packed (
+                    match_id TEXT PRIMARY KEY,
+                    minutes INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    FOREIGN KEY (match_id) REFERENCES matches(match_id)
+                );
+
+                -- Create indices for common queries (only for new tables, player_stats index created in migration)
+                CREATE INDEX IF NOT EXISTS idx_matches_game_creation ON matches(game_creation);
+                CREATE INDEX IF NOT EXISTS idx_player_stats_champion ON player_stats(champion_id);
+                CREATE INDEX IF NOT EXISTS idx_team_stats_match ON team_stats(match_id);
+                CREATE INDEX IF NOT EXISTS idx_champion_mastery_puuid ON champion_mastery(puuid);
+                CREATE INDEX IF NOT EXISTS idx_summoner_elo_puuid ON summoner_elo_history(puuid);
+                CREATE INDEX IF NOT EXISTS idx_timeline_match ON match_timeline(match_id);
+
+                COMMIT;
+            ''')
 
     def _migrate_schema(self):
         """
@@ -382,36 +1045,263 @@ class MatchDatabase:
                     except Exception as e:
                         pass  # Column might already exist
 
+            # Check existing columns in collection_progress table
+            cursor.execute('PRAGMA table_info(collection_progress)')
+            existing_progress_cols = {row[1] for row in cursor.fetchall()}
+
+            # Add Unix epoch column used by is_player_processed, backfilled from processed_at
+            if 'processed_at_epoch' not in existing_progress_cols:
+                cursor.execute('ALTER TABLE collection_progress ADD COLUMN processed_at_epoch INTEGER')
+                cursor.execute('''
+                    UPDATE collection_progress
+                    SET processed_at_epoch = CAST(strftime('%s', processed_at) AS INTEGER)
+                ''')
+                print("  Added column processed_at_epoch to collection_progress")
+
+            # Move per-minute timeline rows into match_timeline_packed; matches
+            # that already have a packed row keep it (leftover rows are dropped)
+            cursor.execute('SELECT COUNT(*) FROM match_timeline')
+            if cursor.fetchone()[0]:
+                cursor.execute(f'''
+                    SELECT {", ".join(TIMELINE_COLUMNS)} FROM match_timeline
+                    WHERE match_id NOT IN (SELECT match_id FROM match_timeline_packed)
+                    ORDER BY match_id, minute
+                ''')
+                packed = []
+                for match_id, rows in groupby(cursor.fetchall(), key=lambda row: row[0]):
+                    frames = {row[1]: tuple(v or 0 for v in tuple(row)[1:]) for row in rows}
+                    packed.append((match_id, len(frames), _pack_timeline(frames)))
+                cursor.executemany(_UPSERT_PACKED_TIMELINE_SQL, packed)
+                cursor.execute('DELETE FROM match_timeline')
+                print(f"  Packed timelines of {len(packed)} matches into match_timeline_packed")
+
             # Create indices for new columns (ignore if exists)
             try:
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_puuid ON player_stats(puuid)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_progress_epoch ON collection_progress(processed_at_epoch)')
+                # (puuid, match_id, team_id) covers the p1 side of get_common_teammates;
+                # the (match_id, team_id[, position]) lookups of the export joins are
+                # already served by the UNIQUE constraints' autoindexes.
+                cursor.execute('DROP INDEX IF EXISTS idx_player_stats_puuid')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_puuid_match ON player_stats(puuid, match_id, team_id)')
+                # Covering index for the teammate side of get_common_teammates; it also
+                # serves every match_id lookup, so the plain (match_id) index is dropped
+                cursor.execute('DROP INDEX IF EXISTS idx_player_stats_match')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_match_team_puuid ON player_stats(match_id, team_id, puuid, riot_id_name)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_game_version ON matches(game_version)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_region ON matches(region)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_source_elo ON matches(source_elo)')
             except:
                 pass
 
+    def _analyze_once(self):
+        """
+        Gather planner statistics (sqlite_stat1) if the DB has never been
+        analyzed; afterwards PRAGMA optimize keeps them up to date.
+        """
+        with self.get_connection() as conn:
+            analyzed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            ).fetchone()
+            if not analyzed:
+                conn.execute(f'PRAGMA analysis_limit={self.ANALYSIS_LIMIT}')
+                conn.execute('ANALYZE')
+
+    def optimize(self):
+        """
+        Refresh planner statistics with PRAGMA optimize.
+        Run after large ingestion jobs (bulk_mode() and stop_writer() do).
+        """
+        with self.get_connection() as conn:
+            conn.execute(f'PRAGMA analysis_limit={self.ANALYSIS_LIMIT}')
+            conn.execute('PRAGMA optimize')
+
+    def vacuum(self):
+        """Rebuild the DB file to reclaim free pages (e.g. after deleting old data)"""
+        self.flush_writes()
+        conn = self._thread_connection()
+        conn.commit()
+        conn.execute('VACUUM')
+
     def _enable_wal(self):
         """
         Enable WAL (Write-Ahead Logging) mode for better concurrent access.
         This allows multiple processes to read/write simultaneously.
+
+        journal_mode and journal_size_limit persist in the database file;
+        the per-connection PRAGMAs are applied in get_connection().
         """
         with self.get_connection() as conn:
+            conn.execute(self.PAGE_SIZE)  # no-op unless the file is still empty
             conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA busy_timeout=30000')  # 30 second timeout for locked DB
+            conn.execute('PRAGMA journal_size_limit=67108864')  # Truncate WAL back to 64 MB
 
-    def match_exists(self, match_id: str) -> bool:
-        """Check if match already exists in database"""
+    # ================================================================
+    # Staging DB - hot writes land in memory, flushed to disk in bulk
+    # ================================================================
+
+    def _enable_staging(self):
+        """
+        Create the staging DB that insert_matches_batch writes into.
+
+        Uses a shared-cache in-memory database kept alive by a keeper
+        connection; if this SQLite build can't attach shared-cache memory
+        URIs, falls back to a temporary on-disk database.
+        """
+        uri = f'file:lol_staging_{id(self)}?mode=memory&cache=shared'
+        try:
+            keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            probe = sqlite3.connect(self.db_path, uri=True)
+            try:
+                probe.execute('ATTACH DATABASE ? AS mem', (uri,))
+            finally:
+                probe.close()
+            self._staging_keeper = keeper
+            self._staging_path = uri
+        except sqlite3.Error:
+            import tempfile
+            fd, self._staging_path = tempfile.mkstemp(prefix='lol_staging_', suffix='.db')
+            os.close(fd)
+            keeper = sqlite3.connect(self._staging_path, check_same_thread=False)
+            self._staging_keeper = keeper
+
+        # Mirror tables hold only the inserted columns; ids/defaults are assigned on flush.
+        # NOT NULL and UNIQUE constraints are mirrored so a bad row fails when
+        # staged (as it would on disk) instead of being skipped by the
+        # INSERT OR IGNORE flush
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT 1 FROM matches WHERE match_id = ?', (match_id,))
-            return cursor.fetchone() is not None
+            not_null = {
+                table: {row[1] for row in conn.execute(f'PRAGMA table_info({table})') if row[3]}
+                for table, _ in STAGED_TABLES
+            }
+            unique = {
+                table: [
+                    [info[2] for info in conn.execute(f'PRAGMA index_info({index[1]})')]
+                    for index in conn.execute(f'PRAGMA index_list({table})') if index[3] in ('pk', 'u')
+                ]
+                for table, _ in STAGED_TABLES
+            }
+        for table, columns in STAGED_TABLES:
+            column_defs = [f'{col} NOT NULL' if col in not_null[table] else col for col in columns]
+            column_defs.extend(
+                f'UNIQUE({", ".join(index_columns)})' for index_columns in unique[table]
+                if index_columns and set(index_columns) <= set(columns)
+            )
+            keeper.execute(f'CREATE TABLE IF NOT EXISTS {table} ({", ".join(column_defs)})')
+        keeper.commit()
 
-    def get_collected_match_ids(self) -> Set[str]:
-        """Get set of all collected match IDs"""
+    def flush_staging(self) -> int:
+        """
+        Move all staged rows to the disk DB in a single transaction.
+
+        Returns:
+            Number of matches flushed
+        """
+        with self._staging_lock:
+            if self._staging_path is None:
+                return 0
+
+            with self.get_connection(staging=True) as conn:
+                flushed = conn.execute('SELECT COUNT(*) FROM mem.matches').fetchone()[0]
+                for table, columns in STAGED_TABLES:
+                    column_list = ', '.join(columns)
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO main.{table} ({column_list})
+                        SELECT {column_list} FROM mem.{table}
+                    ''')
+                    conn.execute(f'DELETE FROM mem.{table}')
+
+            self._staged_matches = 0
+            self._last_staging_flush = time.monotonic()
+            return flushed
+
+    def _maybe_flush_staging(self):
+        """Flush staged rows once the time or size watermark is reached"""
+        with self._staging_lock:
+            if self._staging_path is None:
+                return
+            if (self._staged_matches >= self.STAGING_FLUSH_MATCHES or
+                    time.monotonic() - self._last_staging_flush >= self.STAGING_FLUSH_INTERVAL):
+                self.flush_staging()
+
+    def close_staging(self):
+        """
+        Flush and drop the staging DB, detaching it from every thread's
+        connection. Call it once the other threads are done writing
+        (stop_writer() does, after joining the writer).
+        """
+        with self._staging_lock:
+            if self._staging_path is None:
+                return
+
+            self.flush_staging()
+            for conn in list(self._connections):
+                if conn.staging_attached:
+                    conn.execute('DETACH DATABASE mem')
+                    conn.staging_attached = False
+            self._staging_keeper.close()
+            if not self._staging_path.startswith('file:'):
+                os.remove(self._staging_path)
+            self._staging_keeper = None
+            self._staging_path = None
+
+    @contextmanager
+    def bulk_mode(self):
+        """
+        Context manager for cold backfills of many matches.
+
+        Drops the secondary matches / team_stats / player_stats indices on
+        entry so each insert only maintains the PRIMARY KEY / UNIQUE B-trees,
+        then rebuilds them in one sorted pass on exit and runs
+        PRAGMA foreign_key_check + optimize:
+
+            with db.bulk_mode():
+                db.insert_matches_batch(matches)
+
+        Foreign keys are never enabled on our connections, so no FK check is
+        paid during the backfill; the check on exit reports orphans instead.
+
+        The connection's page cache is raised to BULK_LOAD_CACHE_SIZE for the
+        duration of the load.
+
+        Only use this for one-shot bulk loads (e.g. migrate_to_sqlite.py), not
+        for steady-state incremental collection.
+        """
         with self.get_connection() as conn:
+            conn.execute('PRAGMA foreign_keys=OFF')
+            conn.execute(self.BULK_LOAD_CACHE_SIZE)
+            conn.executescript('BEGIN;' + ''.join(
+                f'DROP INDEX IF EXISTS {index_name};' for index_name, _ in self.BULK_LOAD_INDICES
+            ) + 'COMMIT;')
+
+        try:
+            yield self
+        finally:
+            with self.get_connection() as conn:
+                conn.executescript('BEGIN;' + ''.join(
+                    f'CREATE INDEX IF NOT EXISTS {index_name} ON {target};'
+                    for index_name, target in self.BULK_LOAD_INDICES
+                ) + 'COMMIT;')
+                violations = conn.execute('PRAGMA foreign_key_check').fetchall()
+                conn.execute(self.CACHE_SIZE)
+            self.optimize()
+
+            if violations:
+                print(f"  Warning: {len(violations)} foreign key violations after bulk load")
+
+    def match_exists(self, match_id: str) -> bool:
+        """Check if match already exists in database (or is staged)"""
+        with self._staging_lock, self.get_connection(staging=self._staging_path is not None) as conn:
+            return bool(self._existing_match_ids(conn.cursor(), [match_id]))
+
+    def get_collected_match_ids(self) -> Set[str]:
+        """Get set of all collected match IDs (including staged ones)"""
+        with self._staging_lock, self.get_connection(staging=self._staging_path is not None) as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT match_id FROM matches')
-            return {row[0] for row in cursor.fetchall()}
+            cursor.execute('SELECT match_id FROM main.matches')
+            match_ids = {row[0] for row in cursor.fetchall()}
+            if self._staging_path is not None:
+                match_ids.update(row[0] for row in cursor.execute('SELECT match_id FROM mem.matches'))
+            return match_ids
 
     def insert_match(self, match_data: Dict[str, Any], source_elo: str = None) -> bool:
         """
@@ -432,13 +1322,15 @@ class MatchDatabase:
         if not match_id:
             return False
 
-        # Check if already exists
-        if self.match_exists(match_id):
-            return False
+        staging = self._staging_path is not None
 
-        with self.get_connection() as conn:
+        with self._staging_lock, self.get_connection(staging=staging) as conn:
             cursor = conn.cursor()
 
+            # Already staged, not yet flushed to disk
+            if staging and cursor.execute(_SELECT_STAGED_MATCH_IDS_SQL, (json.dumps([match_id]),)).fetchone():
+                return False
+
             # Insert match info
             teams = info.get("teams", [])
             team_100_win = None
@@ -452,13 +1344,8 @@ class MatchDatabase:
                 elif team.get("teamId") == 200:
                     team_200_early_surrendered = team.get("teamEarlySurrendered", False)
 
-            cursor.execute('''
-                INSERT INTO matches (
-                    match_id, region, source_elo, game_creation, game_duration, game_version,
-                    queue_id, map_id, game_mode, game_type,
-                    team_100_win, team_100_early_surrendered, team_200_early_surrendered
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            # Existence check + insert in one statement: skipped rows return nothing
+            newly_inserted = cursor.execute(_INSERT_MATCH_RETURNING_SQL, (
                 match_id,
                 REGION,
                 source_elo,
@@ -472,7 +1359,10 @@ class MatchDatabase:
                 team_100_win,
                 team_100_early_surrendered,
                 team_200_early_surrendered
-            ))
+            )).fetchone()
+
+            if newly_inserted is None:
+                return False
 
             # Insert team stats
             # Get champion data for ban names
@@ -482,8 +1372,8 @@ class MatchDatabase:
             except Exception:
                 champion_data = None
 
+            team_rows = []
             for team in teams:
-                team_id = team.get("teamId")
                 objectives = team.get("objectives", {})
                 bans = team.get("bans", [])
 
@@ -496,19 +1386,8 @@ class MatchDatabase:
                     if champion_data and ban_id and ban_id > 0:
                         ban_names[i] = champion_data.get_champion_name(ban_id)
 
-                cursor.execute('''
-                    INSERT INTO team_stats (
-                        match_id, team_id,
-                        first_blood, first_tower, first_inhibitor,
-                        first_dragon, first_rift_herald, first_baron,
-                        dragon_kills, baron_kills, tower_kills,
-                        inhibitor_kills, rift_herald_kills,
-                        ban_1_champion_id, ban_2_champion_id, ban_3_champion_id,
-                        ban_4_champion_id, ban_5_champion_id,
-                        ban_1_name, ban_2_name, ban_3_name, ban_4_name, ban_5_name
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    match_id, team_id,
+                team_rows.append((
+                    match_id, team.get("teamId"),
                     objectives.get("champion", {}).get("first", False),
                     objectives.get("tower", {}).get("first", False),
                     objectives.get("inhibitor", {}).get("first", False),
@@ -520,9 +1399,10 @@ class MatchDatabase:
                     objectives.get("tower", {}).get("kills", 0),
                     objectives.get("inhibitor", {}).get("kills", 0),
                     objectives.get("riftHerald", {}).get("kills", 0),
-                    ban_ids[0], ban_ids[1], ban_ids[2], ban_ids[3], ban_ids[4],
-                    ban_names[0], ban_names[1], ban_names[2], ban_names[3], ban_names[4]
+                    *ban_ids,
+                    *ban_names
                 ))
+            cursor.executemany(_INSERT_TEAM_SQL, team_rows)
 
             # Insert player stats
             # Import summoner spell name function
@@ -531,98 +1411,11 @@ class MatchDatabase:
             except Exception:
                 get_summoner_spell_name = lambda x: f"Spell_{x}"
 
-            position_map = {
-                "TOP": "top",
-                "JUNGLE": "jungle",
-                "MIDDLE": "mid",
-                "BOTTOM": "adc",
-                "UTILITY": "support"
-            }
-
-            for participant in info.get("participants", []):
-                team_id = participant.get("teamId")
-                position = position_map.get(
-                    participant.get("teamPosition"),
-                    participant.get("teamPosition", "unknown")
-                )
-                challenges = participant.get("challenges", {})
-
-                # Get summoner spell names
-                summoner_1_id = participant.get("summoner1Id")
-                summoner_2_id = participant.get("summoner2Id")
-                summoner_1_name = get_summoner_spell_name(summoner_1_id) if summoner_1_id else None
-                summoner_2_name = get_summoner_spell_name(summoner_2_id) if summoner_2_id else None
-
-                cursor.execute('''
-                    INSERT INTO player_stats (
-                        match_id, team_id, position,
-                        puuid, riot_id_name, riot_id_tagline,
-                        champion_id, champion_name, champ_level,
-                        summoner_1_id, summoner_2_id, summoner_1_name, summoner_2_name,
-                        kills, deaths, assists,
-                        total_damage_dealt, total_damage_to_champions, total_damage_taken,
-                        true_damage_dealt, physical_damage_dealt, magic_damage_dealt,
-                        gold_earned, total_minions_killed, neutral_minions_killed,
-                        vision_score, wards_placed, wards_killed, vision_wards_bought,
-                        enemy_champion_immobilizations,
-                        first_blood_kill, first_tower_kill,
-                        turret_kills, inhibitor_kills,
-                        largest_killing_spree, largest_multi_kill, killing_sprees,
-                        double_kills, triple_kills, quadra_kills, penta_kills,
-                        damage_per_minute, damage_taken_percentage, gold_per_minute,
-                        team_damage_percentage, kill_participation, kda,
-                        lane_minions_first_10_min, turret_plates_taken, solo_kills
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    match_id, team_id, position,
-                    participant.get("puuid"),
-                    participant.get("riotIdGameName"),
-                    participant.get("riotIdTagline"),
-                    participant.get("championId"),
-                    participant.get("championName"),
-                    participant.get("champLevel"),
-                    summoner_1_id,
-                    summoner_2_id,
-                    summoner_1_name,
-                    summoner_2_name,
-                    participant.get("kills"),
-                    participant.get("deaths"),
-                    participant.get("assists"),
-                    participant.get("totalDamageDealt"),
-                    participant.get("totalDamageDealtToChampions"),
-                    participant.get("totalDamageTaken"),
-                    participant.get("trueDamageDealt"),
-                    participant.get("physicalDamageDealt"),
-                    participant.get("magicDamageDealt"),
-                    participant.get("goldEarned"),
-                    participant.get("totalMinionsKilled"),
-                    participant.get("neutralMinionsKilled"),
-                    participant.get("visionScore"),
-                    participant.get("wardsPlaced"),
-                    participant.get("wardsKilled"),
-                    participant.get("visionWardsBoughtInGame"),
-                    participant.get("enemyChampionImmobilizations", 0),
-                    participant.get("firstBloodKill"),
-                    participant.get("firstTowerKill"),
-                    participant.get("turretKills"),
-                    participant.get("inhibitorKills"),
-                    participant.get("largestKillingSpree"),
-                    participant.get("largestMultiKill"),
-                    participant.get("killingSprees"),
-                    participant.get("doubleKills"),
-                    participant.get("tripleKills"),
-                    participant.get("quadraKills"),
-                    participant.get("pentaKills"),
-                    challenges.get("damagePerMinute"),
-                    challenges.get("damageTakenOnTeamPercentage"),
-                    challenges.get("goldPerMinute"),
-                    challenges.get("teamDamagePercentage"),
-                    challenges.get("killParticipation"),
-                    challenges.get("kda"),
-                    challenges.get("laneMinionsFirst10Minutes"),
-                    challenges.get("turretPlatesTaken"),
-                    challenges.get("soloKills")
-                ))
+            rows = [
+                build_player_row(match_id, participant, get_summoner_spell_name)
+                for participant in info.get("participants", [])
+            ]
+            cursor.executemany(_INSERT_PLAYER_SQL, rows)
 
             return True
 
@@ -630,6 +1423,11 @@ class MatchDatabase:
         """
         Insert multiple matches in a single transaction for better performance.
 
+        Player rows are buffered column by column (struct-of-arrays) and
+        flushed with one executemany per table at the end of the batch.
+        When staging is enabled, rows go to the staging DB and reach the
+        disk DB on the next flush_staging().
+
         Args:
             matches: List of (match_id, match_data) tuples from Riot API
             source_elo: The elo tier of the player used to find these matches (CHALLENGER, GRANDMASTER, MASTER, DIAMOND)
@@ -640,221 +1438,228 @@ class MatchDatabase:
         if not matches:
             return 0
 
-        inserted_count = 0
+        with self._staging_lock:
+            staging = self._staging_path is not None
 
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+            with self.get_connection(staging=staging) as conn:
+                cursor = conn.cursor()
+                existing = self._existing_match_ids(cursor, [match_id for match_id, _ in matches if match_id])
+                rows = build_match_rows([match for match in matches if match[0] not in existing], source_elo)
+                inserted = self._write_match_rows(cursor, *rows)
 
-            for match_id, match_data in matches:
-                # Check if already exists
-                cursor.execute('SELECT 1 FROM matches WHERE match_id = ?', (match_id,))
-                if cursor.fetchone():
-                    continue
+            if staging:
+                self._staged_matches += inserted
+                self._maybe_flush_staging()
 
-                info = match_data.get("info", {})
-                metadata = match_data.get("metadata", {})
+        return inserted
 
-                if not match_id:
-                    continue
+    def insert_match_rows(self, match_rows: list, team_rows: list, player_columns: List[list]) -> int:
+        """
+        Insert rows built by build_match_rows in a single transaction,
+        skipping the matches that are already stored.
 
-                # Extract team info
-                teams = info.get("teams", [])
-                team_100_win = None
-                team_100_early_surrendered = False
-                team_200_early_surrendered = False
+        Lets the row building (the CPU-bound part) run in other processes,
+        e.g. migrate_to_sqlite.py's parse workers.
 
-                for team in teams:
-                    if team.get("teamId") == 100:
-                        team_100_win = team.get("win")
-                        team_100_early_surrendered = team.get("teamEarlySurrendered", False)
-                    elif team.get("teamId") == 200:
-                        team_200_early_surrendered = team.get("teamEarlySurrendered", False)
+        Returns:
+            Number of successfully inserted matches
+        """
+        if not match_rows:
+            return 0
 
-                # Insert match
-                cursor.execute('''
-                    INSERT INTO matches (
-                        match_id, region, source_elo, game_creation, game_duration, game_version,
-                        queue_id, map_id, game_mode, game_type,
-                        team_100_win, team_100_early_surrendered, team_200_early_surrendered
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    match_id,
-                    REGION,
-                    source_elo,
-                    info.get("gameCreation"),
-                    info.get("gameDuration"),
-                    info.get("gameVersion"),
-                    info.get("queueId"),
-                    info.get("mapId"),
-                    info.get("gameMode"),
-                    info.get("gameType"),
-                    team_100_win,
-                    team_100_early_surrendered,
-                    team_200_early_surrendered
-                ))
+        with self._staging_lock:
+            staging = self._staging_path is not None
+
+            with self.get_connection(staging=staging) as conn:
+                cursor = conn.cursor()
+                existing = self._existing_match_ids(cursor, [row[0] for row in match_rows])
+                if existing:
+                    match_rows = [row for row in match_rows if row[0] not in existing]
+                    team_rows = [row for row in team_rows if row[0] not in existing]
+                    keep = [match_id not in existing for match_id in player_columns[0]]
+                    player_columns = [list(compress(column, keep)) for column in player_columns]
+                inserted = self._write_match_rows(cursor, match_rows, team_rows, player_columns)
+
+            if staging:
+                self._staged_matches += inserted
+                self._maybe_flush_staging()
+
+        return inserted
+
+    def _existing_match_ids(self, cursor: sqlite3.Cursor, match_ids: list) -> Set[str]:
+        """Which of match_ids are already stored (on disk or still staged), in one query per DB"""
+        ids_json = json.dumps(match_ids)
+        existing = {row[0] for row in cursor.execute(_SELECT_EXISTING_MATCH_IDS_SQL, (ids_json,))}
+        if self._staging_path is not None:
+            existing.update(row[0] for row in cursor.execute(_SELECT_STAGED_MATCH_IDS_SQL, (ids_json,)))
+        return existing
+
+    def _write_match_rows(self, cursor: sqlite3.Cursor, match_rows: list, team_rows: list,
+                          player_columns: List[list]) -> int:
+        """Flush build_match_rows output with one executemany per table (staging DB if enabled)"""
+        # zip(*columns) feeds rows to SQLite without an intermediate list
+        if self._staging_path is not None:
+            cursor.executemany(_STAGED_INSERT_MATCH_SQL, match_rows)
+            cursor.executemany(_STAGED_INSERT_TEAM_SQL, team_rows)
+            cursor.executemany(_STAGED_INSERT_PLAYER_SQL, zip(*player_columns))
+        else:
+            cursor.executemany(_INSERT_MATCH_SQL, match_rows)
+            cursor.executemany(_INSERT_TEAM_SQL, team_rows)
+            cursor.executemany(_INSERT_PLAYER_SQL, zip(*player_columns))
+        return len(match_rows)
+
+    # ================================================================
+    # Background Writer - decouples API fetching from SQLite commits
+    # ================================================================
+
+    def enqueue_match(self, match_data: Dict[str, Any], source_elo: str = None):
+        """
+        Queue a match for insertion by the background writer thread.
+
+        The writer is started on first use and drains the queue in batches of
+        up to WRITER_BATCH_SIZE matches (or whatever arrived within
+        WRITER_FLUSH_INTERVAL seconds) through insert_matches_batch.
+        Blocks if WRITER_QUEUE_SIZE matches are already waiting.
+        """
+        match_id = match_data.get("metadata", {}).get("matchId")
+        self._enqueue((match_id, match_data, source_elo))
+
+    def enqueue_player_progress(self, *puuids: str):
+        """
+        Queue save_players_progress(puuids) behind the matches already queued.
 
-                # Insert team stats
-                # Get champion data for ban names (once per batch for efficiency)
+        The players are only marked processed if every match queued since the
+        previous progress item was written; otherwise they are left
+        unprocessed (and logged) so the next run collects them again.
+        """
+        self._enqueue(_PlayerProgress(puuids))
+
+    def _enqueue(self, item):
+        """Put an item on the write queue, starting the writer thread on first use"""
+        if self._writer is None:
+            self._write_queue = queue.Queue(maxsize=self.WRITER_QUEUE_SIZE)
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer.start()
+        self._write_queue.put(item)
+
+    def flush_writes(self) -> int:
+        """
+        Block until every queued item has been written (and staged rows flushed).
+
+        Returns:
+            Total number of queued matches the writer failed to insert so far
+        """
+        if self._writer is not None:
+            self._write_queue.join()
+        self.flush_staging()
+        return self.writer_failed
+
+    def stop_writer(self):
+        """Flush pending matches, stop the writer thread and optimize the DB"""
+        if self._writer is not None:
+            self._write_queue.put(_WRITER_STOP)
+            self._writer.join()
+            self._writer = None
+            self._write_queue = None
+
+        self.close_staging()
+        self.optimize()
+
+    def _writer_loop(self):
+        """Drain the write queue into insert_matches_batch until stopped"""
+        while True:
+            items = [self._write_queue.get()]
+            deadline = time.monotonic() + self.WRITER_FLUSH_INTERVAL
+
+            while items[-1] is not _WRITER_STOP and len(items) < self.WRITER_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
                 try:
-                    from champion_data import get_champion_data
-                    champion_data = get_champion_data()
-                except Exception:
-                    champion_data = None
-
-                for team in teams:
-                    team_id = team.get("teamId")
-                    objectives = team.get("objectives", {})
-                    bans = team.get("bans", [])
-
-                    ban_ids = [None] * 5
-                    ban_names = [None] * 5
-                    for i, ban in enumerate(bans[:5]):
-                        ban_id = ban.get("championId")
-                        ban_ids[i] = ban_id
-                        if champion_data and ban_id and ban_id > 0:
-                            ban_names[i] = champion_data.get_champion_name(ban_id)
-
-                    cursor.execute('''
-                        INSERT INTO team_stats (
-                            match_id, team_id,
-                            first_blood, first_tower, first_inhibitor,
-                            first_dragon, first_rift_herald, first_baron,
-                            dragon_kills, baron_kills, tower_kills,
-                            inhibitor_kills, rift_herald_kills,
-                            ban_1_champion_id, ban_2_champion_id, ban_3_champion_id,
-                            ban_4_champion_id, ban_5_champion_id,
-                            ban_1_name, ban_2_name, ban_3_name, ban_4_name, ban_5_name
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        match_id, team_id,
-                        objectives.get("champion", {}).get("first", False),
-                        objectives.get("tower", {}).get("first", False),
-                        objectives.get("inhibitor", {}).get("first", False),
-                        objectives.get("dragon", {}).get("first", False),
-                        objectives.get("riftHerald", {}).get("first", False),
-                        objectives.get("baron", {}).get("first", False),
-                        objectives.get("dragon", {}).get("kills", 0),
-                        objectives.get("baron", {}).get("kills", 0),
-                        objectives.get("tower", {}).get("kills", 0),
-                        objectives.get("inhibitor", {}).get("kills", 0),
-                        objectives.get("riftHerald", {}).get("kills", 0),
-                        ban_ids[0], ban_ids[1], ban_ids[2], ban_ids[3], ban_ids[4],
-                        ban_names[0], ban_names[1], ban_names[2], ban_names[3], ban_names[4]
-                    ))
-
-                # Insert player stats
-                # Import summoner spell name function
+                    items.append(self._write_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            stop = items[-1] is _WRITER_STOP
+            if stop:
+                items.pop()
+
+            try:
+                self._write_batch(items)
+            except Exception:
+                logger.exception(f"Writer failed on a batch of {len(items)} queued items")
+            finally:
+                for _ in range(len(items) + stop):
+                    self._write_queue.task_done()
+
+            if stop:
+                return
+
+    def _write_batch(self, items: list):
+        """
+        Write queued items: all matches first (batched by source elo), then
+        the player progress items, each skipped if a match queued before it
+        (since the previous progress item) failed.
+        """
+        matches = [item for item in items if not isinstance(item, _PlayerProgress)]
+        failed = self._write_queued_matches(matches)
+
+        failed_pending = self._writer_failed_pending
+        for item in items:
+            if not isinstance(item, _PlayerProgress):
+                failed_pending = failed_pending or item[0] in failed
+            elif failed_pending:
+                logger.warning(f"Not marking {len(item.puuids)} player(s) processed: "
+                               f"some of their matches failed to insert")
+                failed_pending = False
+            else:
+                self.save_players_progress(list(item.puuids))
+        self._writer_failed_pending = failed_pending
+
+    def _write_queued_matches(self, matches: list) -> Set[str]:
+        """
+        Insert queued (match_id, match_data, source_elo) items, one batch per
+        source elo. If a batch fails, its matches are retried one at a time so
+        a bad match only fails itself.
+
+        Returns:
+            Ids of the matches that could not be inserted
+        """
+        by_elo = {}
+        for match_id, match_data, source_elo in matches:
+            by_elo.setdefault(source_elo, []).append((match_id, match_data))
+
+        failed = set()
+        for source_elo, elo_matches in by_elo.items():
+            try:
+                self.writer_inserted += self.insert_matches_batch(elo_matches, source_elo=source_elo)
+                continue
+            except Exception as e:
+                logger.warning(f"Batch insert of {len(elo_matches)} matches failed ({e}), "
+                               f"retrying one by one")
+
+            for match_id, match_data in elo_matches:
                 try:
-                    from champion_data import get_summoner_spell_name
-                except Exception:
-                    get_summoner_spell_name = lambda x: f"Spell_{x}"
-
-                position_map = {
-                    "TOP": "top",
-                    "JUNGLE": "jungle",
-                    "MIDDLE": "mid",
-                    "BOTTOM": "adc",
-                    "UTILITY": "support"
-                }
-
-                for participant in info.get("participants", []):
-                    team_id = participant.get("teamId")
-                    position = position_map.get(
-                        participant.get("teamPosition"),
-                        participant.get("teamPosition", "unknown")
-                    )
-                    challenges = participant.get("challenges", {})
-
-                    # Get summoner spell names
-                    summoner_1_id = participant.get("summoner1Id")
-                    summoner_2_id = participant.get("summoner2Id")
-                    summoner_1_name = get_summoner_spell_name(summoner_1_id) if summoner_1_id else None
-                    summoner_2_name = get_summoner_spell_name(summoner_2_id) if summoner_2_id else None
-
-                    cursor.execute('''
-                        INSERT INTO player_stats (
-                            match_id, team_id, position,
-                            puuid, riot_id_name, riot_id_tagline,
-                            champion_id, champion_name, champ_level,
-                            summoner_1_id, summoner_2_id, summoner_1_name, summoner_2_name,
-                            kills, deaths, assists,
-                            total_damage_dealt, total_damage_to_champions, total_damage_taken,
-                            true_damage_dealt, physical_damage_dealt, magic_damage_dealt,
-                            gold_earned, total_minions_killed, neutral_minions_killed,
-                            vision_score, wards_placed, wards_killed, vision_wards_bought,
-                            enemy_champion_immobilizations,
-                            first_blood_kill, first_tower_kill,
-                            turret_kills, inhibitor_kills,
-                            largest_killing_spree, largest_multi_kill, killing_sprees,
-                            double_kills, triple_kills, quadra_kills, penta_kills,
-                            damage_per_minute, damage_taken_percentage, gold_per_minute,
-                            team_damage_percentage, kill_participation, kda,
-                            lane_minions_first_10_min, turret_plates_taken, solo_kills
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        match_id, team_id, position,
-                        participant.get("puuid"),
-                        participant.get("riotIdGameName"),
-                        participant.get("riotIdTagline"),
-                        participant.get("championId"),
-                        participant.get("championName"),
-                        participant.get("champLevel"),
-                        summoner_1_id,
-                        summoner_2_id,
-                        summoner_1_name,
-                        summoner_2_name,
-                        participant.get("kills"),
-                        participant.get("deaths"),
-                        participant.get("assists"),
-                        participant.get("totalDamageDealt"),
-                        participant.get("totalDamageDealtToChampions"),
-                        participant.get("totalDamageTaken"),
-                        participant.get("trueDamageDealt"),
-                        participant.get("physicalDamageDealt"),
-                        participant.get("magicDamageDealt"),
-                        participant.get("goldEarned"),
-                        participant.get("totalMinionsKilled"),
-                        participant.get("neutralMinionsKilled"),
-                        participant.get("visionScore"),
-                        participant.get("wardsPlaced"),
-                        participant.get("wardsKilled"),
-                        participant.get("visionWardsBoughtInGame"),
-                        participant.get("enemyChampionImmobilizations", 0),
-                        participant.get("firstBloodKill"),
-                        participant.get("firstTowerKill"),
-                        participant.get("turretKills"),
-                        participant.get("inhibitorKills"),
-                        participant.get("largestKillingSpree"),
-                        participant.get("largestMultiKill"),
-                        participant.get("killingSprees"),
-                        participant.get("doubleKills"),
-                        participant.get("tripleKills"),
-                        participant.get("quadraKills"),
-                        participant.get("pentaKills"),
-                        challenges.get("damagePerMinute"),
-                        challenges.get("damageTakenOnTeamPercentage"),
-                        challenges.get("goldPerMinute"),
-                        challenges.get("teamDamagePercentage"),
-                        challenges.get("killParticipation"),
-                        challenges.get("kda"),
-                        challenges.get("laneMinionsFirst10Minutes"),
-                        challenges.get("turretPlatesTaken"),
-                        challenges.get("soloKills")
-                    ))
-
-                inserted_count += 1
-
-        return inserted_count
+                    if self.insert_match(match_data, source_elo=source_elo):
+                        self.writer_inserted += 1
+                except Exception as e:
+                    logger.error(f"Failed to insert match {match_id}: {e}")
+                    failed.add(match_id)
+
+        self.writer_failed += len(failed)
+        return failed
 
     def save_player_progress(self, puuid: str):
         """Mark player as processed (updates timestamp if already exists)"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO collection_progress (puuid, processed_at)
-                VALUES (?, CURRENT_TIMESTAMP)
-                ON CONFLICT(puuid) DO UPDATE SET processed_at = CURRENT_TIMESTAMP
-            ''', (puuid,))
+            conn.execute(_UPSERT_PLAYER_PROGRESS_SQL, (puuid, int(time.time())))
+
+    def save_players_progress(self, puuids: List[str]) -> int:
+        """Mark many players as processed in one transaction (see save_player_progress)"""
+        processed_at_epoch = int(time.time())
+        with self.get_connection() as conn:
+            conn.executemany(_UPSERT_PLAYER_PROGRESS_SQL, ((puuid, processed_at_epoch) for puuid in puuids))
+        return len(puuids)
 
     def is_player_processed(self, puuid: str, refresh_hours: int = 24) -> bool:
         """
@@ -871,12 +1676,12 @@ class MatchDatabase:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             if refresh_hours > 0:
-                # Check if processed within the last refresh_hours
+                # Check if processed within the last refresh_hours (integer epoch compare)
                 cursor.execute('''
                     SELECT 1 FROM collection_progress
                     WHERE puuid = ?
-                    AND processed_at > datetime('now', ?)
-                ''', (puuid, f'-{refresh_hours} hours'))
+                    AND processed_at_epoch > ?
+                ''', (puuid, int(time.time()) - refresh_hours * 3600))
             else:
                 # Old behavior: check if ever processed
                 cursor.execute(
@@ -903,57 +1708,45 @@ class MatchDatabase:
         """Clear processed players with a specific prefix (e.g., 'sid_' for Master+ players)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM collection_progress WHERE puuid LIKE ?', (f'{prefix}%',))
+            cursor.execute('DELETE FROM collection_progress WHERE puuid >= ? AND puuid < ?', _prefix_range(prefix))
             return cursor.rowcount
 
     def update_stat(self, key: str, value: Any):
         """Update a collection statistic"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO collection_stats (key, value)
-                VALUES (?, ?)
-            ''', (key, json.dumps(value)))
+            conn.execute(_UPSERT_STAT_SQL, (key, json.dumps(value)))
+
+    def update_stats(self, stats: Dict[str, Any]):
+        """Update many collection statistics in one transaction"""
+        with self.get_connection() as conn:
+            conn.executemany(_UPSERT_STAT_SQL, ((key, json.dumps(value)) for key, value in stats.items()))
 
     def get_stat(self, key: str, default: Any = None) -> Any:
         """Get a collection statistic"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT value FROM collection_stats WHERE key = ?',
-                (key,)
-            )
-            row = cursor.fetchone()
+            row = conn.execute('SELECT value FROM collection_stats WHERE key = ?', (key,)).fetchone()
             if row:
                 return json.loads(row[0])
             return default
 
     def get_stats(self) -> Dict[str, Any]:
-        """Get all collection statistics"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Count matches
-            cursor.execute('SELECT COUNT(*) FROM matches')
-            match_count = cursor.fetchone()[0]
-
-            # Count players
-            cursor.execute('SELECT COUNT(*) FROM collection_progress')
-            player_count = cursor.fetchone()[0]
-
-            # Get stored stats
-            stats = {
-                'total_matches': match_count,
-                'processed_players': player_count,
-                'total_requests': self.get_stat('total_requests', 0),
-                'successful_requests': self.get_stat('successful_requests', 0),
-                'rate_limit_errors': self.get_stat('rate_limit_errors', 0),
-                'other_errors': self.get_stat('other_errors', 0),
-                'last_page': self.get_stat('last_page', 1),
-                'last_player_index': self.get_stat('last_player_index', 0)
-            }
-
-            return stats
+        """Get all collection statistics (read-only connection, committed data)"""
+        conn = self._read_connection()
+        match_count = conn.execute(_COUNT_MATCHES_SQL).fetchone()[0]
+        player_count = conn.execute('SELECT COUNT(*) FROM collection_progress').fetchone()[0]
+        stored = {key: json.loads(value)
+                  for key, value in conn.execute('SELECT key, value FROM collection_stats')}
+
+        return {
+            'total_matches': match_count,
+            'processed_players': player_count,
+            'total_requests': stored.get('total_requests', 0),
+            'successful_requests': stored.get('successful_requests', 0),
+            'rate_limit_errors': stored.get('rate_limit_errors', 0),
+            'other_errors': stored.get('other_errors', 0),
+            'last_page': stored.get('last_page', 1),
+            'last_player_index': stored.get('last_player_index', 0)
+        }
 
     def increment_stat(self, key: str, amount: int = 1):
         """Increment a numeric statistic"""
@@ -969,43 +1762,21 @@ class MatchDatabase:
         """Insert or update summoner info"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO summoners (puuid, riot_id_name, riot_id_tagline, current_tier, current_rank, current_lp, last_seen_at)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(puuid) DO UPDATE SET
-                    riot_id_name = COALESCE(excluded.riot_id_name, riot_id_name),
-                    riot_id_tagline = COALESCE(excluded.riot_id_tagline, riot_id_tagline),
-                    current_tier = COALESCE(excluded.current_tier, current_tier),
-                    current_rank = COALESCE(excluded.current_rank, current_rank),
-                    current_lp = COALESCE(excluded.current_lp, current_lp),
-                    total_games_tracked = total_games_tracked + 1,
-                    last_seen_at = CURRENT_TIMESTAMP,
-                    last_updated_at = CURRENT_TIMESTAMP
-            ''', (puuid, riot_id_name, riot_id_tagline, tier, rank, lp))
+            cursor.execute(_UPSERT_SUMMONER_SQL, (puuid, riot_id_name, riot_id_tagline, tier, rank, lp))
 
     def get_summoner(self, puuid: str) -> Optional[Dict]:
         """Get summoner info by PUUID"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM summoners WHERE puuid = ?', (puuid,))
-            row = cursor.fetchone()
+            row = conn.execute('SELECT * FROM summoners WHERE puuid = ?', (puuid,)).fetchone()
             if row:
                 return dict(row)
             return None
 
     def record_elo_history(self, puuid: str, patch: str, tier: str, rank: str, lp: int):
         """Record summoner's elo for a specific patch"""
-        with self.get_connection() as conn:
+        with self.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO summoner_elo_history (puuid, patch, tier, rank, lp)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(puuid, patch) DO UPDATE SET
-                    tier = excluded.tier,
-                    rank = excluded.rank,
-                    lp = excluded.lp,
-                    recorded_at = CURRENT_TIMESTAMP
-            ''', (puuid, patch, tier, rank, lp))
+            cursor.execute(_UPSERT_ELO_HISTORY_SQL, (puuid, patch, tier, rank, lp))
 
     # ================================================================
     # Champion Mastery Methods (NEW)
@@ -1014,41 +1785,27 @@ class MatchDatabase:
     def upsert_champion_mastery(self, puuid: str, champion_id: int, champion_level: int,
                                  champion_points: int, last_play_time: int = None, tokens_earned: int = 0):
         """Insert or update champion mastery"""
-        with self.get_connection() as conn:
+        with self.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO champion_mastery (puuid, champion_id, champion_level, champion_points, last_play_time, tokens_earned)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(puuid, champion_id) DO UPDATE SET
-                    champion_level = excluded.champion_level,
-                    champion_points = excluded.champion_points,
-                    last_play_time = excluded.last_play_time,
-                    tokens_earned = excluded.tokens_earned,
-                    updated_at = CURRENT_TIMESTAMP
-            ''', (puuid, champion_id, champion_level, champion_points, last_play_time, tokens_earned))
-
-    def get_summoner_mastery(self, puuid: str, limit: int = None) -> List[Dict]:
+            cursor.execute(_UPSERT_MASTERY_SQL, (puuid, champion_id, champion_level, champion_points, last_play_time, tokens_earned))
+
+    def get_summoner_mastery(self, puuid: str, limit: int = None) -> List[MasteryRow]:
         """Get champion mastery for a summoner, sorted by points"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            query = 'SELECT * FROM champion_mastery WHERE puuid = ? ORDER BY champion_points DESC'
-            if limit:
-                query += f' LIMIT {limit}'
-            cursor.execute(query, (puuid,))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._fetch_rows(MasteryRow, _SELECT_SUMMONER_MASTERY_SQL, (puuid, limit or -1))
+
+    def get_summoner_mastery_arrays(self, puuid: str) -> Dict[str, 'np.ndarray']:
+        """
+        Champion mastery of a summoner as column arrays (sorted by points),
+        keyed by MASTERY_ARRAY_FIELDS names. Missing values are 0.
+        """
+        return self._fetch_arrays(MASTERY_ARRAY_FIELDS, _SELECT_MASTERY_ARRAYS_SQL, (puuid,))
 
     def get_mastery_for_champion(self, puuid: str, champion_id: int) -> Optional[Dict]:
         """Get mastery for a specific champion"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT * FROM champion_mastery WHERE puuid = ? AND champion_id = ?',
-                (puuid, champion_id)
-            )
-            row = cursor.fetchone()
-            if row:
-                return dict(row)
-            return None
+        row = self._read_connection().execute(_SELECT_CHAMPION_MASTERY_SQL, (puuid, champion_id)).fetchone()
+        if row:
+            return dict(row)
+        return None
 
     # ================================================================
     # Patch Methods (NEW)
@@ -1056,22 +1813,13 @@ class MatchDatabase:
 
     def upsert_patch(self, patch: str, release_date: str = None, data_dragon_version: str = None):
         """Insert or update patch info"""
-        with self.get_connection() as conn:
+        with self.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO patches (patch, release_date, data_dragon_version)
-                VALUES (?, ?, ?)
-                ON CONFLICT(patch) DO UPDATE SET
-                    release_date = COALESCE(excluded.release_date, release_date),
-                    data_dragon_version = COALESCE(excluded.data_dragon_version, data_dragon_version)
-            ''', (patch, release_date, data_dragon_version))
-
-    def get_patches(self) -> List[Dict]:
+            cursor.execute(_UPSERT_PATCH_SQL, (patch, release_date, data_dragon_version))
+
+    def get_patches(self) -> List[PatchRow]:
         """Get all patches"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM patches ORDER BY patch DESC')
-            return [dict(row) for row in cursor.fetchall()]
+        return self._fetch_rows(PatchRow, _SELECT_PATCHES_SQL)
 
     # ================================================================
     # Champion Patch Stats Methods (NEW)
@@ -1079,46 +1827,41 @@ class MatchDatabase:
 
     def update_champion_patch_stats(self, champion_id: int, patch: str, win: bool, position: str):
         """Update champion stats for a patch (called after each match insert)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        self.update_champion_patch_stats_bulk([(champion_id, patch, win, position)])
 
-            # Get position column name
-            position_col = f'{position}_games' if position in ['top', 'jungle', 'mid', 'adc', 'support'] else None
+    def update_champion_patch_stats_bulk(self, rows: List[Tuple[int, str, bool, str]]):
+        """
+        Update champion stats for many (champion_id, patch, win, position) rows
+        in one transaction, e.g. the 10 participants of a match.
 
-            # Upsert champion stats
-            cursor.execute('''
-                INSERT INTO champion_patch_stats (champion_id, patch, games_played, wins)
-                VALUES (?, ?, 1, ?)
-                ON CONFLICT(champion_id, patch) DO UPDATE SET
-                    games_played = games_played + 1,
-                    wins = wins + ?,
-                    updated_at = CURRENT_TIMESTAMP
-            ''', (champion_id, patch, 1 if win else 0, 1 if win else 0))
-
-            # Update position-specific count if valid position
-            if position_col:
-                cursor.execute(f'''
-                    UPDATE champion_patch_stats
-                    SET {position_col} = {position_col} + 1
-                    WHERE champion_id = ? AND patch = ?
-                ''', (champion_id, patch))
+        Rows are grouped by position and each group runs one executemany of
+        the upsert specialized for that position.
+        """
+        if not rows:
+            return
+
+        by_position = {}
+        for champion_id, patch, win, position in rows:
+            key = position if position in _CHAMPION_PATCH_UPSERT_SQL else None
+            by_position.setdefault(key, []).append((champion_id, patch, 1 if win else 0))
+
+        with self.get_connection(immediate=True) as conn:
+            for position, params in by_position.items():
+                conn.executemany(_CHAMPION_PATCH_UPSERT_SQL[position], params)
 
     def recalculate_champion_rates(self, patch: str):
         """Recalculate winrate/pickrate/banrate for a patch"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-
+        with self.get_connection(immediate=True) as conn:
             # Get total games for this patch
-            cursor.execute('''
-                SELECT COUNT(*) FROM matches WHERE game_version LIKE ?
-            ''', (f'{patch}%',))
-            total_games = cursor.fetchone()[0]
+            total_games = conn.execute('''
+                SELECT COUNT(*) FROM matches WHERE game_version >= ? AND game_version < ?
+            ''', _prefix_range(patch)).fetchone()[0]
 
             if total_games == 0:
                 return
 
             # Update rates
-            cursor.execute('''
+            conn.execute('''
                 UPDATE champion_patch_stats
                 SET winrate = CAST(wins AS REAL) / NULLIF(games_played, 0),
                     pickrate = CAST(games_played AS REAL) / ? / 10,
@@ -1126,7 +1869,7 @@ class MatchDatabase:
                 WHERE patch = ?
             ''', (total_games, total_games, patch))
 
-    def get_champion_role_distribution(self, champion_id: int = None, patch: str = None) -> pd.DataFrame:
+    def get_champion_role_distribution(self, champion_id: int = None, patch: str = None) -> 'pd.DataFrame':
         """
         Get role distribution for champions (% of games played in each role).
 
@@ -1140,6 +1883,8 @@ class MatchDatabase:
             DataFrame with champion_id, champion_name, patch, and percentage columns:
             top_pct, jungle_pct, mid_pct, adc_pct, support_pct
         """
+        import pandas as pd
+
         with self.get_connection() as conn:
             query = '''
                 SELECT
@@ -1197,10 +1942,10 @@ class MatchDatabase:
 
             # Build query to aggregate stats
             patch_filter = ""
-            params = []
+            params = ()
             if patch:
-                patch_filter = "WHERE m.game_version LIKE ?"
-                params.append(f'{patch}%')
+                patch_filter = "WHERE m.game_version >= ? AND m.game_version < ?"
+                params = _prefix_range(patch)
 
             # Aggregate champion stats per patch
             cursor.execute(f'''
@@ -1240,16 +1985,16 @@ class MatchDatabase:
                 )
             ''')
 
-    def get_champion_stats_for_patch(self, patch: str) -> List[Dict]:
+    def get_champion_stats_for_patch(self, patch: str) -> List[ChampionPatchStatsRow]:
         """Get all champion stats for a patch"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM champion_patch_stats
-                WHERE patch = ?
-                ORDER BY games_played DESC
-            ''', (patch,))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._fetch_rows(ChampionPatchStatsRow, _SELECT_CHAMPION_PATCH_STATS_SQL, (patch,))
+
+    def get_champion_stats_arrays(self, patch: str) -> Dict[str, 'np.ndarray']:
+        """
+        Champion stats of a patch as column arrays (sorted by games played),
+        keyed by CHAMPION_STATS_ARRAY_FIELDS names. Rates not yet computed are NaN.
+        """
+        return self._fetch_arrays(CHAMPION_STATS_ARRAY_FIELDS, _SELECT_CHAMPION_STATS_ARRAYS_SQL, (patch,))
 
     # ================================================================
     # Backfill Methods - Fill missing data in existing records
@@ -1365,80 +2110,74 @@ class MatchDatabase:
 
     def insert_timeline_frame(self, match_id: str, minute: int, team_gold: Dict, position_gold: Dict):
         """Insert a timeline frame (gold at minute M)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO match_timeline (
-                    match_id, minute,
-                    team_100_gold, team_200_gold, gold_diff,
-                    team_100_top_gold, team_100_jungle_gold, team_100_mid_gold, team_100_adc_gold, team_100_support_gold,
-                    team_200_top_gold, team_200_jungle_gold, team_200_mid_gold, team_200_adc_gold, team_200_support_gold
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                match_id, minute,
-                team_gold.get('team_100', 0), team_gold.get('team_200', 0),
-                team_gold.get('team_100', 0) - team_gold.get('team_200', 0),
-                position_gold.get('team_100_top', 0), position_gold.get('team_100_jungle', 0),
-                position_gold.get('team_100_mid', 0), position_gold.get('team_100_adc', 0),
-                position_gold.get('team_100_support', 0),
-                position_gold.get('team_200_top', 0), position_gold.get('team_200_jungle', 0),
-                position_gold.get('team_200_mid', 0), position_gold.get('team_200_adc', 0),
-                position_gold.get('team_200_support', 0)
-            ))
+        self.insert_timeline_frames(match_id, [(minute, team_gold, position_gold)])
 
-    def get_match_timeline(self, match_id: str) -> List[Dict]:
+    def insert_timeline_frames(self, match_id: str, frames: List[Tuple[int, Dict, Dict]]):
+        """
+        Insert all timeline frames of a match in one transaction.
+
+        The match keeps a single packed row; frames for minutes already stored
+        replace the previous values.
+
+        Args:
+            match_id: Match ID
+            frames: List of (minute, team_gold, position_gold) tuples
+        """
+        new_frames = {frame[0]: _timeline_frame(*frame) for frame in frames}
+        with self.get_connection(immediate=True) as conn:
+            row = conn.execute(_SELECT_PACKED_TIMELINE_SQL, (match_id,)).fetchone()
+            merged = _unpack_timeline(row[0]) if row else {}
+            merged.update(new_frames)
+            conn.execute(_UPSERT_PACKED_TIMELINE_SQL, (match_id, len(merged), _pack_timeline(merged)))
+
+    def _read_timeline(self, match_id: str) -> Optional[bytes]:
+        """Packed timeline blob of a match, or None"""
+        row = self._read_connection().execute(_SELECT_PACKED_TIMELINE_SQL, (match_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_participant_positions(self, match_id: str) -> Dict[str, Tuple[int, str]]:
+        """puuid -> (team_id, position) of a stored match's players"""
+        rows = self._read_connection().execute(_SELECT_PARTICIPANT_POSITIONS_SQL, (match_id,)).fetchall()
+        return {puuid: (team_id, position) for puuid, team_id, position in rows}
+
+    def get_match_timeline(self, match_id: str) -> List[TimelineRow]:
         """Get timeline for a match"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM match_timeline
-                WHERE match_id = ?
-                ORDER BY minute
-            ''', (match_id,))
-            return [dict(row) for row in cursor.fetchall()]
+        data = self._read_timeline(match_id)
+        if data is None:
+            return []
+        return [TimelineRow(match_id, *frame) for frame in TIMELINE_FRAME.iter_unpack(data)]
+
+    def get_timeline_array(self, match_id: str) -> 'np.ndarray':
+        """
+        Timeline of a match as an int32 array of shape (minutes, 14), columns
+        TIMELINE_COLUMNS[1:] (minute first). Empty if the match has no timeline.
+        """
+        import numpy as np
+
+        data = self._read_timeline(match_id) or b''
+        return np.frombuffer(data, dtype='<i4').reshape(-1, len(TIMELINE_COLUMNS) - 1)
 
     def get_gold_at_minute(self, match_id: str, minute: int) -> Optional[Dict]:
         """Get gold snapshot at a specific minute"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM match_timeline
-                WHERE match_id = ? AND minute = ?
-            ''', (match_id, minute))
-            row = cursor.fetchone()
-            if row:
-                return dict(row)
-            return None
+        data = self._read_timeline(match_id)
+        frame = _unpack_timeline(data).get(minute) if data else None
+        if frame:
+            return TimelineRow(match_id, *frame)._asdict()
+        return None
 
     # ================================================================
     # Teammates Analysis (NEW)
     # ================================================================
 
-    def get_common_teammates(self, puuid: str, limit: int = 10) -> List[Dict]:
+    def get_common_teammates(self, puuid: str, limit: int = 10) -> List[TeammateRow]:
         """Get most frequent teammates for a summoner"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT
-                    p2.puuid as teammate_puuid,
-                    p2.riot_id_name as teammate_name,
-                    COUNT(*) as games_together,
-                    SUM(CASE WHEN m.team_100_win = (p1.team_id = 100) THEN 1 ELSE 0 END) as wins_together
-                FROM player_stats p1
-                JOIN player_stats p2 ON p1.match_id = p2.match_id AND p1.team_id = p2.team_id AND p1.puuid != p2.puuid
-                JOIN matches m ON p1.match_id = m.match_id
-                WHERE p1.puuid = ?
-                GROUP BY p2.puuid, p2.riot_id_name
-                ORDER BY games_together DESC
-                LIMIT ?
-            ''', (puuid, limit))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._fetch_rows(TeammateRow, _SELECT_COMMON_TEAMMATES_SQL, (puuid, limit))
 
     # ================================================================
     # Champion & Invocateur Data Endpoints (SRZ requests)
     # ================================================================
 
-    def get_champions_data(self, patch_list: List[str] = None) -> pd.DataFrame:
+    def get_champions_data(self, patch_list: List[str] = None) -> 'pd.DataFrame':
         """
         Get champion statistics for multiple patches.
 
@@ -1451,6 +2190,8 @@ class MatchDatabase:
             games_played, wins, winrate, pickrate, banrate,
             top_games, jungle_games, mid_games, adc_games, support_games
         """
+        import pandas as pd
+
         with self.get_connection() as conn:
             if patch_list:
                 placeholders = ','.join(['?' for _ in patch_list])
@@ -1477,7 +2218,7 @@ class MatchDatabase:
 
         return df
 
-    def get_invocateurs_data(self, patch_list: List[str] = None) -> pd.DataFrame:
+    def get_invocateurs_data(self, patch_list: List[str] = None) -> 'pd.DataFrame':
         """
         Get summoner elo history data for patches.
 
@@ -1488,6 +2229,8 @@ class MatchDatabase:
         Returns:
             DataFrame with: puuid, riot_id_name, riot_id_tagline, patch, tier, rank, lp
         """
+        import pandas as pd
+
         with self.get_connection() as conn:
             if patch_list:
                 placeholders = ','.join(['?' for _ in patch_list])
@@ -1569,193 +2312,37 @@ class MatchDatabase:
 
         return summoner
 
-    def export_to_dataframe(self) -> pd.DataFrame:
+    def iter_dataframe(self, chunksize: int = 50_000) -> Iterator['pd.DataFrame']:
+        """
+        Stream the export_to_dataframe view in chunks of `chunksize` matches.
+
+        Each chunk is cast to EXPORT_DTYPES on arrival (nullable Int8/16/32,
+        Float32, boolean, string) so peak memory is bounded by one chunk of
+        Python objects instead of the whole table.
+        """
+        import pandas as pd
+
+        # read-only connection: the scan uses its larger mmap and doesn't keep
+        # the thread's write connection in a read transaction between chunks
+        for chunk in pd.read_sql_query(_EXPORT_SQL, self._read_connection(), chunksize=chunksize):
+            yield chunk.astype(EXPORT_DTYPES)
+
+    def export_to_dataframe(self) -> 'pd.DataFrame':
         """
         Export database to pandas DataFrame for ML.
         Returns a flattened view with one row per match.
         """
-        with self.get_connection() as conn:
-            # Build the query with pivoted player stats
-            query = '''
-            SELECT
-                m.match_id,
-                m.game_duration,
-                m.game_version,
-                m.team_100_win,
-                m.team_100_early_surrendered,
-                m.team_200_early_surrendered,
-
-                -- Team 100 stats
-                t100.first_blood as team_100_first_blood,
-                t100.first_tower as team_100_first_tower,
-                t100.first_inhibitor as team_100_first_inhibitor,
-                t100.first_dragon as team_100_first_dragon,
-                t100.first_rift_herald as team_100_first_rift_herald,
-                t100.first_baron as team_100_first_baron,
-                t100.dragon_kills as team_100_dragon_kills,
-                t100.baron_kills as team_100_baron_kills,
-                t100.tower_kills as team_100_tower_kills,
-                t100.inhibitor_kills as team_100_inhibitor_kills,
-                t100.rift_herald_kills as team_100_rift_herald_kills,
-                t100.ban_1_champion_id as team_100_ban_1,
-                t100.ban_2_champion_id as team_100_ban_2,
-                t100.ban_3_champion_id as team_100_ban_3,
-                t100.ban_4_champion_id as team_100_ban_4,
-                t100.ban_5_champion_id as team_100_ban_5,
-
-                -- Team 200 stats
-                t200.first_blood as team_200_first_blood,
-                t200.first_tower as team_200_first_tower,
-                t200.first_inhibitor as team_200_first_inhibitor,
-                t200.first_dragon as team_200_first_dragon,
-                t200.first_rift_herald as team_200_first_rift_herald,
-                t200.first_baron as team_200_first_baron,
-                t200.dragon_kills as team_200_dragon_kills,
-                t200.baron_kills as team_200_baron_kills,
-                t200.tower_kills as team_200_tower_kills,
-                t200.inhibitor_kills as team_200_inhibitor_kills,
-                t200.rift_herald_kills as team_200_rift_herald_kills,
-                t200.ban_1_champion_id as team_200_ban_1,
-                t200.ban_2_champion_id as team_200_ban_2,
-                t200.ban_3_champion_id as team_200_ban_3,
-                t200.ban_4_champion_id as team_200_ban_4,
-                t200.ban_5_champion_id as team_200_ban_5,
-
-                -- Team 100 players
-                p100_top.champion_id as team_100_top_champion_id,
-                p100_top.champion_name as team_100_top_champion_name,
-                p100_top.kills as team_100_top_kills,
-                p100_top.deaths as team_100_top_deaths,
-                p100_top.assists as team_100_top_assists,
-                p100_top.gold_earned as team_100_top_gold,
-                p100_top.total_minions_killed as team_100_top_cs,
-                p100_top.vision_score as team_100_top_vision,
-                p100_top.total_damage_to_champions as team_100_top_damage,
-                p100_top.kda as team_100_top_kda,
-
-                p100_jg.champion_id as team_100_jungle_champion_id,
-                p100_jg.champion_name as team_100_jungle_champion_name,
-                p100_jg.kills as team_100_jungle_kills,
-                p100_jg.deaths as team_100_jungle_deaths,
-                p100_jg.assists as team_100_jungle_assists,
-                p100_jg.gold_earned as team_100_jungle_gold,
-                p100_jg.total_minions_killed as team_100_jungle_cs,
-                p100_jg.vision_score as team_100_jungle_vision,
-                p100_jg.total_damage_to_champions as team_100_jungle_damage,
-                p100_jg.kda as team_100_jungle_kda,
-
-                p100_mid.champion_id as team_100_mid_champion_id,
-                p100_mid.champion_name as team_100_mid_champion_name,
-                p100_mid.kills as team_100_mid_kills,
-                p100_mid.deaths as team_100_mid_deaths,
-                p100_mid.assists as team_100_mid_assists,
-                p100_mid.gold_earned as team_100_mid_gold,
-                p100_mid.total_minions_killed as team_100_mid_cs,
-                p100_mid.vision_score as team_100_mid_vision,
-                p100_mid.total_damage_to_champions as team_100_mid_damage,
-                p100_mid.kda as team_100_mid_kda,
-
-                p100_adc.champion_id as team_100_adc_champion_id,
-                p100_adc.champion_name as team_100_adc_champion_name,
-                p100_adc.kills as team_100_adc_kills,
-                p100_adc.deaths as team_100_adc_deaths,
-                p100_adc.assists as team_100_adc_assists,
-                p100_adc.gold_earned as team_100_adc_gold,
-                p100_adc.total_minions_killed as team_100_adc_cs,
-                p100_adc.vision_score as team_100_adc_vision,
-                p100_adc.total_damage_to_champions as team_100_adc_damage,
-                p100_adc.kda as team_100_adc_kda,
-
-                p100_sup.champion_id as team_100_support_champion_id,
-                p100_sup.champion_name as team_100_support_champion_name,
-                p100_sup.kills as team_100_support_kills,
-                p100_sup.deaths as team_100_support_deaths,
-                p100_sup.assists as team_100_support_assists,
-                p100_sup.gold_earned as team_100_support_gold,
-                p100_sup.total_minions_killed as team_100_support_cs,
-                p100_sup.vision_score as team_100_support_vision,
-                p100_sup.total_damage_to_champions as team_100_support_damage,
-                p100_sup.kda as team_100_support_kda,
-
-                -- Team 200 players
-                p200_top.champion_id as team_200_top_champion_id,
-                p200_top.champion_name as team_200_top_champion_name,
-                p200_top.kills as team_200_top_kills,
-                p200_top.deaths as team_200_top_deaths,
-                p200_top.assists as team_200_top_assists,
-                p200_top.gold_earned as team_200_top_gold,
-                p200_top.total_minions_killed as team_200_top_cs,
-                p200_top.vision_score as team_200_top_vision,
-                p200_top.total_damage_to_champions as team_200_top_damage,
-                p200_top.kda as team_200_top_kda,
-
-                p200_jg.champion_id as team_200_jungle_champion_id,
-                p200_jg.champion_name as team_200_jungle_champion_name,
-                p200_jg.kills as team_200_jungle_kills,
-                p200_jg.deaths as team_200_jungle_deaths,
-                p200_jg.assists as team_200_jungle_assists,
-                p200_jg.gold_earned as team_200_jungle_gold,
-                p200_jg.total_minions_killed as team_200_jungle_cs,
-                p200_jg.vision_score as team_200_jungle_vision,
-                p200_jg.total_damage_to_champions as team_200_jungle_damage,
-                p200_jg.kda as team_200_jungle_kda,
-
-                p200_mid.champion_id as team_200_mid_champion_id,
-                p200_mid.champion_name as team_200_mid_champion_name,
-                p200_mid.kills as team_200_mid_kills,
-                p200_mid.deaths as team_200_mid_deaths,
-                p200_mid.assists as team_200_mid_assists,
-                p200_mid.gold_earned as team_200_mid_gold,
-                p200_mid.total_minions_killed as team_200_mid_cs,
-                p200_mid.vision_score as team_200_mid_vision,
-                p200_mid.total_damage_to_champions as team_200_mid_damage,
-                p200_mid.kda as team_200_mid_kda,
-
-                p200_adc.champion_id as team_200_adc_champion_id,
-                p200_adc.champion_name as team_200_adc_champion_name,
-                p200_adc.kills as team_200_adc_kills,
-                p200_adc.deaths as team_200_adc_deaths,
-                p200_adc.assists as team_200_adc_assists,
-                p200_adc.gold_earned as team_200_adc_gold,
-                p200_adc.total_minions_killed as team_200_adc_cs,
-                p200_adc.vision_score as team_200_adc_vision,
-                p200_adc.total_damage_to_champions as team_200_adc_damage,
-                p200_adc.kda as team_200_adc_kda,
-
-                p200_sup.champion_id as team_200_support_champion_id,
-                p200_sup.champion_name as team_200_support_champion_name,
-                p200_sup.kills as team_200_support_kills,
-                p200_sup.deaths as team_200_support_deaths,
-                p200_sup.assists as team_200_support_assists,
-                p200_sup.gold_earned as team_200_support_gold,
-                p200_sup.total_minions_killed as team_200_support_cs,
-                p200_sup.vision_score as team_200_support_vision,
-                p200_sup.total_damage_to_champions as team_200_support_damage,
-                p200_sup.kda as team_200_support_kda
-
-            FROM matches m
-            LEFT JOIN team_stats t100 ON m.match_id = t100.match_id AND t100.team_id = 100
-            LEFT JOIN team_stats t200 ON m.match_id = t200.match_id AND t200.team_id = 200
-            LEFT JOIN player_stats p100_top ON m.match_id = p100_top.match_id AND p100_top.team_id = 100 AND p100_top.position = 'top'
-            LEFT JOIN player_stats p100_jg ON m.match_id = p100_jg.match_id AND p100_jg.team_id = 100 AND p100_jg.position = 'jungle'
-            LEFT JOIN player_stats p100_mid ON m.match_id = p100_mid.match_id AND p100_mid.team_id = 100 AND p100_mid.position = 'mid'
-            LEFT JOIN player_stats p100_adc ON m.match_id = p100_adc.match_id AND p100_adc.team_id = 100 AND p100_adc.position = 'adc'
-            LEFT JOIN player_stats p100_sup ON m.match_id = p100_sup.match_id AND p100_sup.team_id = 100 AND p100_sup.position = 'support'
-            LEFT JOIN player_stats p200_top ON m.match_id = p200_top.match_id AND p200_top.team_id = 200 AND p200_top.position = 'top'
-            LEFT JOIN player_stats p200_jg ON m.match_id = p200_jg.match_id AND p200_jg.team_id = 200 AND p200_jg.position = 'jungle'
-            LEFT JOIN player_stats p200_mid ON m.match_id = p200_mid.match_id AND p200_mid.team_id = 200 AND p200_mid.position = 'mid'
-            LEFT JOIN player_stats p200_adc ON m.match_id = p200_adc.match_id AND p200_adc.team_id = 200 AND p200_adc.position = 'adc'
-            LEFT JOIN player_stats p200_sup ON m.match_id = p200_sup.match_id AND p200_sup.team_id = 200 AND p200_sup.position = 'support'
-            '''
+        import pandas as pd
+
+        return pd.concat(list(self.iter_dataframe()), ignore_index=True)
 
-            return pd.read_sql_query(query, conn)
+    def get_champion_names(self) -> Dict[int, str]:
+        """champion_id -> champion name, as seen in collected matches (for display)"""
+        return dict(self._read_connection().execute(_SELECT_CHAMPION_NAMES_SQL).fetchall())
 
     def get_match_count(self) -> int:
         """Get total number of matches in database"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM matches')
-            return cursor.fetchone()[0]
+        return self._read_connection().execute(_COUNT_MATCHES_SQL).fetchone()[0]
 
 
 # Utility function for testing
@@ -1764,6 +2351,7 @@ def test_database():
     import os
 
     test_db = 'test_lol_matches.db'
+    db = None
 
     try:
         db = MatchDatabase(test_db)
@@ -1858,8 +2446,11 @@ def test_database():
         print("\nAll tests passed!")
 
     finally:
-        if os.path.exists(test_db):
-            os.remove(test_db)
+        if db is not None:
+            db.close()
+        for path in (test_db, test_db + '-wal', test_db + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
 
 
 if __name__ == "__main__":
@@ -22,16 +22,130 @@ from pathlib import Path
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Optional Intel oneDAL acceleration (pip install scikit-learn-intelex).
+# Must patch before the sklearn estimators below are imported.
+try:
+    from sklearnex import patch_sklearn
+    patch_sklearn(verbose=False)
+    SKLEARNEX_ENABLED = True
+except ImportError:
+    SKLEARNEX_ENABLED = False
+
+from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
+from joblib import Parallel, delayed
 import warnings
 
+# Optional compiled tree inference (pip install treelite)
+try:
+    import treelite
+    import treelite.gtil
+except ImportError:
+    treelite = None
+
+# Saved models are compressed with lz4 when installed (pip install lz4),
+# otherwise with zlib
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESSION = ('lz4', 3)
+except ImportError:
+    MODEL_COMPRESSION = ('zlib', 3)
+
 warnings.filterwarnings('ignore')
 
+# Column order of the (N, 10) champion id arrays of predict_proba_batch:
+# (team index into _champion_columns, position), team 100 first
+DRAFT_SLOTS = tuple(
+    (team, pos) for team in (0, 1) for pos in ('top', 'jungle', 'mid', 'adc', 'support')
+)
+
+
+# Storage dtype of CSV features by column suffix (first match wins); they are
+# only widened to float32 when training. Flags are already int8.
+CSV_FEATURE_DTYPES = (
+    ('_champion', np.int16),
+    ('_kills', np.int16),
+    ('_visionScore', np.int16),
+    ('_goldEarned', np.int32),
+    ('_totalMinionsKilled', np.int32),
+    ('_kda', np.float32),
+    ('gameDuration', np.int32),
+    ('gold_difference', np.int32),
+)
+
+
+def _read_parquet(path: str, columns: list = None) -> pa.Table:
+    """
+    Read a Parquet file (e.g. a label file) through the pyarrow dataset API so
+    only the requested columns (and, with a filter, row groups) are read.
+    """
+    return ds.dataset(path, format='parquet').to_table(columns=columns)
+
+
+def _read_matrix(path: str, columns: list = None, batch_size: int = 65536) -> tuple:
+    """
+    Read feature columns of a memory-mapped Parquet file batch by batch into
+    a preallocated float32 (n_rows, n_columns) array, so only one record
+    batch is decoded at a time and no pandas frame is built. Nulls become NaN.
+
+    Returns:
+        tuple: (matrix, tuple of column names)
+    """
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    if columns is None:
+        columns = parquet_file.schema_arrow.names
+    matrix = np.empty((parquet_file.metadata.num_rows, len(columns)), dtype=np.float32, order='F')
+
+    offset = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        end = offset + batch.num_rows
+        for i, column in enumerate(batch.columns):
+            matrix[offset:end, i] = column.to_numpy(zero_copy_only=False)
+        offset = end
+    return matrix, tuple(columns)
+
+
+def _as_matrix(X) -> np.ndarray:
+    """
+    Features (DataFrame or array) as a new C-contiguous float32 array with
+    missing values set to 0. Being a private copy, it can be scaled in place.
+    """
+    X = np.array(X, dtype=np.float32, order='C')
+    X[np.isnan(X)] = 0
+    return X
+
+
+def _fit_and_score(name: str, model, X_train: np.ndarray, y_train: np.ndarray,
+                   X_val: np.ndarray, y_val: np.ndarray, folds: list, n_jobs: int) -> tuple:
+    """
+    Fit one candidate model, score it on the validation set and cross-validate
+    it on the training set over the given (train, test) index folds, if any
+    (run in a joblib worker by DraftPredictor.train).
+
+    Returns:
+        tuple: (name, fitted model, val_score, cv_mean, cv_std)
+    """
+    model.fit(X_train, y_train)
+    val_score = model.score(X_val, y_val)
+
+    if folds:
+        cv_scores = cross_val_score(model, X_train, y_train, cv=folds, n_jobs=n_jobs)
+        return name, model, val_score, cv_scores.mean(), cv_scores.std()
+    return name, model, val_score, val_score, 0
+
+
+# Validation set size from which its score alone is reliable enough to pick
+# a model, so cross-validation is skipped by default
+CV_MAX_VAL_SAMPLES = 2000
+
 
 class DraftPredictor:
     """
@@ -47,8 +161,13 @@ class DraftPredictor:
 
     def __init__(self):
         self.model = None
-        self.scaler = StandardScaler()
-        self.feature_columns = []
+        self.fast_predictor = None
+        # copy=False: train() scales its own float32 copies in place
+        self.scaler = StandardScaler(copy=False)
+        self.feature_columns = ()
+        self._champion_columns = ({}, {})
+        self._mean = None
+        self._inv_scale = None
         self.metadata = {}
 
     def load_prepared_data(self, data_dir: str = 'data/prepared') -> tuple:
@@ -60,6 +179,8 @@ class DraftPredictor:
 
         Returns:
             tuple: (X_train, y_train), (X_val, y_val), (X_test, y_test)
+                   with X as float32 arrays (columns in self.feature_columns)
+                   and y as label arrays
         """
         print(f"Loading prepared data from {data_dir}/...")
 
@@ -72,17 +193,16 @@ class DraftPredictor:
             print(f"  Features: {self.metadata.get('n_features', 'unknown')}")
             print(f"  Train samples: {self.metadata.get('n_train', 'unknown')}")
 
-        # Load data splits
-        X_train = pd.read_parquet(os.path.join(data_dir, 'X_train.parquet'))
-        y_train = pd.read_parquet(os.path.join(data_dir, 'y_train.parquet'))['y_train']
+        # Load data splits, reading only the feature / target columns
+        features = list(self.feature_columns) or None
+        X_train, self.feature_columns = _read_matrix(os.path.join(data_dir, 'X_train.parquet'), features)
+        y_train = _read_parquet(os.path.join(data_dir, 'y_train.parquet'), ['y_train']).column(0).to_numpy()
 
-        X_val = pd.read_parquet(os.path.join(data_dir, 'X_val.parquet'))
-        y_val = pd.read_parquet(os.path.join(data_dir, 'y_val.parquet'))['y_val']
+        X_val, _ = _read_matrix(os.path.join(data_dir, 'X_val.parquet'), self.feature_columns)
+        y_val = _read_parquet(os.path.join(data_dir, 'y_val.parquet'), ['y_val']).column(0).to_numpy()
 
-        X_test = pd.read_parquet(os.path.join(data_dir, 'X_test.parquet'))
-        y_test = pd.read_parquet(os.path.join(data_dir, 'y_test.parquet'))['y_test']
-
-        self.feature_columns = list(X_train.columns)
+        X_test, _ = _read_matrix(os.path.join(data_dir, 'X_test.parquet'), self.feature_columns)
+        y_test = _read_parquet(os.path.join(data_dir, 'y_test.parquet'), ['y_test']).column(0).to_numpy()
 
         print(f"  Loaded: Train={len(X_train)}, Val={len(X_val)}, Test={len(X_test)}")
         print(f"  Win rate: {y_train.mean():.1%} (train), {y_test.mean():.1%} (test)")
@@ -101,63 +221,69 @@ class DraftPredictor:
         """
         print("Preparing features from CSV data...")
 
-        features = []
-        targets = []
-
-        for _, row in data.iterrows():
-            try:
-                if pd.isna(row.get('team_100_win')):
-                    continue
-
-                feature_dict = {}
-
-                # Basic match info
-                feature_dict['gameDuration'] = row.get('gameDuration', 0)
-
-                # Team composition features
-                for team in ['team_100', 'team_200']:
-                    for position in ['top', 'jungle', 'mid', 'adc', 'support']:
-                        champ_id = row.get(f'{team}_{position}_championId', 0)
-                        feature_dict[f'{team}_{position}_champion'] = champ_id
-
-                        feature_dict[f'{team}_{position}_kills'] = row.get(f'{team}_{position}_kills', 0)
-                        feature_dict[f'{team}_{position}_goldEarned'] = row.get(f'{team}_{position}_goldEarned', 0)
-                        feature_dict[f'{team}_{position}_totalMinionsKilled'] = row.get(f'{team}_{position}_totalMinionsKilled', 0)
-                        feature_dict[f'{team}_{position}_visionScore'] = row.get(f'{team}_{position}_visionScore', 0)
-                        feature_dict[f'{team}_{position}_kda'] = row.get(f'{team}_{position}_kda', 0)
-
-                # Team-level features
-                for team in ['team_100', 'team_200']:
-                    feature_dict[f'{team}_teamEarlySurrendered'] = 1 if row.get(f'{team}_teamEarlySurrendered', False) else 0
-                    feature_dict[f'{team}_first_blood'] = 1 if row.get(f'{team}_first_blood', False) else 0
-                    feature_dict[f'{team}_first_tower'] = 1 if row.get(f'{team}_first_tower', False) else 0
-                    feature_dict[f'{team}_first_dragon'] = 1 if row.get(f'{team}_first_dragon', False) else 0
-                    feature_dict[f'{team}_dragon_kills'] = row.get(f'{team}_dragon_kills', 0)
-                    feature_dict[f'{team}_baron_kills'] = row.get(f'{team}_baron_kills', 0)
-                    feature_dict[f'{team}_tower_kills'] = row.get(f'{team}_tower_kills', 0)
-
-                # Aggregate differences
-                team_100_gold = sum([row.get(f'team_100_{pos}_goldEarned', 0) or 0 for pos in ['top', 'jungle', 'mid', 'adc', 'support']])
-                team_200_gold = sum([row.get(f'team_200_{pos}_goldEarned', 0) or 0 for pos in ['top', 'jungle', 'mid', 'adc', 'support']])
-                feature_dict['gold_difference'] = team_100_gold - team_200_gold
-
-                features.append(feature_dict)
-                targets.append(1 if row['team_100_win'] else 0)
-
-            except Exception as e:
-                continue
-
-        X = pd.DataFrame(features)
-        y = np.array(targets)
-
-        self.feature_columns = list(X.columns)
+        if 'team_100_win' not in data:
+            data = data.assign(team_100_win=None)
+        data = data[data['team_100_win'].notna()]
+        teams = ['team_100', 'team_200']
+        positions = ['top', 'jungle', 'mid', 'adc', 'support']
+
+        # (source column, feature name) in feature order; the champion id
+        # column is exposed as {team}_{position}_champion
+        player_columns = []
+        for team in teams:
+            for position in positions:
+                prefix = f'{team}_{position}'
+                player_columns.append((f'{prefix}_championId', f'{prefix}_champion'))
+                player_columns.extend(
+                    (f'{prefix}_{stat}', f'{prefix}_{stat}')
+                    for stat in ['kills', 'goldEarned', 'totalMinionsKilled', 'visionScore', 'kda']
+                )
+        flag_stats = ['teamEarlySurrendered', 'first_blood', 'first_tower', 'first_dragon']
+        count_stats = ['dragon_kills', 'baron_kills', 'tower_kills']
+        team_columns = [f'{team}_{stat}' for team in teams for stat in flag_stats + count_stats]
+        flag_columns = [f'{team}_{stat}' for team in teams for stat in flag_stats]
+
+        # Missing columns / values become 0
+        source = ['gameDuration'] + [column for column, _ in player_columns]
+        X = data.reindex(columns=source).fillna(0)
+        X.columns = ['gameDuration'] + [name for _, name in player_columns]
+
+        # Flags are truthiness tests: a missing column is 0, but a NaN value
+        # (truthy) is 1
+        team_features = data.reindex(columns=team_columns)
+        present_flags = [column for column in flag_columns if column in data]
+        team_features[present_flags] = team_features[present_flags].fillna(True)
+        team_features[flag_columns] = team_features[flag_columns].fillna(False).astype(bool).astype(np.int8)
+        X = pd.concat([X, team_features.fillna(0)], axis=1)
+
+        # Aggregate differences (one NumPy reduction per team); a NaN gold
+        # value makes the whole difference unknown, i.e. 0
+        gold_columns = {team: [f'{team}_{position}_goldEarned' for position in positions] for team in teams}
+        gold = {team: X[columns].to_numpy(np.int32).sum(axis=1) for team, columns in gold_columns.items()}
+        gold_known = (
+            data.reindex(columns=gold_columns['team_100'] + gold_columns['team_200'], fill_value=0)
+            .notna().all(axis=1).to_numpy()
+        )
+        X['gold_difference'] = np.where(gold_known, gold['team_100'] - gold['team_200'], 0)
+
+        dtypes = {}
+        for column in X.columns:
+            for suffix, dtype in CSV_FEATURE_DTYPES:
+                if column.endswith(suffix):
+                    dtypes[column] = dtype
+                    break
+        X = X.astype(dtypes).reset_index(drop=True)
+        y = data['team_100_win'].astype(bool).astype(np.int8).to_numpy()
+
+        self.feature_columns = tuple(X.columns)
 
         print(f"Prepared {len(X)} samples with {len(X.columns)} features")
         print(f"Team 100 win rate: {np.mean(y):.1%}")
 
         return X, y
 
-    def train(self, train_data: tuple, val_data: tuple = None, test_data: tuple = None) -> bool:
+    def train(self, train_data: tuple, val_data: tuple = None, test_data: tuple = None,
+              cv: bool = None) -> bool:
         """
         Train the machine learning model.
 
@@ -165,6 +291,10 @@ class DraftPredictor:
             train_data: (X_train, y_train) tuple
             val_data: Optional (X_val, y_val) for validation
             test_data: Optional (X_test, y_test) for final evaluation
+            cv: Cross-validate each model on the training set. The best model is
+                picked on validation accuracy either way, so by default (None)
+                CV only runs while the validation set has fewer than
+                CV_MAX_VAL_SAMPLES rows.
 
         Returns:
             bool: True if training successful
@@ -176,7 +306,7 @@ class DraftPredictor:
         X_train, y_train = train_data
 
         # Handle missing values
-        X_train = X_train.fillna(0)
+        X_train = _as_matrix(X_train)
 
         if len(X_train) < 20:
             print(f"Warning: Only {len(X_train)} samples. Need more data for reliable training.")
@@ -185,28 +315,32 @@ class DraftPredictor:
         # Use validation set if provided, otherwise split from train
         if val_data:
             X_val, y_val = val_data
-            X_val = X_val.fillna(0)
+            X_val = _as_matrix(X_val)
         else:
             X_train, X_val, y_train, y_val = train_test_split(
                 X_train, y_train, test_size=0.15, random_state=42, stratify=y_train
             )
 
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_val_scaled = self.scaler.transform(X_val)
+        # Scale features once; every fit / CV fold below shares these
+        # contiguous float32 buffers
+        X_train_scaled = np.ascontiguousarray(self.scaler.fit_transform(X_train), dtype=np.float32)
+        X_val_scaled = np.ascontiguousarray(self.scaler.transform(X_val), dtype=np.float32)
+        y_train = np.asarray(y_train)
+        y_val = np.asarray(y_val)
 
-        # Models to try
+        # Models to try; they are fitted in parallel, so each gets a third of the cores
+        jobs_per_model = max(1, (os.cpu_count() or 1) // 3)
         models = {
             'RandomForest': RandomForestClassifier(
                 n_estimators=200, max_depth=12, min_samples_split=5,
-                random_state=42, n_jobs=-1
+                random_state=42, n_jobs=jobs_per_model
             ),
-            'GradientBoosting': GradientBoostingClassifier(
-                n_estimators=150, max_depth=6, learning_rate=0.1,
+            'HistGradientBoosting': HistGradientBoostingClassifier(
+                max_iter=150, max_depth=6, learning_rate=0.1,
                 random_state=42
             ),
             'LogisticRegression': LogisticRegression(
-                random_state=42, max_iter=1000, C=1.0
+                solver='lbfgs', random_state=42, max_iter=1000, C=1.0
             )
         }
 
@@ -216,26 +350,28 @@ class DraftPredictor:
         print(f"\nTraining on {len(X_train)} samples, validating on {len(X_val)} samples...")
         print("-" * 40)
 
-        for name, model in models.items():
-            # Train
-            model.fit(X_train_scaled, y_train)
-
-            # Validation score
-            val_score = model.score(X_val_scaled, y_val)
-
-            # Cross-validation on training data
-            cv_folds = min(5, len(X_train) // 10)
-            if cv_folds >= 2:
-                cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=cv_folds)
-                cv_mean = cv_scores.mean()
-                cv_std = cv_scores.std()
-            else:
-                cv_mean = val_score
-                cv_std = 0
-
+        # Same CV splits for every model, so their scores are comparable
+        if cv is None:
+            cv = len(X_val) < CV_MAX_VAL_SAMPLES
+        cv_folds = min(5, len(X_train) // 10) if cv else 0
+        folds = []
+        if cv_folds >= 2:
+            skf = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+            folds = list(skf.split(X_train_scaled, y_train))
+
+        # The scaled matrices are above joblib's max_nbytes, so they are dumped
+        # to one read-only memmap that all model workers share
+        results = Parallel(n_jobs=len(models), backend='loky', mmap_mode='r')(
+            delayed(_fit_and_score)(name, model, X_train_scaled, y_train, X_val_scaled, y_val,
+                                    folds, jobs_per_model)
+            for name, model in models.items()
+        )
+
+        for name, model, val_score, cv_mean, cv_std in results:
             print(f"\n{name}:")
             print(f"  Validation accuracy: {val_score:.3f}")
-            print(f"  CV accuracy: {cv_mean:.3f} (+/- {cv_std * 2:.3f})")
+            if folds:
+                print(f"  CV accuracy: {cv_mean:.3f} (+/- {cv_std * 2:.3f})")
 
             if val_score > best_val_score:
                 best_val_score = val_score
@@ -244,14 +380,15 @@ class DraftPredictor:
 
         print("\n" + "-" * 40)
         print(f"Best Model: {best_model_name} (validation accuracy: {best_val_score:.3f})")
+        self._prepare_inference()
 
         # Final evaluation on test set if provided
         if test_data:
             X_test, y_test = test_data
-            X_test = X_test.fillna(0)
-            X_test_scaled = self.scaler.transform(X_test)
+            X_test = _as_matrix(X_test)
+            X_test_scaled = np.ascontiguousarray(self.scaler.transform(X_test), dtype=np.float32)
 
-            y_pred = self.model.predict(X_test_scaled)
+            y_pred = self.model.classes_[self._predict_proba(X_test_scaled).argmax(axis=1)]
             test_accuracy = accuracy_score(y_test, y_pred)
 
             print(f"\nTest Set Performance:")
@@ -261,16 +398,86 @@ class DraftPredictor:
 
         # Feature importance
         if hasattr(self.model, 'feature_importances_'):
-            importance_df = pd.DataFrame({
-                'feature': self.feature_columns,
-                'importance': self.model.feature_importances_
-            }).sort_values('importance', ascending=False)
+            importances = self.model.feature_importances_
+            k = min(15, len(importances))
+            top = np.argpartition(importances, -k)[-k:]
+            top = top[np.argsort(-importances[top], kind='stable')]
 
             print("\nTop 15 Most Important Features:")
-            print(importance_df.head(15).to_string(index=False))
+            for i in top:
+                print(f"  {self.feature_columns[i]:40s} {importances[i]:.4f}")
 
         return True
 
+    def _prepare_inference(self):
+        """Cache what prediction needs once a model is trained or loaded"""
+        # Per team ({position: column index}) of the champion features, so
+        # building a prediction row needs no feature-name formatting
+        feature_index = {name: i for i, name in enumerate(self.feature_columns)}
+        self._champion_columns = tuple(
+            {
+                name[len(team) + 1:-len('_champion')]: i
+                for name, i in feature_index.items()
+                if name.startswith(f'{team}_') and name.endswith('_champion')
+            }
+            for team in ('team_100', 'team_200')
+        )
+        # Standardize inline as (x - mean) * (1 / scale), skipping
+        # StandardScaler.transform's per-call validation
+        self._mean = self.scaler.mean_.astype(np.float32)
+        self._inv_scale = (1.0 / self.scaler.scale_).astype(np.float32)
+        self._compile_model()
+
+    def _compile_model(self):
+        """
+        Import a tree ensemble model into treelite (when installed) so single
+        draft predictions run through its native predictor instead of
+        sklearn's per-estimator Python loop. Other models keep using sklearn.
+        """
+        self.fast_predictor = None
+        if treelite is None or not isinstance(
+                self.model, (RandomForestClassifier, HistGradientBoostingClassifier)):
+            return
+        try:
+            self.fast_predictor = treelite.sklearn.import_model(self.model)
+        except Exception as e:
+            print(f"treelite import failed, using sklearn inference: {e}")
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities [P(team 200 win), P(team 100 win)] per row"""
+        if self.fast_predictor is not None:
+            out = np.asarray(treelite.gtil.predict(self.fast_predictor, X)).reshape(len(X), -1)
+            # Binary boosting models output P(class 1) only
+            team_100 = out[:, -1]
+            return np.column_stack([1 - team_100, team_100])
+        return self.model.predict_proba(X)
+
+    def _scaled_proba(self, X_pred: np.ndarray) -> np.ndarray:
+        """Standardize raw prediction rows in place and return _predict_proba of them"""
+        X_pred -= self._mean
+        X_pred *= self._inv_scale
+        return self._predict_proba(X_pred)
+
+    def predict_proba_batch(self, champion_ids) -> np.ndarray:
+        """
+        Win probabilities for many drafts given as an (N, 10) array of
+        champion ids, in DRAFT_SLOTS order, with one column copy per slot
+        and a single scale + predict pass (no per-draft dicts).
+
+        Returns:
+            (N, 2) array of [P(team 200 win), P(team 100 win)] per draft
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+
+        champion_ids = np.asarray(champion_ids)
+        X_pred = np.zeros((len(champion_ids), len(self.feature_columns)), dtype=np.float32)
+        for slot, (team, pos) in enumerate(DRAFT_SLOTS):
+            col = self._champion_columns[team].get(pos)
+            if col is not None:
+                X_pred[:, col] = champion_ids[:, slot]
+        return self._scaled_proba(X_pred)
+
     def predict_match(self, team_100_comp: dict, team_200_comp: dict) -> dict:
         """
         Predict outcome for new team compositions.
@@ -282,36 +489,44 @@ class DraftPredictor:
         Returns:
             dict with prediction results
         """
-        if self.model is None:
-            raise ValueError("Model not trained yet!")
+        return self.predict_matches([(team_100_comp, team_200_comp)])[0]
 
-        # Create feature vector
-        features = {}
-
-        for pos, champ_id in team_100_comp.items():
-            features[f'team_100_{pos}_champion'] = champ_id
-
-        for pos, champ_id in team_200_comp.items():
-            features[f'team_200_{pos}_champion'] = champ_id
-
-        # Fill missing features with 0
-        for feature in self.feature_columns:
-            if feature not in features:
-                features[feature] = 0
+    def predict_matches(self, compositions: list) -> list:
+        """
+        Predict outcomes for many drafts at once (e.g. candidate picks of a
+        draft search) with a single scale + predict pass.
 
-        # Predict
-        X_pred = pd.DataFrame([features])[self.feature_columns]
-        X_pred_scaled = self.scaler.transform(X_pred)
+        Args:
+            compositions: List of (team_100_comp, team_200_comp) tuples, each
+                          comp being {'top': champion_id, 'jungle': champion_id, ...}
 
-        prediction = self.model.predict(X_pred_scaled)[0]
-        probability = self.model.predict_proba(X_pred_scaled)[0]
+        Returns:
+            List of prediction result dicts (see predict_match)
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
 
-        return {
-            'winner': 'Team 100 (Blue)' if prediction == 1 else 'Team 200 (Red)',
-            'team_100_win_probability': float(probability[1]),
-            'team_200_win_probability': float(probability[0]),
-            'confidence': float(max(probability))
-        }
+        # Champion ids go into their feature columns, everything else is 0
+        X_pred = np.zeros((len(compositions), len(self.feature_columns)), dtype=np.float32)
+        for row, comps in enumerate(compositions):
+            for columns, comp in zip(self._champion_columns, comps):
+                for pos, champ_id in comp.items():
+                    col = columns.get(pos)
+                    if col is not None:
+                        X_pred[row, col] = champ_id
+
+        probabilities = self._scaled_proba(X_pred)
+        predictions = self.model.classes_[probabilities.argmax(axis=1)]
+
+        return [
+            {
+                'winner': 'Team 100 (Blue)' if prediction == 1 else 'Team 200 (Red)',
+                'team_100_win_probability': float(probability[1]),
+                'team_200_win_probability': float(probability[0]),
+                'confidence': float(max(probability))
+            }
+            for prediction, probability in zip(predictions, probabilities)
+        ]
 
     def save_model(self, filepath: str = 'draft_predictor_model.pkl'):
         """Save the trained model"""
@@ -324,17 +539,21 @@ class DraftPredictor:
             'scaler': self.scaler,
             'feature_columns': self.feature_columns,
             'metadata': self.metadata
-        }, filepath)
+        }, filepath, compress=MODEL_COMPRESSION, protocol=5)
         print(f"Model saved to {filepath}")
 
     def load_model(self, filepath: str = 'draft_predictor_model.pkl') -> bool:
-        """Load a trained model"""
+        """
+        Load a trained model. Uncompressed (older) model files are memory-mapped
+        so tree arrays are paged in on demand; compressed ones load normally.
+        """
         try:
-            saved_data = joblib.load(filepath)
+            saved_data = joblib.load(filepath, mmap_mode='r')
             self.model = saved_data['model']
             self.scaler = saved_data['scaler']
-            self.feature_columns = saved_data.get('feature_columns', [])
+            self.feature_columns = tuple(saved_data.get('feature_columns', ()))
             self.metadata = saved_data.get('metadata', {})
+            self._prepare_inference()
             print(f"Model loaded from {filepath}")
             return True
         except FileNotFoundError:
@@ -350,6 +569,9 @@ def main():
                        help='Path to CSV file (legacy mode)')
     parser.add_argument('--model-output', default='models/draft_predictor_model.pkl',
                        help='Output path for trained model')
+    parser.add_argument('--cv', action=argparse.BooleanOptionalAction, default=None,
+                       help=f'Cross-validate each model (default: only if the validation set has '
+                            f'fewer than {CV_MAX_VAL_SAMPLES} samples)')
 
     args = parser.parse_args()
 
@@ -360,6 +582,8 @@ def main():
     print("=" * 60)
     print("League of Legends Draft AI Predictor")
     print("=" * 60)
+    if SKLEARNEX_ENABLED:
+        print("scikit-learn-intelex acceleration enabled")
 
     predictor = DraftPredictor()
 
@@ -382,7 +606,7 @@ def main():
             return
 
         # Train with legacy data
-        success = predictor.train((X, y))
+        success = predictor.train((X, y), cv=args.cv)
 
     else:
         # Parquet mode (recommended)
@@ -395,7 +619,7 @@ def main():
             return
 
         train_data, val_data, test_data = predictor.load_prepared_data(args.data_dir)
-        success = predictor.train(train_data, val_data, test_data)
+        success = predictor.train(train_data, val_data, test_data, cv=args.cv)
 
     if success:
         predictor.save_model(args.model_output)
@@ -1,7 +1,118 @@
+import argparse
 import json
-import csv
+import re
+import numpy as np
 import pandas as pd
-from collections import defaultdict
+from multiprocessing import Pool
+
+# orjson (SIMD-accelerated) parses the large match blobs several times faster
+# than the stdlib; its JSONDecodeError subclasses json.JSONDecodeError
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# polars writes CSV multithreaded from Arrow buffers, several times faster than
+# DataFrame.to_csv on these wide frames (booleans are written as true/false)
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Columns of the draft-focused dataset: any column name containing one of these
+DRAFT_COLUMNS_RE = re.compile(
+    "championId|championName|ban|win|matchId|gameDuration|first_|_kills|goldEarned|"
+    "totalMinionsKilled|visionScore|enemyChampionImmobilizations|teamEarlySurrendered|kda"
+)
+
+# Matches per chunk handed to an extract_detailed_dataset_from_texts worker
+EXTRACT_CHUNK_MATCHES = 500
+
+# Field tables of extract_detailed_dataset, in extract_detailed_match_data's column order
+POSITION_MAP = {
+    "TOP": "top",
+    "JUNGLE": "jungle",
+    "MIDDLE": "mid",
+    "BOTTOM": "adc",
+    "UTILITY": "support"
+}
+
+MATCH_FIELDS = ("gameCreation", "gameDuration", "gameVersion", "queueId", "mapId", "gameMode", "gameType")
+
+# (column suffix, objective) pairs of first_* flags, then objectives with a kill count
+TEAM_FIRST_OBJECTIVES = (
+    ("first_blood", "champion"), ("first_tower", "tower"), ("first_inhibitor", "inhibitor"),
+    ("first_dragon", "dragon"), ("first_riftHerald", "riftHerald"), ("first_baron", "baron")
+)
+TEAM_KILL_OBJECTIVES = ("dragon", "baron", "tower", "inhibitor", "riftHerald")
+
+PLAYER_FIELDS = (
+    "championId", "championName", "champLevel", "summoner1Id", "summoner2Id",
+    "kills", "deaths", "assists",
+    "totalDamageDealt", "totalDamageDealtToChampions", "totalDamageTaken",
+    "trueDamageDealt", "physicalDamageDealt", "magicDamageDealt",
+    "goldEarned", "totalMinionsKilled", "neutralMinionsKilled",
+    "visionScore", "wardsPlaced", "wardsKilled", "visionWardsBoughtInGame",
+    "enemyChampionImmobilizations",
+    *(f"item{i}" for i in range(7))
+)
+PLAYER_EXTRA_FIELDS = (
+    "firstBloodKill", "firstTowerKill", "turretKills", "inhibitorKills",
+    "largestKillingSpree", "largestMultiKill", "killingSprees",
+    "doubleKills", "tripleKills", "quadraKills", "pentaKills"
+)
+CHALLENGE_FIELDS = (
+    "damagePerMinute", "damageTakenOnTeamPercentage", "goldPerMinute", "teamDamagePercentage",
+    "killParticipation", "kda", "laneMinionsFirst10Minutes", "turretPlatesTaken", "soloKills"
+)
+
+# Raw record fields read by extract_detailed_dataset (see _records_frame)
+TEAM_RECORD_FIELDS = ("teamId", "win", "teamEarlySurrendered", "objectives", "bans")
+BAN_RECORD_FIELDS = ("championId", "pickTurn")
+PARTICIPANT_RECORD_FIELDS = ("teamId", "teamPosition", "perks", "challenges", *PLAYER_FIELDS, *PLAYER_EXTRA_FIELDS)
+
+
+def _team_keys(team_id):
+    """Output column names of a team's fields (built once per team id)"""
+    keys = _TEAM_KEYS.get(team_id)
+    if keys is None:
+        prefix = f"team_{team_id}"
+        keys = {column: f"{prefix}_{column}" for column, _ in TEAM_FIRST_OBJECTIVES}
+        keys.update({objective: f"{prefix}_{objective}_kills" for objective in TEAM_KILL_OBJECTIVES})
+        keys.update(win=f"{prefix}_win", teamEarlySurrendered=f"{prefix}_teamEarlySurrendered",
+                    prefix=prefix,
+                    bans=[(f"{prefix}_ban_{i}_championId", f"{prefix}_ban_{i}_pickTurn") for i in range(1, 6)])
+        _TEAM_KEYS[team_id] = keys
+    return keys
+
+
+def _player_keys(team_id, position):
+    """Output column names of a player's fields (built once per team id / position)"""
+    keys = _PLAYER_KEYS.get((team_id, position))
+    if keys is None:
+        prefix = f"team_{team_id}_{position}"
+        keys = {field: f"{prefix}_{field}"
+                for field in (*PLAYER_FIELDS, *PLAYER_EXTRA_FIELDS, *CHALLENGE_FIELDS,
+                              "primaryStyle", "secondaryStyle")}
+        keys.update(prefix=prefix,
+                    primaryPerks=[f"{prefix}_primaryPerk{i}" for i in range(4)],
+                    secondaryPerks=[f"{prefix}_secondaryPerk{i}" for i in range(2)])
+        _PLAYER_KEYS[(team_id, position)] = keys
+    return keys
+
+
+_TEAM_KEYS = {}
+_PLAYER_KEYS = {}
+for _team_id in (100, 200):
+    _team_keys(_team_id)
+    for _position in POSITION_MAP.values():
+        _player_keys(_team_id, _position)
+
+
+def _numbered_key(keys, i, prefix, name):
+    """keys[i], or the f"{prefix}_{name}{i}" column past the precomputed ones"""
+    return keys[i] if i < len(keys) else f"{prefix}_{name}{i}"
+
 
 def extract_detailed_match_data(match_data):
     """
@@ -12,6 +123,9 @@ def extract_detailed_match_data(match_data):
     - Gold/XP differences
     - Item builds
     - Runes
+
+    Column names come from the precomputed _team_keys / _player_keys tables,
+    so no key is formatted per match.
     """
     info = match_data.get("info", {})
     metadata = match_data.get("metadata", {})
@@ -19,103 +133,49 @@ def extract_detailed_match_data(match_data):
     teams = info.get("teams", [])
     
     # Basic match info
-    match_info = {
-        "matchId": metadata.get("matchId"),
-        "gameCreation": info.get("gameCreation"),
-        "gameDuration": info.get("gameDuration"),
-        "gameVersion": info.get("gameVersion"),
-        "queueId": info.get("queueId"),
-        "mapId": info.get("mapId"),
-        "gameMode": info.get("gameMode"),
-        "gameType": info.get("gameType")
-    }
+    match_info = {"matchId": metadata.get("matchId")}
+    for field in MATCH_FIELDS:
+        match_info[field] = info.get(field)
     
     # Team objectives and stats
     for team in teams:
-        team_id = team.get("teamId")
-        prefix = f"team_{team_id}"
+        keys = _team_keys(team.get("teamId"))
         
         # Objectives
         objectives = team.get("objectives", {})
-        match_info[f"{prefix}_first_blood"] = objectives.get("champion", {}).get("first", False)
-        match_info[f"{prefix}_first_tower"] = objectives.get("tower", {}).get("first", False)
-        match_info[f"{prefix}_first_inhibitor"] = objectives.get("inhibitor", {}).get("first", False)
-        match_info[f"{prefix}_first_dragon"] = objectives.get("dragon", {}).get("first", False)
-        match_info[f"{prefix}_first_riftHerald"] = objectives.get("riftHerald", {}).get("first", False)
-        match_info[f"{prefix}_first_baron"] = objectives.get("baron", {}).get("first", False)
+        for column, objective in TEAM_FIRST_OBJECTIVES:
+            match_info[keys[column]] = objectives.get(objective, {}).get("first", False)
         
         # Kill counts
-        match_info[f"{prefix}_dragon_kills"] = objectives.get("dragon", {}).get("kills", 0)
-        match_info[f"{prefix}_baron_kills"] = objectives.get("baron", {}).get("kills", 0)
-        match_info[f"{prefix}_tower_kills"] = objectives.get("tower", {}).get("kills", 0)
-        match_info[f"{prefix}_inhibitor_kills"] = objectives.get("inhibitor", {}).get("kills", 0)
-        match_info[f"{prefix}_riftHerald_kills"] = objectives.get("riftHerald", {}).get("kills", 0)
+        for objective in TEAM_KILL_OBJECTIVES:
+            match_info[keys[objective]] = objectives.get(objective, {}).get("kills", 0)
         
         # Bans
-        bans = team.get("bans", [])
-        for i, ban in enumerate(bans):
-            match_info[f"{prefix}_ban_{i+1}_championId"] = ban.get("championId")
-            match_info[f"{prefix}_ban_{i+1}_pickTurn"] = ban.get("pickTurn")
+        ban_keys = keys["bans"]
+        for i, ban in enumerate(team.get("bans", [])):
+            if i < len(ban_keys):
+                champion_key, pick_turn_key = ban_keys[i]
+            else:
+                champion_key = f"{keys['prefix']}_ban_{i+1}_championId"
+                pick_turn_key = f"{keys['prefix']}_ban_{i+1}_pickTurn"
+            match_info[champion_key] = ban.get("championId")
+            match_info[pick_turn_key] = ban.get("pickTurn")
         
         # Win/loss
-        match_info[f"{prefix}_win"] = team.get("win")
+        match_info[keys["win"]] = team.get("win")
         
         # Early surrender
-        match_info[f"{prefix}_teamEarlySurrendered"] = team.get("teamEarlySurrendered", False)
+        match_info[keys["teamEarlySurrendered"]] = team.get("teamEarlySurrendered", False)
     
     # Individual player stats
-    position_map = {
-        "TOP": "top",
-        "JUNGLE": "jungle", 
-        "MIDDLE": "mid",
-        "BOTTOM": "adc",
-        "UTILITY": "support"
-    }
-    
     for participant in participants:
-        team_id = participant.get("teamId")
-        position = position_map.get(participant.get("teamPosition"), participant.get("teamPosition"))
-        prefix = f"team_{team_id}_{position}"
-        
-        # Champion info
-        match_info[f"{prefix}_championId"] = participant.get("championId")
-        match_info[f"{prefix}_championName"] = participant.get("championName")
-        match_info[f"{prefix}_champLevel"] = participant.get("champLevel")
-        
-        # Summoner spells
-        match_info[f"{prefix}_summoner1Id"] = participant.get("summoner1Id")
-        match_info[f"{prefix}_summoner2Id"] = participant.get("summoner2Id")
-        
-        # KDA
-        match_info[f"{prefix}_kills"] = participant.get("kills")
-        match_info[f"{prefix}_deaths"] = participant.get("deaths")
-        match_info[f"{prefix}_assists"] = participant.get("assists")
-        
-        # Damage stats
-        match_info[f"{prefix}_totalDamageDealt"] = participant.get("totalDamageDealt")
-        match_info[f"{prefix}_totalDamageDealtToChampions"] = participant.get("totalDamageDealtToChampions")
-        match_info[f"{prefix}_totalDamageTaken"] = participant.get("totalDamageTaken")
-        match_info[f"{prefix}_trueDamageDealt"] = participant.get("trueDamageDealt")
-        match_info[f"{prefix}_physicalDamageDealt"] = participant.get("physicalDamageDealt")
-        match_info[f"{prefix}_magicDamageDealt"] = participant.get("magicDamageDealt")
-        
-        # Gold and CS
-        match_info[f"{prefix}_goldEarned"] = participant.get("goldEarned")
-        match_info[f"{prefix}_totalMinionsKilled"] = participant.get("totalMinionsKilled")
-        match_info[f"{prefix}_neutralMinionsKilled"] = participant.get("neutralMinionsKilled")
-        
-        # Vision
-        match_info[f"{prefix}_visionScore"] = participant.get("visionScore")
-        match_info[f"{prefix}_wardsPlaced"] = participant.get("wardsPlaced")
-        match_info[f"{prefix}_wardsKilled"] = participant.get("wardsKilled")
-        match_info[f"{prefix}_visionWardsBoughtInGame"] = participant.get("visionWardsBoughtInGame")
+        team_position = participant.get("teamPosition")
+        keys = _player_keys(participant.get("teamId"), POSITION_MAP.get(team_position, team_position))
         
-        # Crowd control
-        match_info[f"{prefix}_enemyChampionImmobilizations"] = participant.get("enemyChampionImmobilizations", 0)
-        
-        # Items
-        for i in range(7):
-            match_info[f"{prefix}_item{i}"] = participant.get(f"item{i}")
+        # Champion, spells, KDA, damage, gold/CS, vision, CC, items
+        for field in PLAYER_FIELDS:
+            match_info[keys[field]] = participant.get(field)
+        match_info[keys["enemyChampionImmobilizations"]] = participant.get("enemyChampionImmobilizations", 0)
         
         # Runes
         perks = participant.get("perks", {})
@@ -124,89 +184,381 @@ def extract_detailed_match_data(match_data):
         if len(styles) > 0:
             # Primary rune tree
             primary = styles[0]
-            match_info[f"{prefix}_primaryStyle"] = primary.get("style")
-            primary_perks = primary.get("selections", [])
-            for i, perk in enumerate(primary_perks):
-                match_info[f"{prefix}_primaryPerk{i}"] = perk.get("perk")
+            match_info[keys["primaryStyle"]] = primary.get("style")
+            for i, perk in enumerate(primary.get("selections", [])):
+                match_info[_numbered_key(keys["primaryPerks"], i, keys["prefix"], "primaryPerk")] = perk.get("perk")
             
             # Secondary rune tree
             if len(styles) > 1:
                 secondary = styles[1]
-                match_info[f"{prefix}_secondaryStyle"] = secondary.get("style")
-                secondary_perks = secondary.get("selections", [])
-                for i, perk in enumerate(secondary_perks):
-                    match_info[f"{prefix}_secondaryPerk{i}"] = perk.get("perk")
+                match_info[keys["secondaryStyle"]] = secondary.get("style")
+                for i, perk in enumerate(secondary.get("selections", [])):
+                    match_info[_numbered_key(keys["secondaryPerks"], i, keys["prefix"], "secondaryPerk")] = perk.get("perk")
         
         # Additional stats
-        match_info[f"{prefix}_firstBloodKill"] = participant.get("firstBloodKill")
-        match_info[f"{prefix}_firstTowerKill"] = participant.get("firstTowerKill")
-        match_info[f"{prefix}_turretKills"] = participant.get("turretKills")
-        match_info[f"{prefix}_inhibitorKills"] = participant.get("inhibitorKills")
-        match_info[f"{prefix}_largestKillingSpree"] = participant.get("largestKillingSpree")
-        match_info[f"{prefix}_largestMultiKill"] = participant.get("largestMultiKill")
-        match_info[f"{prefix}_killingSprees"] = participant.get("killingSprees")
-        match_info[f"{prefix}_doubleKills"] = participant.get("doubleKills")
-        match_info[f"{prefix}_tripleKills"] = participant.get("tripleKills")
-        match_info[f"{prefix}_quadraKills"] = participant.get("quadraKills")
-        match_info[f"{prefix}_pentaKills"] = participant.get("pentaKills")
+        for field in PLAYER_EXTRA_FIELDS:
+            match_info[keys[field]] = participant.get(field)
         
         # Challenges (advanced metrics)
         challenges = participant.get("challenges", {})
-        match_info[f"{prefix}_damagePerMinute"] = challenges.get("damagePerMinute")
-        match_info[f"{prefix}_damageTakenOnTeamPercentage"] = challenges.get("damageTakenOnTeamPercentage")
-        match_info[f"{prefix}_goldPerMinute"] = challenges.get("goldPerMinute")
-        match_info[f"{prefix}_teamDamagePercentage"] = challenges.get("teamDamagePercentage")
-        match_info[f"{prefix}_killParticipation"] = challenges.get("killParticipation")
-        match_info[f"{prefix}_kda"] = challenges.get("kda")
-        match_info[f"{prefix}_laneMinionsFirst10Minutes"] = challenges.get("laneMinionsFirst10Minutes")
-        match_info[f"{prefix}_turretPlatesTaken"] = challenges.get("turretPlatesTaken")
-        match_info[f"{prefix}_soloKills"] = challenges.get("soloKills")
+        for field in CHALLENGE_FIELDS:
+            match_info[keys[field]] = challenges.get(field)
         
     return match_info
 
-def read_match_details_from_txt(filepath):
+
+def _records_frame(lists, fields):
     """
-    Read match details from the txt file
+    One row per record of a list of record lists (e.g. the teams of each
+    match), tagged with the index of its list as "_row". Only `fields` are
+    read, into columns in that order (missing -> NaN): the raw records carry
+    many more keys, which pandas would otherwise union and convert. Nested
+    dicts are kept as values (see _nested).
+    """
+    records = [record for items in lists for record in items]
+    df = pd.DataFrame(records, columns=list(fields)) if records else pd.DataFrame(columns=list(fields))
+    df["_row"] = np.repeat(np.arange(len(lists)), [len(items) for items in lists])
+    return df
+
+
+def _nested(df, column, fields):
+    """Fields of the dicts in df[column] as columns (missing dict / field -> NaN)"""
+    values = df[column] if column in df else [None] * len(df)
+    return pd.DataFrame([value if isinstance(value, dict) else {} for value in values],
+                        index=df.index, columns=list(fields))
+
+
+def _fill(series, default):
+    """Fill missing values with default, keeping integer columns integer"""
+    series = series.fillna(default).infer_objects()
+    if series.dtype.kind == "f" and len(series) and (series % 1 == 0).all():
+        series = series.astype("int64")
+    return series
+
+
+def _rune_columns(styles, index, name):
+    """Style id and selected perks of rune tree `index` for each participant's perks.styles"""
+    trees = [s[index] if isinstance(s, list) and len(s) > index else None for s in styles]
+    perks = pd.DataFrame(
+        [[perk.get("perk") for perk in tree.get("selections", [])] if tree else [] for tree in trees],
+        index=styles.index
+    )
+    perks.columns = [f"{name}Perk{i}" for i in perks.columns]
+    style = pd.Series([tree.get("style") if tree else None for tree in trees],
+                      index=styles.index, name=f"{name}Style")
+    return pd.concat([style, perks], axis=1)
+
+
+def _rune_order(columns, name):
+    """Style then perk columns of rune tree `name`, in perk order"""
+    perks = sorted(int(c[len(name) + 4:]) for c in columns if c.startswith(f"{name}Perk"))
+    return [f"{name}Style", *(f"{name}Perk{i}" for i in perks)]
+
+
+def _match_records(matches):
+    """
+    Flat record frames of a list of matches, the pure-Python half of
+    extract_detailed_dataset: "matches" (one row per match), "teams" (with
+    their objectives), "bans" and "participants" (with their stats). "_row"
+    is the index of the record's match, "_team" the index of a ban's team in
+    the teams frame.
+    """
+    infos = [match.get("info") or {} for match in matches]
+    records = {"matches": pd.DataFrame({
+        "matchId": [(match.get("metadata") or {}).get("matchId") for match in matches],
+        **{field: [info.get(field) for info in infos] for field in MATCH_FIELDS}
+    })}
+
+    # Teams: objectives, bans, result
+    team_lists = [info.get("teams") or [] for info in infos]
+    teams = _records_frame(team_lists, TEAM_RECORD_FIELDS)
+    objectives = _nested(teams, "objectives", {objective for _, objective in TEAM_FIRST_OBJECTIVES})
+    bans = _records_frame([team.get("bans") or [] for items in team_lists for team in items], BAN_RECORD_FIELDS)
+    bans = bans.rename(columns={"_row": "_team"})
+    bans["ban"] = bans.groupby("_team").cumcount() + 1
+    records["bans"] = bans[[c for c in ("_team", "ban", "championId", "pickTurn") if c in bans]]
+
+    teams = teams[[c for c in ("_row", "teamId", "win", "teamEarlySurrendered") if c in teams]].copy()
+    for objective in objectives.columns:
+        counts = _nested(objectives, objective, ["first", "kills"])
+        teams[f"_{objective}_first"] = counts["first"]
+        teams[f"_{objective}_kills"] = counts["kills"]
+    records["teams"] = teams
+
+    # Participants: stats keyed by team / position
+    participants = _records_frame([info.get("participants") or [] for info in infos], PARTICIPANT_RECORD_FIELDS)
+    participants = participants[participants["teamId"].notna()]
+    if len(participants):
+        position = participants["teamPosition"]
+        participants["_position"] = position.map(POSITION_MAP).fillna(position)
+
+        styles = _nested(participants, "perks", ["styles"])["styles"]
+        runes = pd.concat([_rune_columns(styles, 0, "primary"), _rune_columns(styles, 1, "secondary")], axis=1)
+        participants = pd.concat([
+            participants[["_row", "teamId", "_position"]],
+            participants[list(PLAYER_FIELDS)],
+            runes,
+            participants[list(PLAYER_EXTRA_FIELDS)],
+            _nested(participants, "challenges", CHALLENGE_FIELDS)
+        ], axis=1)
+
+        # Several players on one team / position (e.g. an empty teamPosition):
+        # as extract_detailed_match_data overwrites its keys, the last player
+        # wins, except that rune columns are only written by players that
+        # have those runes, so they keep the last non-null value
+        key = ["_row", "teamId", "_position"]
+        duplicated = participants.duplicated(key, keep=False)
+        if duplicated.any():
+            rune_columns = list(runes.columns)
+            participants.loc[duplicated, rune_columns] = (
+                participants.loc[duplicated].groupby(key, sort=False, dropna=False)[rune_columns].transform("last")
+            )
+            participants = participants.drop_duplicates(key, keep="last")
+            # The dropped players' missing runes turned the id columns to float
+            complete = [c for c in rune_columns if participants[c].dtype == "float64" and participants[c].notna().all()]
+            participants[complete] = participants[complete].astype(np.int64)
+    else:
+        participants = participants[["_row"]]
+    records["participants"] = participants
+    return records
+
+
+def _concat_records(chunks):
+    """_match_records of consecutive chunks of matches as one set of records"""
+    rows = teams = 0
+    for records in chunks:
+        records["teams"]["_row"] += rows
+        records["participants"]["_row"] += rows
+        records["bans"]["_team"] += teams
+        rows += len(records["matches"])
+        teams += len(records["teams"])
+    # A chunk whose values are all missing has object columns: infer the dtypes again
+    return {key: pd.concat([records[key] for records in chunks if len(records[key])] or [chunks[0][key]],
+                           ignore_index=True).infer_objects()
+            for key in chunks[0]}
+
+
+def _pivot_records(records):
+    """
+    Pivot _match_records frames into a wide row per match, with
+    extract_detailed_match_data's columns in its column order
+    """
+    rows = pd.RangeIndex(len(records["matches"]))
+    blocks = [records["matches"]]
+
+    teams, bans = records["teams"], records["bans"]
+    team_ids = sorted(teams["teamId"].dropna().unique()) if "teamId" in teams else []
+    for team_id in team_ids:
+        team = teams[teams["teamId"] == team_id].drop_duplicates("_row", keep="last")
+        prefix = f"team_{int(team_id)}"
+        block = {}
+        for column, objective in TEAM_FIRST_OBJECTIVES:
+            block[f"{prefix}_{column}"] = _fill(team[f"_{objective}_first"], False)
+        for objective in TEAM_KILL_OBJECTIVES:
+            block[f"{prefix}_{objective}_kills"] = _fill(team[f"_{objective}_kills"], 0)
+
+        team_bans = bans[bans["_team"].isin(team.index)]
+        if len(team_bans):
+            wide = team_bans.pivot(index="_team", columns="ban").reindex(team.index)
+            for ban in sorted(team_bans["ban"].unique()):
+                block[f"{prefix}_ban_{ban}_championId"] = wide[("championId", ban)] if "championId" in bans else None
+                block[f"{prefix}_ban_{ban}_pickTurn"] = wide[("pickTurn", ban)] if "pickTurn" in bans else None
+
+        block[f"{prefix}_win"] = team["win"] if "win" in team else None
+        block[f"{prefix}_teamEarlySurrendered"] = _fill(
+            team["teamEarlySurrendered"] if "teamEarlySurrendered" in team else pd.Series(index=team.index, dtype=object),
+            False)
+        blocks.append(pd.DataFrame(block, index=team.index).set_index(team["_row"]).reindex(rows))
+
+    # Participants: one block of stats per team / position
+    participants = records["participants"]
+    if "teamId" in participants:
+        stats = participants.reindex(columns=[
+            *PLAYER_FIELDS, *_rune_order(participants.columns, "primary"),
+            *_rune_order(participants.columns, "secondary"), *PLAYER_EXTRA_FIELDS, *CHALLENGE_FIELDS
+        ])
+        stats["enemyChampionImmobilizations"] = _fill(stats["enemyChampionImmobilizations"], 0)
+
+        positions = list(POSITION_MAP.values())
+        groups = participants.groupby(["teamId", "_position"], sort=False, dropna=False).groups
+        order = lambda key: (key[0], positions.index(key[1]) if key[1] in positions else len(positions))
+        for team_id, pos in sorted(groups, key=order):
+            index = groups[(team_id, pos)]
+            block = stats.loc[index]
+            # Rune columns only exist for players that had those runes
+            runes = [c for c in block.columns if c.startswith(("primary", "secondary"))]
+            block = block.drop(columns=[c for c in runes if block[c].isna().all()])
+            block = block.set_index(participants.loc[index, "_row"])
+            block.columns = [f"team_{int(team_id)}_{pos}_{column}" for column in block.columns]
+            blocks.append(block.reindex(rows))
+
+    df = pd.concat(blocks, axis=1)
+    # The draft columns (pick / ban ids) are small ints: keep the complete ones as int32
+    draft_ids = [c for c in df.columns if c.endswith(("_championId", "_pickTurn")) and df[c].dtype == "int64"]
+    if draft_ids:
+        df[draft_ids] = df[draft_ids].astype(np.int32)
+    return df
+
+
+def extract_detailed_dataset(matches):
+    """
+    Extract extract_detailed_match_data's columns for a list of matches at once.
+
+    Teams, bans and participants of all matches are loaded into one frame each
+    and pivoted into a wide row per match with column operations, instead of
+    writing every field of every match into a dict. Returns a DataFrame with
+    one row per match, in order.
+    """
+    if len(matches) == 0:
+        return pd.DataFrame()
+    return _pivot_records(_match_records(matches))
+
+
+def _extract_chunk_records(texts):
+    """Pool worker: parse a chunk of match JSON texts into _match_records frames"""
+    return _match_records(_parse_matches(texts))
+
+
+def extract_detailed_dataset_from_texts(texts, processes=None):
+    """
+    extract_detailed_dataset for raw match JSON texts (see read_match_texts).
+
+    Parsing and flattening, the CPU-bound part, run on chunks of
+    EXTRACT_CHUNK_MATCHES matches across `processes` worker processes
+    (default: one per core); only the final pivot runs in this process.
+    Workers return flat frames, which are much cheaper to pickle back than
+    the parsed match dicts.
     """
-    matches = []
-    current_match = ""
+    chunks = [texts[i:i + EXTRACT_CHUNK_MATCHES] for i in range(0, len(texts), EXTRACT_CHUNK_MATCHES)]
+    if len(chunks) > 1 and processes != 1:
+        with Pool(processes) as pool:
+            records = pool.map(_extract_chunk_records, chunks)
+    else:
+        records = [_extract_chunk_records(chunk) for chunk in chunks]
+
+    records = _concat_records(records) if records else None
+    if records is None or len(records["matches"]) == 0:
+        return pd.DataFrame()
+    return _pivot_records(records)
+
+
+def iter_match_texts(filepath):
+    """
+    Yield the raw JSON bytes of each match of a match details txt file, or of
+    a .jsonl file (one match per line, see write_match_texts_jsonl), holding
+    only the match being read in memory.
+
+    The file is scanned in binary: only the JSON payloads need decoding, and
+    the JSON parser does that itself.
+    """
+    if str(filepath).endswith(".jsonl"):
+        with open(filepath, 'rb') as f:
+            yield from (line for line in f if line.strip())
+        return
+    
+    current_match = []  # lines of the match being read, joined once at the end
     
-    with open(filepath, 'r', encoding='utf-8') as f:
+    with open(filepath, 'rb') as f:
         for line in f:
-            if line.startswith("=== Détails du match"):
-                if current_match:
-                    try:
-                        match_data = json.loads(current_match)
-                        matches.append(match_data)
-                    except json.JSONDecodeError:
-                        print(f"Error parsing match JSON")
-                current_match = ""
-            elif line.strip() and not line.startswith("==="):
-                current_match += line
+            if line.startswith(b"==="):
+                # "=== Détails du match" header, matched on its ASCII part so a
+                # mis-encoded "DÃ©tails" header still splits matches
+                if b"tails du match" in line:
+                    if current_match:
+                        yield b"".join(current_match)
+                    current_match = []
+            elif line.strip():
+                current_match.append(line)
     
     # Don't forget the last match
     if current_match:
+        yield b"".join(current_match)
+
+
+def read_match_texts(filepath):
+    """
+    Read the raw JSON bytes of each match of a match details file (see iter_match_texts)
+    """
+    return list(iter_match_texts(filepath))
+
+
+def write_match_texts_jsonl(texts, filepath):
+    """
+    Write match JSON texts (bytes) as a .jsonl file, one match per line. JSON
+    strings can't contain raw line breaks, so dropping them keeps each text valid.
+    """
+    with open(filepath, 'wb') as f:
+        f.writelines(text.replace(b"\r", b"").replace(b"\n", b"") + b"\n" for text in texts)
+
+
+def _read_match_dump(name, to_jsonl=False):
+    """
+    Match texts of the `name` dump: name.jsonl when it exists, else name.txt
+    (converted to name.jsonl if to_jsonl)
+    """
+    jsonl_path = f"{name}.jsonl"
+    try:
+        return read_match_texts(jsonl_path)
+    except FileNotFoundError:
+        texts = read_match_texts(f"{name}.txt")
+    if to_jsonl:
+        write_match_texts_jsonl(texts, jsonl_path)
+        print(f"Converted {name}.txt to {jsonl_path}")
+    return texts
+
+
+def _iter_parsed(texts):
+    """Parse match JSON texts, skipping the ones that are not valid JSON"""
+    for text in texts:
         try:
-            match_data = json.loads(current_match)
-            matches.append(match_data)
+            yield json_loads(text)
         except json.JSONDecodeError:
-            print(f"Error parsing last match JSON")
-    
-    return matches
+            print(f"Error parsing match JSON")
+
+
+def _parse_matches(texts):
+    """Parse match JSON texts into a list (see _iter_parsed)"""
+    return list(_iter_parsed(texts))
+
+
+def iter_match_details(filepath):
+    """
+    Yield the parsed matches of a match details file one at a time, so memory
+    stays bounded by a single match whatever the file size
+    """
+    return _iter_parsed(iter_match_texts(filepath))
+
+
+def read_match_details_from_txt(filepath):
+    """
+    Read match details from the txt file
+    """
+    return list(iter_match_details(filepath))
+
+def _write_csv(df, output_file):
+    """Write df to CSV with polars when installed, else pandas"""
+    if pl is not None:
+        try:
+            pl.from_pandas(df).write_csv(output_file)
+            return
+        except ValueError:
+            pass  # object column of mixed types Arrow can't convert
+    df.to_csv(output_file, index=False)
+
 
 def save_detailed_dataset(match_data_list, output_file):
     """
-    Save detailed match data to CSV
+    Save detailed match data (list of match dicts or DataFrame) to CSV
     """
-    if not match_data_list:
+    if len(match_data_list) == 0:
         print("No match data to save")
         return
     
     # Convert to dataframe for easier handling
-    df = pd.DataFrame(match_data_list)
+    df = match_data_list if isinstance(match_data_list, pd.DataFrame) else pd.DataFrame(match_data_list)
     
     # Save to CSV
-    df.to_csv(output_file, index=False)
+    _write_csv(df, output_file)
     print(f"Detailed dataset saved to {output_file}")
     print(f"Shape: {df.shape[0]} matches x {df.shape[1]} features")
     
@@ -216,45 +568,41 @@ def save_detailed_dataset(match_data_list, output_file):
         print(f"Team 100 wins: {team_100_wins}/{len(df)} ({team_100_wins/len(df)*100:.1f}%)")
 
 def main():
-    # Read match details from both files
-    detailed_data = []
+    parser = argparse.ArgumentParser(description="Extract the detailed and draft match datasets from the match details dumps")
+    parser.add_argument("--to-jsonl", action="store_true",
+                        help="Convert the .txt dumps to .jsonl (one match per line), read instead of them from then on")
+    args = parser.parse_args()
+    
+    # Read the raw match texts from both files; they are parsed by the extraction workers
+    texts = []
     
     # Try to read from extended file first
     try:
-        matches = read_match_details_from_txt("match_details_extended.txt")
-        print(f"Read {len(matches)} matches from extended file")
-        
-        for match in matches:
-            detailed_data.append(extract_detailed_match_data(match))
+        extended = _read_match_dump("match_details_extended", args.to_jsonl)
+        print(f"Read {len(extended)} matches from extended file")
+        texts.extend(extended)
     except FileNotFoundError:
         print("Extended file not found, using original file")
     
     # Also read from original file
     try:
-        matches = read_match_details_from_txt("match_details.txt")
-        print(f"Read {len(matches)} matches from original file")
-        
-        for match in matches:
-            detailed_data.append(extract_detailed_match_data(match))
+        original = _read_match_dump("match_details", args.to_jsonl)
+        print(f"Read {len(original)} matches from original file")
+        texts.extend(original)
     except FileNotFoundError:
         print("Original file not found")
     
     # Save detailed dataset
-    if detailed_data:
+    if texts:
+        detailed_data = extract_detailed_dataset_from_texts(texts)
         save_detailed_dataset(detailed_data, "match_data_detailed.csv")
         
-        # Also create a simplified version focused on draft
-        draft_columns = [col for col in detailed_data[0].keys() if 
-                        'championId' in col or 'championName' in col or 
-                        'ban' in col or 'win' in col or 
-                        'matchId' in col or 'gameDuration' in col or
-                        'first_' in col or '_kills' in col or
-                        'goldEarned' in col or 'totalMinionsKilled' in col or
-                        'visionScore' in col or 'enemyChampionImmobilizations' in col or
-                        'teamEarlySurrendered' in col or 'kda' in col]
+        # Also create a simplified version focused on draft. Every column is
+        # classified, including ones that only appear in later matches (e.g.
+        # ban_4/ban_5), not just those of the first match
+        draft_columns = detailed_data.columns.str.contains(DRAFT_COLUMNS_RE)
         
-        draft_data = [{k: v for k, v in match.items() if k in draft_columns} 
-                     for match in detailed_data]
+        draft_data = detailed_data.loc[:, draft_columns]
         save_detailed_dataset(draft_data, "draft_data_with_bans.csv")
         print("\nAlso saved draft-focused data to draft_data_with_bans.csv")
 
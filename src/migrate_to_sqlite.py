@@ -11,19 +11,68 @@ To the new SQLite database (lol_matches.db)
 import json
 import os
 import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
 from pathlib import Path
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from database import MatchDatabase
-from extract_detailed_match_data import read_match_details_from_txt
+from database import MatchDatabase, build_match_rows
+from extract_detailed_match_data import iter_match_details, iter_match_texts, _parse_matches
 
+# Matches per worker task, and per transaction
+MIGRATE_BATCH_SIZE = 2_000
 
-def migrate_matches(db: MatchDatabase, txt_file: str) -> tuple:
+
+def _match_batch_rows(texts: list) -> tuple:
+    """
+    Pool worker: parse a batch of match JSON texts and build their insert rows.
+
+    Returns (number of matches parsed, build_match_rows output): the rows are
+    much cheaper to pickle back than the parsed match dicts.
+    """
+    matches = _parse_matches(texts)
+    return len(matches), build_match_rows([(match.get("metadata", {}).get("matchId"), match) for match in matches])
+
+
+def _prepared_batches(txt_file: str, processes: int = None):
+    """
+    Yield (texts, parsed_count, rows) for each MIGRATE_BATCH_SIZE batch of
+    txt_file, in order. Batches are prepared by `processes` worker processes
+    (default: one per core), with at most two per worker in flight so memory
+    stays bounded whatever the file size.
+    """
+    texts = iter_match_texts(txt_file)
+    batches = iter(lambda: list(islice(texts, MIGRATE_BATCH_SIZE)), [])
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for batch in batches:
+            yield (batch, *_match_batch_rows(batch))
+        return
+
+    max_in_flight = 2 * processes
+    with Pool(processes) as pool:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append((batch, pool.apply_async(_match_batch_rows, (batch,))))
+            if len(in_flight) >= max_in_flight:
+                batch, result = in_flight.popleft()
+                yield (batch, *result.get())
+        while in_flight:
+            batch, result = in_flight.popleft()
+            yield (batch, *result.get())
+
+
+def migrate_matches(db: MatchDatabase, txt_file: str, processes: int = None) -> tuple:
     """
     Migrate matches from txt file to SQLite database.
 
+    JSON parsing and row building run in worker processes (see
+    _prepared_batches); this process only writes, one transaction per batch.
+
     Returns:
         tuple: (migrated_count, skipped_count, error_count)
     """
@@ -32,27 +81,34 @@ def migrate_matches(db: MatchDatabase, txt_file: str) -> tuple:
         return 0, 0, 0
 
     print(f"Reading matches from {txt_file}...")
-    matches = read_match_details_from_txt(txt_file)
-    print(f"Found {len(matches)} matches to migrate")
 
     migrated = 0
     skipped = 0
     errors = 0
+    start = 0
 
-    for i, match in enumerate(matches):
+    for texts, parsed, rows in _prepared_batches(txt_file, processes):
         try:
-            match_id = match.get("metadata", {}).get("matchId", "Unknown")
-
-            if db.insert_match(match):
-                migrated += 1
-                if migrated % 100 == 0:
-                    print(f"  Migrated {migrated} matches...")
-            else:
-                skipped += 1  # Already exists
-
-        except Exception as e:
-            errors += 1
-            print(f"  Error migrating match {i}: {e}")
+            inserted = db.insert_match_rows(*rows)
+            migrated += inserted
+            skipped += parsed - inserted  # Already exist
+        except Exception:
+            # Batch rolled back: retry match by match to isolate the bad ones
+            for i, match in enumerate(_parse_matches(texts), start):
+                try:
+                    if db.insert_match(match):
+                        migrated += 1
+                    else:
+                        skipped += 1  # Already exists
+
+                except Exception as e:
+                    errors += 1
+                    print(f"  Error migrating match {i}: {e}")
+
+        start += parsed
+        print(f"  Migrated {migrated} matches...")
+
+    print(f"Read {start} matches")
 
     return migrated, skipped, errors
 
@@ -84,24 +140,19 @@ def migrate_progress(db: MatchDatabase, progress_file: str) -> tuple:
     migrated = 0
     errors = 0
 
-    for puuid in players:
-        try:
-            db.save_player_progress(puuid)
-            migrated += 1
-        except Exception as e:
-            errors += 1
-            print(f"  Error migrating player {puuid[:20]}...: {e}")
-
-    # Migrate statistics
-    stats = progress.get('stats', {})
-    for key, value in stats.items():
-        db.update_stat(key, value)
-
-    # Migrate last page and index
-    if 'last_page' in progress:
-        db.update_stat('last_page', progress['last_page'])
-    if 'last_player_index' in progress:
-        db.update_stat('last_player_index', progress['last_player_index'])
+    # All players in one transaction
+    try:
+        migrated = db.save_players_progress(players)
+    except Exception as e:
+        errors = len(players)
+        print(f"  Error migrating players: {e}")
+
+    # Migrate statistics, plus the last page and index, in one transaction
+    stats = dict(progress.get('stats', {}))
+    for key in ('last_page', 'last_player_index'):
+        if key in progress:
+            stats[key] = progress[key]
+    db.update_stats(stats)
 
     return migrated, errors
 
@@ -114,9 +165,11 @@ def main():
     parser.add_argument('--db', default='data/lol_matches.db',
                        help='SQLite database path (default: data/lol_matches.db)')
     parser.add_argument('--matches', default='data/raw/match_details_extended.txt',
-                       help='Match details file (default: data/raw/match_details_extended.txt)')
+                       help='Match details file, .txt dump or .jsonl (default: data/raw/match_details_extended.txt)')
     parser.add_argument('--progress', default='data/raw/collection_progress.json',
                        help='Progress file (default: data/raw/collection_progress.json)')
+    parser.add_argument('--processes', type=int, default=None,
+                       help='Worker processes parsing the matches file (default: one per core)')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be migrated without actually migrating')
 
@@ -140,8 +193,7 @@ def main():
 
         # Check files
         if os.path.exists(args.matches):
-            matches = read_match_details_from_txt(args.matches)
-            print(f"Matches to migrate: {len(matches)}")
+            print(f"Matches to migrate: {sum(1 for _ in iter_match_details(args.matches))}")
         else:
             print(f"Matches file not found: {args.matches}")
 
@@ -170,7 +222,8 @@ def main():
 
     # Migrate matches
     print("\n--- Migrating Matches ---")
-    match_migrated, match_skipped, match_errors = migrate_matches(db, args.matches)
+    with db.bulk_mode():
+        match_migrated, match_skipped, match_errors = migrate_matches(db, args.matches, args.processes)
 
     # Migrate progress
     print("\n--- Migrating Progress ---")
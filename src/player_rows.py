@@ -0,0 +1,127 @@
+"""
+Player Row Builder for player_stats inserts
+
+Maps one Riot API participant dict to a player_stats row tuple. Kept in its
+own module with precise type annotations and no dynamic tricks so it can be
+compiled with mypyc (`mypyc src/player_rows.py`) for the insert hot path;
+the pure-Python module is used transparently when no compiled build exists.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+
+
+POSITION_MAP = {
+    "TOP": "top",
+    "JUNGLE": "jungle",
+    "MIDDLE": "mid",
+    "BOTTOM": "adc",
+    "UTILITY": "support"
+}
+
+# player_stats column -> (participant key, default)
+PARTICIPANT_FIELDS = {
+    'puuid': ('puuid', None),
+    'riot_id_name': ('riotIdGameName', None),
+    'riot_id_tagline': ('riotIdTagline', None),
+    'champion_id': ('championId', None),
+    'champion_name': ('championName', None),
+    'champ_level': ('champLevel', None),
+    'summoner_1_id': ('summoner1Id', None),
+    'summoner_2_id': ('summoner2Id', None),
+    'kills': ('kills', None),
+    'deaths': ('deaths', None),
+    'assists': ('assists', None),
+    'total_damage_dealt': ('totalDamageDealt', None),
+    'total_damage_to_champions': ('totalDamageDealtToChampions', None),
+    'total_damage_taken': ('totalDamageTaken', None),
+    'true_damage_dealt': ('trueDamageDealt', None),
+    'physical_damage_dealt': ('physicalDamageDealt', None),
+    'magic_damage_dealt': ('magicDamageDealt', None),
+    'gold_earned': ('goldEarned', None),
+    'total_minions_killed': ('totalMinionsKilled', None),
+    'neutral_minions_killed': ('neutralMinionsKilled', None),
+    'vision_score': ('visionScore', None),
+    'wards_placed': ('wardsPlaced', None),
+    'wards_killed': ('wardsKilled', None),
+    'vision_wards_bought': ('visionWardsBoughtInGame', None),
+    'enemy_champion_immobilizations': ('enemyChampionImmobilizations', 0),
+    'first_blood_kill': ('firstBloodKill', None),
+    'first_tower_kill': ('firstTowerKill', None),
+    'turret_kills': ('turretKills', None),
+    'inhibitor_kills': ('inhibitorKills', None),
+    'largest_killing_spree': ('largestKillingSpree', None),
+    'largest_multi_kill': ('largestMultiKill', None),
+    'killing_sprees': ('killingSprees', None),
+    'double_kills': ('doubleKills', None),
+    'triple_kills': ('tripleKills', None),
+    'quadra_kills': ('quadraKills', None),
+    'penta_kills': ('pentaKills', None),
+}
+
+# player_stats column -> participant["challenges"] key
+CHALLENGE_FIELDS = {
+    'damage_per_minute': 'damagePerMinute',
+    'damage_taken_percentage': 'damageTakenOnTeamPercentage',
+    'gold_per_minute': 'goldPerMinute',
+    'team_damage_percentage': 'teamDamagePercentage',
+    'kill_participation': 'killParticipation',
+    'kda': 'kda',
+    'lane_minions_first_10_min': 'laneMinionsFirst10Minutes',
+    'turret_plates_taken': 'turretPlatesTaken',
+    'solo_kills': 'soloKills',
+}
+
+PLAYER_STATS_COLUMNS = [
+    'match_id', 'team_id', 'position', 'summoner_1_name', 'summoner_2_name',
+    *PARTICIPANT_FIELDS, *CHALLENGE_FIELDS
+]
+
+
+def build_player_row(match_id: str, participant: Dict[str, Any],
+                     spell_name: Callable[[int], str]) -> Tuple[Any, ...]:
+    """
+    Build one player_stats row (in PLAYER_STATS_COLUMNS order) from a participant.
+
+    Args:
+        match_id: Match the participant belongs to
+        participant: Participant dict from the Riot match-v5 API
+        spell_name: Summoner spell ID -> name lookup
+
+    Returns:
+        Tuple of values ready to bind to the player_stats INSERT
+    """
+    team_position = participant.get("teamPosition", "unknown")
+    summoner_1_id = participant.get("summoner1Id")
+    summoner_2_id = participant.get("summoner2Id")
+
+    row = [
+        match_id,
+        participant.get("teamId"),
+        POSITION_MAP.get(team_position, team_position),
+        spell_name(summoner_1_id) if summoner_1_id else None,
+        spell_name(summoner_2_id) if summoner_2_id else None,
+    ]
+    for key, default in PARTICIPANT_FIELDS.values():
+        row.append(participant.get(key, default))
+
+    challenges = participant.get("challenges", {})
+    for key in CHALLENGE_FIELDS.values():
+        row.append(challenges.get(key))
+
+    return tuple(row)
+
+
+def append_player_columns(columns: List[List[Any]], match_id: str, participant: Dict[str, Any],
+                          spell_name: Callable[[int], str]) -> None:
+    """
+    Append one participant's build_player_row values to column lists
+    (one list per PLAYER_STATS_COLUMNS entry, for column-wise batch inserts).
+
+    Args:
+        columns: List of per-column value lists, in PLAYER_STATS_COLUMNS order
+        match_id: Match the participant belongs to
+        participant: Participant dict from the Riot match-v5 API
+        spell_name: Summoner spell ID -> name lookup
+    """
+    for column, value in zip(columns, build_player_row(match_id, participant, spell_name)):
+        column.append(value)
@@ -1,5 +1,11 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
 import pandas as pd
-from draft_predictor import DraftPredictor
+from draft_predictor import DRAFT_SLOTS, DraftPredictor
 
 # Common champion mappings (you can expand this)
 CHAMPIONS = {
@@ -24,10 +30,15 @@ CHAMPIONS = {
     'braum': 201, 'alistar': 12, 'soraka': 16, 'zyra': 143, 'bard': 432
 }
 
+# Reverse mapping for display, built once
+ID_TO_NAME = {champ_id: name for name, champ_id in CHAMPIONS.items()}
+
+# Characters dropped from typed names to match the CHAMPIONS keys
+_NAME_DELETE = str.maketrans('', '', " '")
+
 def get_champion_id(name):
     """Convert champion name to ID"""
-    name = name.lower().replace(' ', '').replace("'", "")
-    return CHAMPIONS.get(name, None)
+    return CHAMPIONS.get(name.lower().translate(_NAME_DELETE), None)
 
 def input_team_composition(team_name):
     """Get team composition from user input"""
@@ -91,24 +102,118 @@ def format_team(team_comp):
     """Format team composition for display"""
     champ_names = []
     for pos, champ_id in team_comp.items():
-        # Find champion name by ID
-        champ_name = next((name for name, id in CHAMPIONS.items() if id == champ_id), f"ID{champ_id}")
+        champ_name = ID_TO_NAME.get(champ_id, f"ID{champ_id}")
         champ_names.append(f"{champ_name.title()}({pos})")
     return " | ".join(champ_names)
 
+def format_teams_batch(team_comps):
+    """
+    format_team for many team compositions: every champion name is looked up
+    in one pass over all the ids, then regrouped per team
+    """
+    slots = [(pos, champ_id) for team_comp in team_comps for pos, champ_id in team_comp.items()]
+    names = [f"{ID_TO_NAME.get(champ_id, f'ID{champ_id}').title()}({pos})" for pos, champ_id in slots]
+
+    formatted = []
+    start = 0
+    for team_comp in team_comps:
+        formatted.append(" | ".join(names[start:start + len(team_comp)]))
+        start += len(team_comp)
+    return formatted
+
+def load_drafts(path):
+    """
+    Read a JSON list of {"team_100": {...}, "team_200": {...}} records into
+    (team_100, team_200) comps plus an (N, 10) champion id array in
+    DRAFT_SLOTS order. Champions may be given as ids or names; a position
+    (or a whole team) missing from a draft is left at 0, like
+    DraftPredictor.predict_match does.
+    """
+    with open(path, encoding='utf-8') as f:
+        records = json.load(f)
+
+    drafts = []
+    for i, record in enumerate(records):
+        teams = []
+        for key in ('team_100', 'team_200'):
+            team_comp = {}
+            for pos, champ in record.get(key, {}).items():
+                champ_id = champ if isinstance(champ, int) else get_champion_id(str(champ))
+                if champ_id is None:
+                    raise ValueError(f"Draft {i}: champion '{champ}' not found ({key} {pos})")
+                team_comp[pos] = champ_id
+            teams.append(team_comp)
+        drafts.append(tuple(teams))
+
+    champion_ids = np.zeros((len(drafts), len(DRAFT_SLOTS)), dtype=np.int32)
+    for slot, (team, pos) in enumerate(DRAFT_SLOTS):
+        champion_ids[:, slot] = [comps[team].get(pos, 0) for comps in drafts]
+    return drafts, champion_ids
+
+def predict_batch(predictor, teams_json, out_csv=None, repeat=1):
+    """Predict every draft of a --teams-json file with one predict_proba_batch call"""
+    drafts, champion_ids = load_drafts(teams_json)
+    print(f"Loaded {len(drafts)} drafts from {teams_json}")
+
+    timings = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        probabilities = predictor.predict_proba_batch(champion_ids)
+        timings.append(time.perf_counter() - start)
+    if repeat > 1:
+        print(f"Prediction over {repeat} runs: best {min(timings) * 1000:.2f} ms, "
+              f"mean {np.mean(timings) * 1000:.2f} ms ({len(drafts) / min(timings):,.0f} drafts/s)")
+
+    team_100_win = probabilities[:, 1]
+    results = pd.DataFrame({
+        'team_100': format_teams_batch([comps[0] for comps in drafts]),
+        'team_200': format_teams_batch([comps[1] for comps in drafts]),
+        'winner': np.where(team_100_win > probabilities[:, 0], 'Team 100 (Blue)', 'Team 200 (Red)'),
+        'team_100_win_probability': team_100_win,
+        'team_200_win_probability': probabilities[:, 0],
+        'confidence': probabilities.max(axis=1),
+    })
+
+    if out_csv:
+        results.to_csv(out_csv, index=False)
+        print(f"Predictions written to {out_csv}")
+    else:
+        print(results.to_string(index=False))
+    return results
+
 def main():
+    parser = argparse.ArgumentParser(description='Predict LoL draft outcomes (interactive by default)')
+    parser.add_argument('--model', default='draft_predictor_model.pkl',
+                       help='Trained model file (default: draft_predictor_model.pkl)')
+    parser.add_argument('--teams-json', default=None,
+                       help='JSON list of {"team_100": {...}, "team_200": {...}} drafts to predict in one batch')
+    parser.add_argument('--out-csv', default=None,
+                       help='Write the --teams-json predictions to this CSV (default: print them)')
+    parser.add_argument('--repeat', type=int, default=1,
+                       help='Run the --teams-json prediction N times and report timings (benchmarking)')
+    args = parser.parse_args()
+
     print("🎮 LEAGUE OF LEGENDS DRAFT PREDICTOR 🎮")
     print("="*50)
     
     # Load trained model
     predictor = DraftPredictor()
-    if not predictor.load_model('draft_predictor_model.pkl'):
+    if not predictor.load_model(args.model):
         print("❌ No trained model found!")
         print("\n🔧 Train the AI first:")
         print("   python src/draft_predictor.py")
         return
     
     print("✅ AI model loaded successfully!")
+
+    if args.teams_json:
+        try:
+            predict_batch(predictor, args.teams_json, args.out_csv, args.repeat)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
     print("\nEnter team compositions to get win predictions.")
     print("Available positions: top, jungle, mid, adc, support")
     
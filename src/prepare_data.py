@@ -16,7 +16,9 @@ Usage:
 import os
 import sys
 import argparse
+import hashlib
 import json
+from itertools import combinations
 from pathlib import Path
 
 import pandas as pd
@@ -30,6 +32,14 @@ sys.path.insert(0, str(Path(__file__).parent))
 from database import MatchDatabase
 from champion_data import ChampionData
 
+# Sentinel for a missing champion in int16 champion id arrays
+MISSING_CHAMPION = -1
+
+
+def _pack_champion_pairs(champs_a: np.ndarray, champs_b: np.ndarray) -> np.ndarray:
+    """(champ_a, champ_b) id pairs packed into one sortable int64 each: (a << 32) | b"""
+    return (np.asarray(champs_a, dtype=np.int64) << 32) | np.asarray(champs_b, dtype=np.int64)
+
 
 class ChampionStatsCalculator:
     """
@@ -39,82 +49,147 @@ class ChampionStatsCalculator:
     that can be used as features for the ML model.
     """
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, cache_dir: str = None):
         """
         Initialize with match data.
 
         Args:
             df: DataFrame with match data (before post-game column removal)
+            cache_dir: If set, the win / pick counts are cached there as
+                Parquet files keyed by a hash of the picks, and reloaded
+                instead of recounted while the data is unchanged
         """
         self.df = df
+        self.cache_dir = cache_dir
         self.champion_winrates = {}  # {champion_id: {role: winrate}}
         self.champion_pickrates = {}  # {champion_id: pickrate}
         self.matchup_winrates = {}  # {(champ1, champ2, role): winrate}
+        self._long = None  # long frame of all picks (see _build_long_frame)
+
+    def _team_100_wins(self) -> np.ndarray:
+        """team_100_win as a bool array (missing column / values count as a loss)"""
+        if 'team_100_win' not in self.df.columns:
+            return np.zeros(len(self.df), dtype=bool)
+        return self.df['team_100_win'].fillna(False).to_numpy(dtype=bool)
+
+    def _champion_ids(self, col: str) -> np.ndarray:
+        """
+        Champion id column as an int16 array, MISSING_CHAMPION where missing
+        or absent (ids fit in int16; integer keys group faster than floats)
+        """
+        if col not in self.df.columns:
+            return np.full(len(self.df), MISSING_CHAMPION, dtype=np.int16)
+        return self.df[col].fillna(MISSING_CHAMPION).to_numpy(dtype=np.int16)
+
+    def _build_long_frame(self) -> pd.DataFrame:
+        """
+        All picks as one long frame, built once (one scan of the champion
+        columns) and shared by the win rate, pick rate and matchup stats.
+
+        Columns: match_idx, side (100/200), role, champion_id (int16,
+        MISSING_CHAMPION if missing), win (bool). Rows go position by position, then match by match
+        with the team 100 pick before the team 200 one, so even rows are
+        team 100 and the next row is the team 200 pick of the same lane.
+        """
+        if self._long is None:
+            positions = ['top', 'jungle', 'mid', 'adc', 'support']
+            positions = [pos for pos in positions if f'team_100_{pos}_champion_id' in self.df.columns]
+            team_100_win = self._team_100_wins()
+            n = len(self.df)
+
+            champions = [
+                np.column_stack([self._champion_ids(f'team_100_{pos}_champion_id'),
+                                 self._champion_ids(f'team_200_{pos}_champion_id')]).ravel()
+                for pos in positions
+            ]
+            self._long = pd.DataFrame({
+                'match_idx': np.tile(np.repeat(np.arange(n), 2), len(positions)),
+                'side': np.tile([100, 200], n * len(positions)),
+                'role': np.repeat(np.array(positions, dtype=object), 2 * n),
+                'champion_id': np.concatenate(champions) if champions else np.empty(0, dtype=np.int16),
+                'win': np.tile(np.column_stack([team_100_win, ~team_100_win]).ravel(), len(positions))
+            })
+        return self._long
+
+    def _champion_counts(self) -> pd.DataFrame:
+        """Wins / games per (champion_id, role), in order of first appearance"""
+        picks = self._build_long_frame()
+        picks = picks[picks['champion_id'].to_numpy() != MISSING_CHAMPION]
+        counts = picks.groupby(['champion_id', 'role'], sort=False)['win'].agg(['sum', 'count'])
+        return counts.reset_index()
+
+    def _matchup_counts(self) -> pd.DataFrame:
+        """Team 100 wins / games per (champ_100, champ_200, role), in order of first appearance"""
+        # Pair each lane's team 100 pick (even rows) with the team 200 pick after it
+        long = self._build_long_frame()
+        team_100, team_200 = long.iloc[0::2], long.iloc[1::2]
+        champ_100 = team_100['champion_id'].to_numpy()
+        champ_200 = team_200['champion_id'].to_numpy()
+        played = (champ_100 != MISSING_CHAMPION) & (champ_200 != MISSING_CHAMPION)
+        lanes = pd.DataFrame({
+            'champ_100': champ_100[played],
+            'champ_200': champ_200[played],
+            'role': team_100['role'].to_numpy()[played],
+            'win': team_100['win'].to_numpy()[played]
+        })
+        counts = lanes.groupby(['champ_100', 'champ_200', 'role'], sort=False)['win'].agg(['sum', 'count'])
+        return counts.reset_index()
+
+    def _cache_key(self) -> str:
+        """Hash of everything the counts depend on: the picks and results of the long frame"""
+        long = self._build_long_frame()
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(','.join(long['role'].unique()).encode())
+        digest.update(long['champion_id'].to_numpy().tobytes())
+        digest.update(long['win'].to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _cached_counts(self, name: str, count) -> pd.DataFrame:
+        """
+        count() through the Parquet cache in cache_dir (if set). Any change to
+        the picks changes the key, so stale files are simply never read again.
+        """
+        if self.cache_dir is None:
+            return count()
+
+        path = Path(self.cache_dir) / f'{name}_{self._cache_key()}.parquet'
+        if path.exists():
+            return pd.read_parquet(path, engine='pyarrow')
+
+        counts = count()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        counts.to_parquet(path, engine='pyarrow', compression='snappy')
+        return counts
 
     def calculate_champion_winrates(self) -> dict:
         """
-        Calculate win rate for each champion per role.
+        Calculate win rate for each champion per role (and pick rates).
+
+        Counted with a single groupby over the shared long frame of picks
+        (see _build_long_frame).
 
         Returns:
             dict: {champion_id: {'global': winrate, 'top': winrate, ...}}
         """
         print("  Calculating champion win rates...")
 
-        positions = ['top', 'jungle', 'mid', 'adc', 'support']
-        winrates = {}
-
-        for pos in positions:
-            # Team 100 champion and win
-            col_100 = f'team_100_{pos}_champion_id'
-            col_200 = f'team_200_{pos}_champion_id'
-
-            if col_100 not in self.df.columns:
-                continue
+        counts = self._cached_counts('champion_counts', self._champion_counts)
 
-            # Calculate for team 100
-            for _, row in self.df.iterrows():
-                champ_100 = row.get(col_100)
-                champ_200 = row.get(col_200)
-                team_100_win = row.get('team_100_win', False)
-
-                if pd.notna(champ_100):
-                    champ_100 = int(champ_100)
-                    if champ_100 not in winrates:
-                        winrates[champ_100] = {'wins': 0, 'games': 0, 'by_role': {}}
-                    if pos not in winrates[champ_100]['by_role']:
-                        winrates[champ_100]['by_role'][pos] = {'wins': 0, 'games': 0}
-
-                    winrates[champ_100]['games'] += 1
-                    winrates[champ_100]['by_role'][pos]['games'] += 1
-                    if team_100_win:
-                        winrates[champ_100]['wins'] += 1
-                        winrates[champ_100]['by_role'][pos]['wins'] += 1
-
-                if pd.notna(champ_200):
-                    champ_200 = int(champ_200)
-                    if champ_200 not in winrates:
-                        winrates[champ_200] = {'wins': 0, 'games': 0, 'by_role': {}}
-                    if pos not in winrates[champ_200]['by_role']:
-                        winrates[champ_200]['by_role'][pos] = {'wins': 0, 'games': 0}
-
-                    winrates[champ_200]['games'] += 1
-                    winrates[champ_200]['by_role'][pos]['games'] += 1
-                    if not team_100_win:
-                        winrates[champ_200]['wins'] += 1
-                        winrates[champ_200]['by_role'][pos]['wins'] += 1
-
-        # Convert to winrates
+        # Groups come in order of first appearance, as the per-row loop used to add them
+        winrates = {}
+        for champ_id, role, role_wins, role_games in zip(
+                counts['champion_id'].tolist(), counts['role'].tolist(),
+                counts['sum'].tolist(), counts['count'].tolist()):
+            data = winrates.setdefault(champ_id, {'wins': 0, 'games': 0, 'by_role': {}})
+            data['wins'] += role_wins
+            data['games'] += role_games
+            data['by_role'][role] = {'wins': role_wins, 'games': role_games,
+                                     'winrate': role_wins / role_games}
+
+        # Convert to winrates; pick rate = share of matches the champion was picked in
         for champ_id, data in winrates.items():
-            if data['games'] > 0:
-                data['global_winrate'] = data['wins'] / data['games']
-            else:
-                data['global_winrate'] = 0.5
-
-            for role, role_data in data['by_role'].items():
-                if role_data['games'] > 0:
-                    role_data['winrate'] = role_data['wins'] / role_data['games']
-                else:
-                    role_data['winrate'] = 0.5
+            data['global_winrate'] = data['wins'] / data['games']
+            self.champion_pickrates[champ_id] = data['games'] / len(self.df)
 
         self.champion_winrates = winrates
         print(f"    Calculated win rates for {len(winrates)} champions")
@@ -132,38 +207,14 @@ class ChampionStatsCalculator:
         """
         print("  Calculating matchup win rates...")
 
-        positions = ['top', 'jungle', 'mid', 'adc', 'support']
-        matchups = {}
-
-        for pos in positions:
-            col_100 = f'team_100_{pos}_champion_id'
-            col_200 = f'team_200_{pos}_champion_id'
-
-            if col_100 not in self.df.columns:
-                continue
-
-            for _, row in self.df.iterrows():
-                champ_100 = row.get(col_100)
-                champ_200 = row.get(col_200)
-                team_100_win = row.get('team_100_win', False)
-
-                if pd.notna(champ_100) and pd.notna(champ_200):
-                    champ_100 = int(champ_100)
-                    champ_200 = int(champ_200)
-                    key = (champ_100, champ_200, pos)
-
-                    if key not in matchups:
-                        matchups[key] = {'wins': 0, 'games': 0}
-
-                    matchups[key]['games'] += 1
-                    if team_100_win:
-                        matchups[key]['wins'] += 1
+        counts = self._cached_counts('matchup_counts', self._matchup_counts)
 
         # Convert to winrates, filter by min_games
-        filtered_matchups = {}
-        for key, data in matchups.items():
-            if data['games'] >= min_games:
-                filtered_matchups[key] = data['wins'] / data['games']
+        counts = counts[counts['count'] >= min_games]
+        filtered_matchups = dict(zip(
+            zip(counts['champ_100'].tolist(), counts['champ_200'].tolist(), counts['role'].tolist()),
+            (counts['sum'] / counts['count']).tolist()
+        ))
 
         self.matchup_winrates = filtered_matchups
         print(f"    Calculated {len(filtered_matchups)} matchup win rates")
@@ -310,6 +361,18 @@ KNOWN_COUNTERS = {
     (99, 111, 'support'): 0.8,   # Lux countered by Nautilus
 }
 
+# KNOWN_COUNTERS resolved once into win rate estimates for both sides of each
+# matchup: (champ_a, champ_b, position) -> estimated win rate of champ_a.
+# A countered champion gets 0.5 - severity * 0.2, its counter the mirror value;
+# when two champions counter each other, the entry from champ_a's side wins.
+KNOWN_COUNTER_WINRATES = {
+    (counter, countered, pos): 0.5 + (severity * 0.2)
+    for (countered, counter, pos), severity in KNOWN_COUNTERS.items()
+}
+KNOWN_COUNTER_WINRATES.update(
+    (key, 0.5 - (severity * 0.2)) for key, severity in KNOWN_COUNTERS.items()
+)
+
 
 # =============================================================================
 # LANE SYNERGIES - Bot Lane and Jungle Roaming
@@ -434,6 +497,15 @@ BOT_LANE_SYNERGIES = {
     },
 }
 
+# BOT_LANE_SYNERGIES resolved once: (adc_id, support_id) -> (synergy_type, score).
+# Types are merged last to first, so a pair listed under several types keeps
+# the first one, as the scan in type order did.
+BOT_LANE_SYNERGY_LOOKUP = {
+    pair: (synergy_type, score)
+    for synergy_type, pairs in reversed(BOT_LANE_SYNERGIES.items())
+    for pair, score in pairs.items()
+}
+
 JUNGLE_ROAM_SYNERGIES = {
     # ===== JUNGLE + MID (Gank synergy) =====
     'jungle_mid': {
@@ -557,6 +629,8 @@ class MatchupAnalyzer:
         self.min_games = min_games
         self.matchups = {}  # {(champ_a, champ_b, position): stats}
         self.champion_names = {}  # {champion_id: name}
+        self._winrate_table = self._build_winrate_table()  # {position: {(champ_a, champ_b): winrate}}
+        self._winrate_arrays = self._build_winrate_arrays()  # {position: (sorted packed keys, winrates)}
 
         if df is not None:
             self._build_champion_names()
@@ -572,8 +646,8 @@ class MatchupAnalyzer:
                 id_col = f'{team}_{pos}_champion_id'
                 name_col = f'{team}_{pos}_champion_name'
                 if id_col in self.df.columns and name_col in self.df.columns:
-                    for _, row in self.df[[id_col, name_col]].drop_duplicates().dropna().iterrows():
-                        self.champion_names[int(row[id_col])] = row[name_col]
+                    pairs = self.df[[id_col, name_col]].drop_duplicates().dropna().to_numpy()
+                    self.champion_names.update((int(champ_id), name) for champ_id, name in pairs)
 
     def get_champion_name(self, champion_id: int) -> str:
         """Get champion name from ID."""
@@ -596,51 +670,94 @@ class MatchupAnalyzer:
             return {}
 
         print("  Calculating lane matchups...")
-        positions = ['top', 'jungle', 'mid', 'adc', 'support']
-        matchups = {}
-
-        for _, row in self.df.iterrows():
-            team_100_win = row.get('team_100_win', False)
-
-            for pos in positions:
-                col_100 = f'team_100_{pos}_champion_id'
-                col_200 = f'team_200_{pos}_champion_id'
-
-                if col_100 not in self.df.columns or col_200 not in self.df.columns:
-                    continue
+        positions = [pos for pos in ['top', 'jungle', 'mid', 'adc', 'support']
+                     if f'team_100_{pos}_champion_id' in self.df.columns
+                     and f'team_200_{pos}_champion_id' in self.df.columns]
+        if 'team_100_win' in self.df.columns:
+            team_100_win = self.df['team_100_win'].fillna(False).to_numpy(dtype=bool)
+        else:
+            team_100_win = np.zeros(len(self.df), dtype=bool)
+        row = np.arange(len(self.df))
+
+        # One groupby per lane over the rows where both picks are known
+        lanes = []
+        for pos_idx, pos in enumerate(positions):
+            champ_100 = self.df[f'team_100_{pos}_champion_id']
+            champ_200 = self.df[f'team_200_{pos}_champion_id']
+            played = (champ_100.notna() & champ_200.notna()).to_numpy()
+            lane = pd.DataFrame({
+                'champ_a': champ_100[played].to_numpy(dtype=np.int32),
+                'champ_b': champ_200[played].to_numpy(dtype=np.int32),
+                'win': team_100_win[played],
+                'row': row[played]
+            })
+            counts = lane.groupby(['champ_a', 'champ_b'], sort=False).agg(
+                games=('win', 'size'), wins_for_a=('win', 'sum'), first_row=('row', 'min'))
+            lanes.append(counts.reset_index().assign(pos_idx=pos_idx))
 
-                champ_100 = row.get(col_100)
-                champ_200 = row.get(col_200)
+        matchups = {}
+        if lanes:
+            # Same key order as a row by row, lane by lane scan: first appearance
+            counts = pd.concat(lanes, ignore_index=True).sort_values(['first_row', 'pos_idx'], kind='stable')
+            games = counts['games'].to_numpy()
+            wins = counts['wins_for_a'].to_numpy()
+            # Winrates only for matchups with >= min_games, None = not enough data
+            reliable = games >= self.min_games
+            winrates = np.where(reliable, wins / np.maximum(games, 1), np.nan)
+            for champ_a, champ_b, pos_idx, n_games, n_wins, ok, winrate in zip(
+                    counts['champ_a'].tolist(), counts['champ_b'].tolist(), counts['pos_idx'].tolist(),
+                    games.tolist(), wins.tolist(), reliable.tolist(), winrates.tolist()):
+                matchups[(champ_a, champ_b, positions[pos_idx])] = {
+                    'games': n_games, 'wins_for_a': n_wins, 'winrate': winrate if ok else None
+                }
 
-                if pd.isna(champ_100) or pd.isna(champ_200):
-                    continue
+        self.matchups = matchups
+        self._winrate_table = self._build_winrate_table()
+        self._winrate_arrays = self._build_winrate_arrays()
+        print(f"    Found {sum(v['winrate'] is not None for v in matchups.values())} matchups with >= {self.min_games} games")
+        return matchups
 
-                champ_100 = int(champ_100)
-                champ_200 = int(champ_200)
-                key = (champ_100, champ_200, pos)
+    def _build_winrate_table(self) -> dict:
+        """
+        Resolve every known matchup once into {position: {(champ_a, champ_b): winrate}}.
 
-                if key not in matchups:
-                    matchups[key] = {'games': 0, 'wins_for_a': 0}
+        Layered so later sources win: known counters, then the reverse of
+        each data matchup (1 - winrate), then the data matchups themselves.
+        Matchups below min_games (winrate None) are skipped.
+        """
+        table = {pos: {} for pos in ['top', 'jungle', 'mid', 'adc', 'support']}
+        for (champ_a, champ_b, pos), winrate in KNOWN_COUNTER_WINRATES.items():
+            table.setdefault(pos, {})[(champ_a, champ_b)] = winrate
 
-                matchups[key]['games'] += 1
-                if team_100_win:
-                    matchups[key]['wins_for_a'] += 1
+        reliable = [(key, stats['winrate']) for key, stats in self.matchups.items()
+                    if stats['winrate'] is not None]
+        for (champ_a, champ_b, pos), winrate in reliable:
+            table.setdefault(pos, {})[(champ_b, champ_a)] = 1.0 - winrate
+        for (champ_a, champ_b, pos), winrate in reliable:
+            table[pos][(champ_a, champ_b)] = winrate
+        return table
 
-        # Calculate winrates and filter by min_games
-        for key, stats in matchups.items():
-            if stats['games'] >= self.min_games:
-                stats['winrate'] = stats['wins_for_a'] / stats['games']
-            else:
-                stats['winrate'] = None  # Not enough data
-
-        self.matchups = matchups
-        print(f"    Found {len([k for k, v in matchups.items() if v['winrate'] is not None])} matchups with >= {self.min_games} games")
-        return matchups
+    def _build_winrate_arrays(self) -> dict:
+        """
+        _winrate_table as {position: (keys, winrates)} arrays for batch lookups:
+        keys are the sorted packed (champ_a, champ_b) pairs (see
+        _pack_champion_pairs), winrates the matching float64 values.
+        """
+        arrays = {}
+        for pos, table in self._winrate_table.items():
+            pairs = np.array(list(table.keys()), dtype=np.int64).reshape(-1, 2)
+            keys = _pack_champion_pairs(pairs[:, 0], pairs[:, 1])
+            order = np.argsort(keys)
+            arrays[pos] = (keys[order], np.fromiter(table.values(), dtype=np.float64, count=len(table))[order])
+        return arrays
 
     def get_matchup_winrate(self, champ_a: int, champ_b: int, position: str) -> float:
         """
         Get win rate for champ_a vs champ_b in a specific position.
 
+        Data for the matchup comes first, then its reverse, then known
+        counters (see _build_winrate_table).
+
         Args:
             champ_a: Champion ID for team 100 side
             champ_b: Champion ID for team 200 side
@@ -649,27 +766,7 @@ class MatchupAnalyzer:
         Returns:
             Win rate for champ_a (0.0 to 1.0), or 0.5 if no data
         """
-        key = (champ_a, champ_b, position)
-        if key in self.matchups and self.matchups[key]['winrate'] is not None:
-            return self.matchups[key]['winrate']
-
-        # Try reverse matchup
-        reverse_key = (champ_b, champ_a, position)
-        if reverse_key in self.matchups and self.matchups[reverse_key]['winrate'] is not None:
-            return 1.0 - self.matchups[reverse_key]['winrate']
-
-        # Check known counters
-        if (champ_a, champ_b, position) in KNOWN_COUNTERS:
-            # champ_a is countered by champ_b
-            severity = KNOWN_COUNTERS[(champ_a, champ_b, position)]
-            return 0.5 - (severity * 0.2)  # Convert severity to winrate estimate
-
-        if (champ_b, champ_a, position) in KNOWN_COUNTERS:
-            # champ_b is countered by champ_a
-            severity = KNOWN_COUNTERS[(champ_b, champ_a, position)]
-            return 0.5 + (severity * 0.2)
-
-        return 0.5  # No data
+        return self._winrate_table.get(position, {}).get((champ_a, champ_b), 0.5)
 
     def get_matchup_severity(self, champ_a: int, champ_b: int, position: str) -> str:
         """
@@ -813,7 +910,23 @@ class MatchupAnalyzer:
 
     def get_matchup_features(self, row: pd.Series) -> dict:
         """
-        Extract matchup features for a single match row.
+        Extract matchup features for a single match row
+        (see get_matchup_features_frame).
+
+        Returns:
+            dict with matchup features
+        """
+        features = self.get_matchup_features_frame(pd.DataFrame([row]))
+        return {name: values.iloc[0] for name, values in features.items()}
+
+    def get_matchup_features_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Extract matchup features for every match row of df at once.
+
+        The lane winrates are looked up column by column into an (N, 5)
+        matrix (0.5 where a pick is missing or the matchup unknown) with a
+        binary search of the packed pairs in _winrate_arrays, and each
+        feature is one NumPy reduction over its rows.
 
         Features:
         - worst_matchup_winrate: Minimum matchup winrate across all lanes
@@ -823,38 +936,34 @@ class MatchupAnalyzer:
         - matchup_variance: Variance in matchup winrates
 
         Returns:
-            dict with matchup features
+            DataFrame with the matchup features, indexed like df
         """
         positions = ['top', 'jungle', 'mid', 'adc', 'support']
-        matchup_winrates = []
+        matchup_winrates = np.full((len(df), len(positions)), 0.5)
 
-        for pos in positions:
+        for i, pos in enumerate(positions):
             col_100 = f'team_100_{pos}_champion_id'
             col_200 = f'team_200_{pos}_champion_id'
+            if col_100 not in df.columns or col_200 not in df.columns:
+                continue
 
-            champ_100 = row.get(col_100)
-            champ_200 = row.get(col_200)
-
-            if pd.notna(champ_100) and pd.notna(champ_200):
-                wr = self.get_matchup_winrate(int(champ_100), int(champ_200), pos)
-                matchup_winrates.append(wr)
-            else:
-                matchup_winrates.append(0.5)
+            keys, winrates = self._winrate_arrays.get(pos, (None, None))
+            if keys is None or len(keys) == 0:
+                continue
 
-        # Calculate features
-        worst_wr = min(matchup_winrates) if matchup_winrates else 0.5
-        num_unfavorable = sum(1 for wr in matchup_winrates if wr < 0.45)
-        num_counter = sum(1 for wr in matchup_winrates if wr < 0.40)
-        avg_advantage = np.mean(matchup_winrates) - 0.5 if matchup_winrates else 0.0
-        variance = np.var(matchup_winrates) if len(matchup_winrates) > 1 else 0.0
+            played = (df[col_100].notna() & df[col_200].notna()).to_numpy()
+            queries = _pack_champion_pairs(df[col_100][played].to_numpy(dtype=np.int64),
+                                           df[col_200][played].to_numpy(dtype=np.int64))
+            found = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+            matchup_winrates[played, i] = np.where(keys[found] == queries, winrates[found], 0.5)
 
-        return {
-            'worst_matchup_winrate': worst_wr,
-            'num_unfavorable_matchups': num_unfavorable,
-            'num_counter_matchups': num_counter,
-            'avg_matchup_advantage': avg_advantage,
-            'matchup_variance': variance
-        }
+        return pd.DataFrame({
+            'worst_matchup_winrate': matchup_winrates.min(axis=1),
+            'num_unfavorable_matchups': (matchup_winrates < 0.45).sum(axis=1),
+            'num_counter_matchups': (matchup_winrates < 0.40).sum(axis=1),
+            'avg_matchup_advantage': matchup_winrates.mean(axis=1) - 0.5,
+            'matchup_variance': matchup_winrates.var(axis=1)
+        }, index=df.index)
 
 
 class ChampionSynergyCalculator:
@@ -984,12 +1093,19 @@ class ChampionSynergyCalculator:
         (98, 96): 0.85,    # Shen + Kog'Maw
     }
 
+    # SYNERGY_PAIRS keyed (lower id, higher id), so a pair is found with one
+    # lookup whichever order it is asked in (both orders hold the same score)
+    _CANONICAL_SYNERGY_PAIRS = {
+        (min(champ1, champ2), max(champ1, champ2)): score
+        for (champ1, champ2), score in SYNERGY_PAIRS.items()
+    }
+
     # Champion categories for composition detection
-    KNOCKUP_CHAMPIONS = {54, 12, 79, 113, 516, 497, 154, 57, 111, 53, 59, 164, 3}
-    ENGAGE_CHAMPIONS = {54, 12, 89, 111, 497, 59, 113, 516, 240, 79, 57, 154, 32}
-    POKE_CHAMPIONS = {101, 99, 202, 115, 126, 161, 143, 63, 43}
-    HYPERCARRY_CHAMPIONS = {67, 96, 29, 222, 145, 498}
-    ENCHANTER_SUPPORTS = {117, 40, 267, 16, 37, 350, 497, 147}
+    KNOCKUP_CHAMPIONS = frozenset({54, 12, 79, 113, 516, 497, 154, 57, 111, 53, 59, 164, 3})
+    ENGAGE_CHAMPIONS = frozenset({54, 12, 89, 111, 497, 59, 113, 516, 240, 79, 57, 154, 32})
+    POKE_CHAMPIONS = frozenset({101, 99, 202, 115, 126, 161, 143, 63, 43})
+    HYPERCARRY_CHAMPIONS = frozenset({67, 96, 29, 222, 145, 498})
+    ENCHANTER_SUPPORTS = frozenset({117, 40, 267, 16, 37, 350, 497, 147})
 
     def __init__(self, df: pd.DataFrame = None):
         """
@@ -1020,39 +1136,39 @@ class ChampionSynergyCalculator:
         print("  Calculating data-driven champion synergies...")
 
         positions = ['top', 'jungle', 'mid', 'adc', 'support']
-        pair_stats = {}  # {(champ1, champ2): {'wins': 0, 'games': 0}}
-
-        for _, row in self.df.iterrows():
-            team_100_win = row.get('team_100_win', False)
-
-            for team, win in [('team_100', team_100_win), ('team_200', not team_100_win)]:
-                # Get all champions in team
-                team_champs = []
-                for pos in positions:
-                    col = f'{team}_{pos}_champion_id'
-                    if col in self.df.columns and pd.notna(row.get(col)):
-                        team_champs.append(int(row[col]))
-
-                # Record all pairs
-                for i, champ1 in enumerate(team_champs):
-                    for champ2 in team_champs[i+1:]:
-                        # Sort to make key consistent
-                        key = tuple(sorted([champ1, champ2]))
-                        if key not in pair_stats:
-                            pair_stats[key] = {'wins': 0, 'games': 0}
-                        pair_stats[key]['games'] += 1
-                        if win:
-                            pair_stats[key]['wins'] += 1
+        if 'team_100_win' in self.df.columns:
+            team_100_win = self.df['team_100_win'].fillna(False).to_numpy(dtype=bool)
+        else:
+            team_100_win = np.zeros(len(self.df), dtype=bool)
+
+        # Every pair of lanes of each team at once, keyed (lower id, higher id)
+        pairs = []
+        for team, win in [('team_100', team_100_win), ('team_200', ~team_100_win)]:
+            champs = [self.df[col] for col in (f'{team}_{pos}_champion_id' for pos in positions)
+                      if col in self.df.columns]
+            for champs_1, champs_2 in combinations(champs, 2):
+                played = (champs_1.notna() & champs_2.notna()).to_numpy()
+                ids_1 = champs_1[played].to_numpy(dtype=np.int32)
+                ids_2 = champs_2[played].to_numpy(dtype=np.int32)
+                pairs.append(pd.DataFrame({
+                    'champ1': np.minimum(ids_1, ids_2),
+                    'champ2': np.maximum(ids_1, ids_2),
+                    'win': win[played]
+                }))
 
         # Calculate synergy as win rate deviation from 50%
         synergies = {}
-        for pair, stats in pair_stats.items():
-            if stats['games'] >= min_games:
-                winrate = stats['wins'] / stats['games']
-                # Synergy bonus: how much above 50% this pair wins
-                synergy_bonus = winrate - 0.5
-                if abs(synergy_bonus) > 0.05:  # Only keep meaningful synergies
-                    synergies[pair] = synergy_bonus
+        if pairs:
+            pair_stats = pd.concat(pairs, ignore_index=True).groupby(
+                ['champ1', 'champ2'], sort=False)['win'].agg(['sum', 'count']).reset_index()
+            pair_stats = pair_stats[pair_stats['count'] >= min_games]
+            # Synergy bonus: how much above 50% this pair wins
+            synergy_bonus = pair_stats['sum'] / pair_stats['count'] - 0.5
+            meaningful = (synergy_bonus.abs() > 0.05).to_numpy()  # Only keep meaningful synergies
+            synergies = dict(zip(
+                zip(pair_stats['champ1'][meaningful].tolist(), pair_stats['champ2'][meaningful].tolist()),
+                synergy_bonus[meaningful].tolist()
+            ))
 
         self.data_synergies = synergies
         print(f"    Found {len(synergies)} significant champion pair synergies")
@@ -1071,17 +1187,19 @@ class ChampionSynergyCalculator:
         Returns:
             Synergy score (0.0 to 1.0 for known, -0.5 to 0.5 for data-driven)
         """
+        # Known and data-driven synergies are both keyed (lower id, higher id)
+        key = (champ1, champ2) if champ1 < champ2 else (champ2, champ1)
+
         # Check known synergies first
-        if (champ1, champ2) in self.SYNERGY_PAIRS:
-            return self.SYNERGY_PAIRS[(champ1, champ2)]
-        if (champ2, champ1) in self.SYNERGY_PAIRS:
-            return self.SYNERGY_PAIRS[(champ2, champ1)]
+        score = self._CANONICAL_SYNERGY_PAIRS.get(key)
+        if score is not None:
+            return score
 
         # Check data-driven synergies
-        key = tuple(sorted([champ1, champ2]))
-        if key in self.data_synergies:
+        bonus = self.data_synergies.get(key)
+        if bonus is not None:
             # Convert to 0-1 scale (data synergy is -0.5 to 0.5)
-            return 0.5 + self.data_synergies[key]
+            return 0.5 + bonus
 
         return 0.0  # No known synergy
 
@@ -1250,6 +1368,19 @@ class TeamCompositionFeatures:
             else:
                 champion_ids.append(None)
 
+        return self.calculate_team_features_from_ids(champion_ids, team)
+
+    def calculate_team_features_from_ids(self, champion_ids: list, team: str) -> dict:
+        """
+        Calculate all team composition features for one team.
+
+        Args:
+            champion_ids: The team's 5 champion IDs (NaN / None if missing)
+            team: 'team_100' or 'team_200'
+
+        Returns:
+            dict with all team features
+        """
         # Get damage profile
         damage = self.get_team_damage_profile(champion_ids)
 
@@ -1309,16 +1440,16 @@ class LaneSynergyCalculator:
         support_id = int(support_id)
         pair = (adc_id, support_id)
 
-        # Search in all synergy types
-        for synergy_type, pairs in self.bot_synergies.items():
-            if pair in pairs:
-                score = pairs[pair]
-                return {
-                    'score': score,
-                    'type': synergy_type,
-                    'type_encoded': self.type_encoding.get(synergy_type, 0),
-                    'strength': self._score_to_strength(score)
-                }
+        # One lookup across all synergy types
+        synergy = BOT_LANE_SYNERGY_LOOKUP.get(pair)
+        if synergy is not None:
+            synergy_type, score = synergy
+            return {
+                'score': score,
+                'type': synergy_type,
+                'type_encoded': self.type_encoding.get(synergy_type, 0),
+                'strength': self._score_to_strength(score)
+            }
 
         # No known synergy found
         return {
@@ -1505,8 +1636,9 @@ class DataPreparer:
         'game_duration', 'gameDuration', 'duration',
     ]
 
-    def __init__(self, db_path: str = 'data/lol_matches.db'):
+    def __init__(self, db_path: str = 'data/lol_matches.db', stats_cache_dir: str = None):
         self.db = MatchDatabase(db_path)
+        self.stats_cache_dir = stats_cache_dir  # see ChampionStatsCalculator(cache_dir=...)
         self.champion_mapping = {}
         self.feature_columns = []
         self.target_column = 'team_100_win'
@@ -1696,6 +1828,17 @@ class DataPreparer:
         print(f"  Encoded {len(champion_columns)} champion columns")
         return df
 
+    def _team_champion_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        The 10 champion id columns of df in team_100 then team_200 lane order
+        (None where a column is missing), for itertuples() over just the picks.
+        """
+        positions = ['top', 'jungle', 'mid', 'adc', 'support']
+        return pd.DataFrame({
+            f'{team}_{pos}': df[f'{team}_{pos}_champion_id'] if f'{team}_{pos}_champion_id' in df.columns else None
+            for team in ['team_100', 'team_200'] for pos in positions
+        }, index=df.index)
+
     def add_champion_winrate_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Add champion win rate features to the dataset.
@@ -1709,63 +1852,48 @@ class DataPreparer:
         print("Adding champion win rate features...")
 
         # Calculate champion statistics
-        stats_calc = ChampionStatsCalculator(df)
+        stats_calc = ChampionStatsCalculator(df, cache_dir=self.stats_cache_dir)
         stats_calc.calculate_champion_winrates()
         stats_calc.calculate_matchup_winrates(min_games=3)
 
         positions = ['top', 'jungle', 'mid', 'adc', 'support']
-        new_features = []
 
-        for idx, row in df.iterrows():
-            features = {}
-
-            for team in ['team_100', 'team_200']:
-                team_winrates = []
+        def lookup(winrate, *cols):
+            """winrate(*champion_ids) for each row of cols, 0.5 where a column or id is missing"""
+            values = np.full(len(df), 0.5)
+            if all(col in df.columns for col in cols):
+                played = np.logical_and.reduce([df[col].notna().to_numpy() for col in cols])
+                ids = zip(*(df[col][played].to_numpy(dtype=np.int64).tolist() for col in cols))
+                values[played] = [winrate(*champ_ids) for champ_ids in ids]
+            return values
 
-                for pos in positions:
-                    col = f'{team}_{pos}_champion_id'
-                    if col in df.columns and pd.notna(row.get(col)):
-                        champ_id = int(row[col])
-                        winrate = stats_calc.get_champion_winrate(champ_id, pos)
-                        features[f'{team}_{pos}_winrate'] = winrate
-                        team_winrates.append(winrate)
-                    else:
-                        features[f'{team}_{pos}_winrate'] = 0.5
-                        team_winrates.append(0.5)
-
-                # Average team win rate
-                features[f'{team}_avg_winrate'] = np.mean(team_winrates)
+        features = {}
+        for team in ['team_100', 'team_200']:
+            team_winrates = []
+            for pos in positions:
+                winrates = lookup(lambda champ_id: stats_calc.get_champion_winrate(champ_id, pos),
+                                  f'{team}_{pos}_champion_id')
+                features[f'{team}_{pos}_winrate'] = winrates
+                team_winrates.append(winrates)
 
-            # Win rate difference
-            features['winrate_diff'] = features['team_100_avg_winrate'] - features['team_200_avg_winrate']
+            # Average team win rate
+            features[f'{team}_avg_winrate'] = np.column_stack(team_winrates).mean(axis=1)
 
-            # Matchup win rates for each lane
-            for pos in positions:
-                col_100 = f'team_100_{pos}_champion_id'
-                col_200 = f'team_200_{pos}_champion_id'
-
-                if col_100 in df.columns and col_200 in df.columns:
-                    champ_100 = row.get(col_100)
-                    champ_200 = row.get(col_200)
-
-                    if pd.notna(champ_100) and pd.notna(champ_200):
-                        matchup_wr = stats_calc.get_matchup_winrate(
-                            int(champ_100), int(champ_200), pos
-                        )
-                        features[f'matchup_{pos}_winrate'] = matchup_wr
-                    else:
-                        features[f'matchup_{pos}_winrate'] = 0.5
-                else:
-                    features[f'matchup_{pos}_winrate'] = 0.5
+        # Win rate difference
+        features['winrate_diff'] = features['team_100_avg_winrate'] - features['team_200_avg_winrate']
 
-            # Average matchup winrate (relative to 0.5)
-            matchup_wrs = [features[f'matchup_{pos}_winrate'] for pos in positions]
-            features['avg_lane_matchup_winrate'] = np.mean(matchup_wrs) - 0.5
+        # Matchup win rates for each lane
+        for pos in positions:
+            features[f'matchup_{pos}_winrate'] = lookup(
+                lambda champ_100, champ_200: stats_calc.get_matchup_winrate(champ_100, champ_200, pos),
+                f'team_100_{pos}_champion_id', f'team_200_{pos}_champion_id')
 
-            new_features.append(features)
+        # Average matchup winrate (relative to 0.5)
+        matchup_wrs = np.column_stack([features[f'matchup_{pos}_winrate'] for pos in positions])
+        features['avg_lane_matchup_winrate'] = matchup_wrs.mean(axis=1) - 0.5
 
         # Add features to dataframe
-        features_df = pd.DataFrame(new_features, index=df.index)
+        features_df = pd.DataFrame(features, index=df.index)
         df = pd.concat([df, features_df], axis=1)
 
         print(f"  Added {len(features_df.columns)} win rate features")
@@ -1786,14 +1914,15 @@ class DataPreparer:
         # Initialize team composition calculator
         comp_features = TeamCompositionFeatures()
 
+        champion_ids = self._team_champion_ids(df)
         new_features = []
 
-        for idx, row in df.iterrows():
+        for ids in champion_ids.itertuples(index=False, name=None):
             features = {}
 
             # Get features for both teams
-            team_100_features = comp_features.calculate_team_features(row, 'team_100')
-            team_200_features = comp_features.calculate_team_features(row, 'team_200')
+            team_100_features = comp_features.calculate_team_features_from_ids(list(ids[:5]), 'team_100')
+            team_200_features = comp_features.calculate_team_features_from_ids(list(ids[5:]), 'team_200')
 
             features.update(team_100_features)
             features.update(team_200_features)
@@ -1832,22 +1961,13 @@ class DataPreparer:
         synergy_calc = ChampionSynergyCalculator(df)
         synergy_calc.calculate_data_driven_synergies(min_games=5)
 
-        positions = ['top', 'jungle', 'mid', 'adc', 'support']
+        champion_ids = self._team_champion_ids(df)
         new_features = []
 
-        for idx, row in df.iterrows():
+        for ids in champion_ids.itertuples(index=False, name=None):
             features = {}
 
-            for team in ['team_100', 'team_200']:
-                # Get all champions in team
-                team_champs = []
-                for pos in positions:
-                    col = f'{team}_{pos}_champion_id'
-                    if col in df.columns:
-                        team_champs.append(row.get(col))
-                    else:
-                        team_champs.append(None)
-
+            for team, team_champs in [('team_100', list(ids[:5])), ('team_200', list(ids[5:]))]:
                 # Calculate synergy features
                 synergy_features = synergy_calc.calculate_team_synergy_score(team_champs)
 
@@ -1898,14 +2018,8 @@ class DataPreparer:
         # Initialize matchup analyzer
         matchup_analyzer = MatchupAnalyzer(df, min_games=10)
 
-        new_features = []
-
-        for idx, row in df.iterrows():
-            features = matchup_analyzer.get_matchup_features(row)
-            new_features.append(features)
-
-        # Add features to dataframe
-        features_df = pd.DataFrame(new_features, index=df.index)
+        # Add features to dataframe (computed for all rows in one pass)
+        features_df = matchup_analyzer.get_matchup_features_frame(df)
         df = pd.concat([df, features_df], axis=1)
 
         print(f"  Added {len(features_df.columns)} matchup detection features")
@@ -1930,11 +2044,12 @@ class DataPreparer:
         # Initialize lane synergy calculator
         lane_synergy_calc = LaneSynergyCalculator()
 
-        new_features = []
-
-        for idx, row in df.iterrows():
-            features = lane_synergy_calc.calculate_lane_synergy_features(row)
-            new_features.append(features)
+        # Rows as plain dicts of the champion columns (row.get works the same)
+        champion_cols = [col for col in df.columns if col.endswith('_champion_id')]
+        new_features = [
+            lane_synergy_calc.calculate_lane_synergy_features(row)
+            for row in df[champion_cols].to_dict('records')
+        ]
 
         # Add features to dataframe
         features_df = pd.DataFrame(new_features, index=df.index)
@@ -2175,6 +2290,10 @@ def main():
                        help='Include post-game stats (kills, gold, etc). Default: draft-only mode')
     parser.add_argument('--no-advanced-features', action='store_true',
                        help='Disable advanced features (win rates, team composition)')
+    parser.add_argument('--stats-cache', default='data/cache',
+                       help='Cache directory for champion / matchup win counts (default: data/cache)')
+    parser.add_argument('--no-stats-cache', action='store_true',
+                       help='Always recount champion / matchup win rates')
 
     args = parser.parse_args()
 
@@ -2183,7 +2302,7 @@ def main():
     os.chdir(project_root)
 
     # Run preparation
-    preparer = DataPreparer(args.db)
+    preparer = DataPreparer(args.db, stats_cache_dir=None if args.no_stats_cache else args.stats_cache)
     preparer.prepare(
         encoding=args.encoding,
         test_size=args.test_size,
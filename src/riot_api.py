@@ -157,6 +157,14 @@ class SmartKeyRotator:
 # Initialize rotator with all keys
 _key_rotator = SmartKeyRotator(API_KEYS)
 
+# One keep-alive HTTP session for every call: each request reuses a pooled
+# connection to the regional host instead of a new TCP + TLS handshake.
+# The pool is sized for the collector's worker threads (one per key).
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=8, pool_maxsize=max(10, _key_rotator.key_count * 2)
+))
+
 # For backward compatibility (single key usage)
 HEADERS = {"X-Riot-Token": API_KEY}
 
@@ -188,7 +196,7 @@ def get_headers_for_key(api_key_index: int = None):
 def get_entries(page=1, use_rotation=True, api_key_index=None):
     url = f"https://{REGION}.api.riotgames.com/lol/league/v4/entries/{QUEUE}/{TIER}/{DIVISION}?page={page}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -197,7 +205,7 @@ def get_challenger_league(use_rotation=True, api_key_index=None):
     """Get all Challenger players (returns full league with ~300 players)"""
     url = f"https://{REGION}.api.riotgames.com/lol/league/v4/challengerleagues/by-queue/{QUEUE}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     data = r.json()
     # Return entries with summonerId -> need to get PUUID separately
@@ -208,7 +216,7 @@ def get_grandmaster_league(use_rotation=True, api_key_index=None):
     """Get all Grandmaster players (returns full league with ~700 players)"""
     url = f"https://{REGION}.api.riotgames.com/lol/league/v4/grandmasterleagues/by-queue/{QUEUE}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     data = r.json()
     return data.get('entries', [])
@@ -218,7 +226,7 @@ def get_master_league(use_rotation=True, api_key_index=None):
     """Get all Master players (returns full league with ~3000+ players)"""
     url = f"https://{REGION}.api.riotgames.com/lol/league/v4/masterleagues/by-queue/{QUEUE}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     data = r.json()
     return data.get('entries', [])
@@ -270,7 +278,7 @@ def get_high_elo_players(api_key_index=None):
 def get_league(league_id, use_rotation=True, api_key_index=None):
     url = f"https://{REGION}.api.riotgames.com/lol/league/v4/leagues/{league_id}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -339,7 +347,7 @@ def get_matches_by_puuid(puuid, count=5, use_rotation=True, api_key_index=None):
     routing = get_routing_region()
     url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?count={count}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -349,7 +357,7 @@ def get_match_details(match_id, use_rotation=True, api_key_index=None):
     routing = get_routing_from_match_id(match_id)
     url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -357,7 +365,7 @@ def get_match_details(match_id, use_rotation=True, api_key_index=None):
 def get_summoner_by_puuid(puuid, use_rotation=True, api_key_index=None):
     url = f"https://{REGION}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -366,7 +374,7 @@ def get_summoner_by_summoner_id(summoner_id, use_rotation=True, api_key_index=No
     """Get summoner info (including PUUID) from summonerId"""
     url = f"https://{REGION}.api.riotgames.com/lol/summoner/v4/summoners/{summoner_id}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -377,7 +385,7 @@ def get_summoner_by_name(summoner_name, use_rotation=True, api_key_index=None):
     """
     url = f"https://kr.api.riotgames.com/lol/summoner/v4/summoners/by-name/{summoner_name}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -390,7 +398,7 @@ def get_account_by_puuid(puuid, use_rotation=True, api_key_index=None):
     routing = get_routing_region()
     url = f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -420,7 +428,7 @@ def get_champion_mastery_by_puuid(puuid, use_rotation=True, api_key_index=None):
     """
     url = f"https://{REGION}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -432,7 +440,7 @@ def get_champion_mastery_top(puuid, count=5, use_rotation=True, api_key_index=No
     """
     url = f"https://{REGION}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top?count={count}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -443,7 +451,7 @@ def get_champion_mastery_score(puuid, use_rotation=True, api_key_index=None):
     """
     url = f"https://{REGION}.api.riotgames.com/lol/champion-mastery/v4/scores/by-puuid/{puuid}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -454,7 +462,7 @@ def get_mastery_for_champion(puuid, champion_id, use_rotation=True, api_key_inde
     """
     url = f"https://{REGION}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/by-champion/{champion_id}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -482,7 +490,7 @@ def get_match_timeline(match_id, use_rotation=True, api_key_index=None):
     routing = get_routing_from_match_id(match_id)
     url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -507,7 +515,7 @@ def get_summoner_rank(summoner_id, use_rotation=True, api_key_index=None):
     """
     url = f"https://{REGION}.api.riotgames.com/lol/league/v4/entries/by-summoner/{summoner_id}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -531,7 +539,7 @@ def get_account_by_riot_id(game_name, tag_line, use_rotation=True, api_key_index
     """
     url = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
     headers = get_headers_for_key(api_key_index) if api_key_index is not None else (get_rotating_headers() if use_rotation else HEADERS)
-    r = requests.get(url, headers=headers)
+    r = _session.get(url, headers=headers)
     r.raise_for_status()
     return r.json()
 